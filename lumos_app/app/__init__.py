@@ -1,19 +1,31 @@
 from flask import Flask
 from .routes import register_blueprints
-from .config import load_db_config, Config
+import os
+from .config import load_db_config, Config, init_settings, enable_sighup_reload
 from .extensions import init_db_pool
+from .services.activitylog import start_activity_logger
 
 
 def create_app():
     app = Flask(__name__)
 
+    # Parse config.ini once; every module reads from get_settings()
+    settings = init_settings()
+
+    if os.getenv("LUMOS_SIGHUP_RELOAD", "N") == "Y":
+        enable_sighup_reload()
+
     # Load BASE_DIR and other app config
     app.config.from_object(Config)
+    app.config["BASE_DIR"] = settings.base_dir
 
     # Load DB config separately
     db_config = load_db_config()
     init_db_pool(db_config)
 
+    # Audit rows are batched and written off the request path
+    start_activity_logger()
+
     # Register routes
     register_blueprints(app)
 
@@ -0,0 +1,113 @@
+import hashlib
+import json
+from datetime import timezone
+
+from flask import Response, jsonify, request
+
+from .db_utils import transaction
+
+
+# ---------------------------------------------------
+# ETag Helpers
+# ---------------------------------------------------
+def payload_etag(payload):
+    """
+    Content hash of a JSON payload. Identical data gives the same ETag
+    in every worker process.
+    """
+
+    body = json.dumps(payload, sort_keys=True, default=str)
+    return hashlib.sha1(body.encode()).hexdigest()
+
+
+def not_modified(etag, last_modified=None):
+    response = Response(status=304)
+    response.set_etag(etag)
+    response.headers["Cache-Control"] = "no-cache"
+
+    if last_modified:
+        response.last_modified = last_modified
+
+    return response
+
+
+def as_http_date(value):
+    """lastupd columns are naive timestamps; send them as-is in UTC form."""
+
+    if value is None or not hasattr(value, "tzinfo"):
+        return None
+
+    value = value.replace(microsecond=0)
+    return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+
+
+def is_fresh(etag, last_modified=None):
+    """
+    True when the client copy is current. If-None-Match wins over
+    If-Modified-Since, as in RFC 9110.
+    """
+
+    if request.if_none_match:
+        return request.if_none_match.contains_weak(etag)
+
+    if request.if_modified_since and last_modified:
+        return last_modified <= request.if_modified_since
+
+    return False
+
+
+def etag_json_response(payload, etag=None):
+    """
+    Returns 304 when the client's If-None-Match already holds `etag`,
+    otherwise the JSON payload with the ETag attached.
+    """
+
+    etag = etag or payload_etag(payload)
+
+    if request.if_none_match.contains_weak(etag):
+        return not_modified(etag)
+
+    response = jsonify(payload)
+    response.set_etag(etag)
+    response.headers["Cache-Control"] = "no-cache"
+    return response
+
+
+# ---------------------------------------------------
+# Conditional GET for DB-backed Reads
+# ---------------------------------------------------
+def conditional_json(validator_query, params, build):
+    """
+    Answers a read endpoint with 304 when nothing changed.
+
+    validator_query is a cheap query returning one row whose first
+    column is the last modification time (lastupd / lastupd_at) and
+    whose other columns (e.g. COUNT(*)) catch changes the timestamp
+    misses. The whole row becomes the ETag.
+
+    build(tx) runs only when the client copy is stale and returns
+    (payload, status). Both run in one read-only transaction.
+    """
+
+    with transaction(readonly=True) as tx:
+        validator = tx.fetchone(validator_query, params) or ()
+
+        etag = payload_etag(list(validator))
+        last_modified = as_http_date(validator[0]) if validator else None
+
+        if is_fresh(etag, last_modified):
+            return not_modified(etag, last_modified)
+
+        payload, status = build(tx)
+
+    response = jsonify(payload)
+    response.status_code = status
+
+    if status == 200:
+        response.set_etag(etag)
+        response.headers["Cache-Control"] = "no-cache"
+
+        if last_modified:
+            response.last_modified = last_modified
+
+    return response
@@ -1,29 +1,215 @@
 import configparser
+import logging
 import os
+import signal
+import socket
+from dataclasses import dataclass, replace
+from types import MappingProxyType
+
+CONFIG_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(__file__)),
+    "config.ini"
+)
+
+
+# --------- TYPED SECTIONS ----------
+@dataclass(frozen=True)
+class PostgresSettings:
+    dbname: str
+    user: str
+    password: str
+    host: str
+    port: str
+    schema_name: str = "lumos"
+
+
+@dataclass(frozen=True)
+class OracleSettings:
+    service_name: str
+    user: str
+    password: str
+    host: str
+    port: str
+    dsn: str
+    schema_name: str
+
+
+@dataclass(frozen=True)
+class Settings:
+    active_db: str
+    postgres: PostgresSettings
+    oracle: OracleSettings
+    base_dir: str
+    flask_env: str
+    page_info: MappingProxyType
+    hostname: str
+    ip_address: str
+
+    @property
+    def db(self):
+        """Section of the active database."""
+        return self.oracle if self.active_db == "LUMOS_ORACLE" else self.postgres
+
+    @property
+    def schema_name(self):
+        return self.db.schema_name
+
+
+# --------- PAGE PATHS ----------
+def build_page_info(flask_env):
+    pages = {
+        "configuration": {
+            "tempdir_path": f"/appfs/{flask_env}/config_repo",
+            "targetdir_path": f"/appfs/{flask_env}/Lumos/Configurations",
+            "git_branch_name": "Test_Configurations",
+            "path": f"/appfs/{flask_env}/Lumos/Configurations",
+            "source_subfolder": "configurations"
+        },
+
+        "sample": {
+            "tempdir_path": f"/appfs/{flask_env}/sample_repo",
+            "targetdir_path": f"/appfs/{flask_env}/Lumos/sample",
+            "git_branch_name": "Test_Sample",
+            "path": f"/appfs/{flask_env}/Lumos/sample",
+            "source_subfolder": "sample"
+        },
+
+        "executionlog": {
+            "path": f"/appfs/{flask_env}/Lumos/Logs"
+        },
+
+        "executionreports": {
+            "path": f"/appfs/{flask_env}/Lumos/Executions"
+        },
+
+        "executiondetails": {
+            "path": f"/appfs/{flask_env}/Lumos/Executions"
+        }
+    }
+
+    return MappingProxyType({
+        name: MappingProxyType(info) for name, info in pages.items()
+    })
+
+
+# --------- HOST IDENTITY ----------
+def resolve_host_identity():
+    hostname = socket.gethostname()
+
+    try:
+        ip_address = socket.gethostbyname(hostname)
+    except OSError:
+        ip_address = ""
+
+    return hostname, ip_address
 
-# --------- DB CONFIG LOADER ----------
-def load_db_config():
-    config_path = os.path.join(
-        os.path.dirname(os.path.dirname(__file__)),
-        "config.ini"
-    )
 
+# --------- SETTINGS LOADER ----------
+def load_settings(config_path=CONFIG_PATH, host_identity=None):
     config = configparser.ConfigParser()
     config.read(config_path)
 
-    active_db = config['LUMOS_DB']['active_db']
-    db_config = config[active_db]
+    postgres = config["LUMOS_POSTGRESS"]
+    oracle = config["LUMOS_ORACLE"]
+    flask_env = os.getenv("FLASK_ENV", "dev")
+
+    hostname, ip_address = host_identity or resolve_host_identity()
+
+    return Settings(
+        active_db=config["LUMOS_DB"]["active_db"],
+        postgres=PostgresSettings(
+            dbname=postgres["dbname"],
+            user=postgres["user"],
+            password=postgres["password"],
+            host=postgres["host"],
+            port=postgres["port"],
+            schema_name=postgres.get("schema_name", "lumos")
+        ),
+        oracle=OracleSettings(
+            service_name=oracle["service_name"],
+            user=oracle["user"],
+            password=oracle["password"],
+            host=oracle["host"],
+            port=oracle["port"],
+            dsn=oracle["dsn"],
+            schema_name=oracle["schema_name"]
+        ),
+        base_dir=os.path.abspath(
+            config.get("LUMOS_APP", "base_dir", fallback="safe/config/files")
+        ),
+        flask_env=flask_env,
+        page_info=build_page_info(flask_env),
+        hostname=hostname,
+        ip_address=ip_address
+    )
+
+
+_settings = None
+
+
+def init_settings(config_path=CONFIG_PATH):
+    """Loads settings once per process. Called by create_app."""
+    global _settings
+    _settings = load_settings(config_path)
+    return _settings
+
+
+def get_settings():
+    """Process-wide settings, loaded on first use outside create_app."""
+    if _settings is None:
+        return init_settings()
+    return _settings
+
+
+def reload_settings(config_path=CONFIG_PATH):
+    """
+    Re-reads config.ini and swaps the settings object in one step.
+    Host identity is kept; the DB pool is not rebuilt.
+    """
+    global _settings
+
+    current = get_settings()
+    new_settings = load_settings(
+        config_path,
+        host_identity=(current.hostname, current.ip_address)
+    )
+
+    if new_settings.postgres != current.postgres or new_settings.oracle != current.oracle:
+        logging.warning("DB settings changed; restart the app to reconnect the pool")
+
+    _settings = replace(new_settings, postgres=current.postgres, oracle=current.oracle)
+    logging.info(f"Settings reloaded from {config_path}")
+    return _settings
+
+
+def enable_sighup_reload():
+    """Reload settings on SIGHUP. Only possible from the main thread."""
+
+    def handle_sighup(signum, frame):
+        try:
+            reload_settings()
+        except Exception as e:
+            logging.error(f"Settings reload failed: {e}")
+
+    try:
+        signal.signal(signal.SIGHUP, handle_sighup)
+    except (ValueError, AttributeError) as e:
+        logging.warning(f"SIGHUP reload not enabled: {e}")
+
+
+# --------- DB CONFIG LOADER ----------
+def load_db_config():
+    db = get_settings().postgres
 
     return {
-        "user": db_config["user"],
-        "password": db_config["password"],
-        "host": db_config["host"],
-        "port": db_config["port"],
-        "dbname": db_config["dbname"]
+        "user": db.user,
+        "password": db.password,
+        "host": db.host,
+        "port": db.port,
+        "dbname": db.dbname
     }
 
 # --------- APP CONFIG ----------
 class Config:
     BASE_DIR = os.path.abspath("safe/config/files")
     MAX_CONTENT_LENGTH = 5 * 1024 * 1024  # 5MB limit
-
@@ -6,32 +6,254 @@
 
 # This will be repeated everywhere.
 
-from app.extensions import connection_pool
+from contextlib import contextmanager
+from collections import namedtuple
+import itertools
+import json
+import logging
+import uuid
+
+from flask import Response, request, stream_with_context
+from psycopg2.extras import execute_values
+
+from app import extensions
+
+
+# ---------------------------------------------------
+# Unit of Work
+# ---------------------------------------------------
+class Transaction:
+    """
+    One pooled connection and one commit for a block of statements.
+    Use it through transaction(), not directly.
+    """
+
+    _savepoint_ids = itertools.count(1)
+
+    def __init__(self, conn, readonly=False):
+        self.conn = conn
+        self.cursor = conn.cursor()
+        self.readonly = readonly
+
+        if readonly:
+            self.cursor.execute("SET TRANSACTION READ ONLY")
+
+    def execute(self, query, params=None):
+        """Runs one statement and returns its rowcount."""
+        self.cursor.execute(query, params)
+        return self.cursor.rowcount
+
+    def executemany(self, query, params_list):
+        """Runs one statement per params tuple on the same connection."""
+        self.cursor.executemany(query, params_list)
+        return self.cursor.rowcount
+
+    def execute_values(self, query, rows, template=None):
+        """Sends all rows as one multi-row VALUES statement."""
+        rows = list(rows)
+
+        if not rows:
+            return 0
+
+        execute_values(
+            self.cursor, query, rows,
+            template=template,
+            page_size=len(rows)
+        )
+        return len(rows)
+
+    def fetchone(self, query, params=None, as_=None):
+        """Returns the first row as a tuple, dict ("dict") or named tuple ("namedtuple")."""
+        self.cursor.execute(query, params)
+        row = self.cursor.fetchone()
+
+        if row is None:
+            return None
+
+        return self._convert([row], as_)[0]
+
+    def fetchall(self, query, params=None, as_=None):
+        """Returns every row as tuples, dicts ("dict") or named tuples ("namedtuple")."""
+        self.cursor.execute(query, params)
+        return self._convert(self.cursor.fetchall(), as_)
+
+    def fetchval(self, query, params=None):
+        """Returns the first column of the first row, or None."""
+        row = self.fetchone(query, params)
+        return row[0] if row else None
+
+    def notify(self, channel, payload=""):
+        """pg_notify(); listeners receive it only if this transaction commits."""
+        self.cursor.execute("SELECT pg_notify(%s, %s)", (channel, payload))
+
+    @contextmanager
+    def savepoint(self, name=None):
+        """
+        Nested rollback point. An exception inside the block rolls back
+        to the savepoint and is re-raised; the outer transaction survives
+        if the caller handles it.
+        """
+        name = name or f"sp_{next(self._savepoint_ids)}"
+
+        self.cursor.execute(f"SAVEPOINT {name}")
+
+        try:
+            yield self
+        except Exception:
+            self.cursor.execute(f"ROLLBACK TO SAVEPOINT {name}")
+            raise
+        else:
+            self.cursor.execute(f"RELEASE SAVEPOINT {name}")
+
+    def _convert(self, rows, as_):
+        if as_ is None:
+            return rows
+
+        columns = [col.name for col in self.cursor.description]
+
+        if as_ == "dict":
+            return [dict(zip(columns, row)) for row in rows]
+
+        if as_ == "namedtuple":
+            Row = namedtuple("Row", columns, rename=True)
+            return [Row(*row) for row in rows]
+
+        raise ValueError(f"Unsupported row format: {as_}")
+
+
+@contextmanager
+def transaction(readonly=False):
+    """
+    with transaction() as tx:
+        tx.execute(...)
+        tx.executemany(...)
+
+    Commits once when the block exits, rolls back on any exception.
+    readonly=True runs the block as a READ ONLY transaction.
+    """
+
+    pool = extensions.connection_pool
+    conn = pool.getconn()
+    tx = None
 
-def execute_query(query, params=None, fetch=None, commit=False):
-    conn = connection_pool.getconn()
     try:
-        cursor = conn.cursor()
-        cursor.execute(query, params)
+        tx = Transaction(conn, readonly=readonly)
 
-        result = None
+        yield tx
+
+        if readonly:
+            conn.rollback()
+        else:
+            conn.commit()
+
+    except BaseException:
+        conn.rollback()   # 🔥 VERY IMPORTANT (also when a stream is closed early)
+        raise             # Let route handle the error
+
+    finally:
+        if tx is not None:
+            tx.cursor.close()
+        pool.putconn(conn)
+
+
+# ---------------------------------------------------
+# Single Statement Helper
+# ---------------------------------------------------
+def execute_query(query, params=None, fetch=None, commit=False, return_rowcount=False):
+    with transaction(readonly=not commit) as tx:
+        rowcount = tx.execute(query, params)
+
+        if return_rowcount:
+            return rowcount
 
         if fetch == "one":
-            result = cursor.fetchone()
+            return tx.cursor.fetchone()
         elif fetch == "all":
-            result = cursor.fetchall()
+            return tx.cursor.fetchall()
 
-        if commit:
-            conn.commit()
+        return None
 
-        return result
 
-    except Exception as e:
-        conn.rollback()   # 🔥 VERY IMPORTANT
-        raise e           # Let route handle the error
+# ---------------------------------------------------
+# Streaming Results
+# ---------------------------------------------------
+NDJSON_MIMETYPE = "application/x-ndjson"
 
-    finally:
-        connection_pool.putconn(conn)
+
+def stream_query(query, params=None, columns=None, itersize=2000, ndjson=False):
+    """
+    Yields the result of a query as JSON text chunks, reading it through
+    a server-side (named) cursor `itersize` rows at a time.
+
+    Rows become dicts when `columns` is given, lists otherwise.
+    ndjson=False yields one JSON array, ndjson=True one object per line.
+    """
+
+    def encode(row):
+        item = dict(zip(columns, row)) if columns else list(row)
+        return json.dumps(item, default=str)
+
+    with transaction(readonly=True) as tx:
+        cursor = tx.conn.cursor(name=f"stream_{uuid.uuid4().hex}")
+        cursor.itersize = itersize
+
+        try:
+            cursor.execute(query, params)
+
+            if not ndjson:
+                yield "["
+
+            first = True
+
+            while True:
+                rows = cursor.fetchmany(itersize)
+
+                if not rows:
+                    break
+
+                if ndjson:
+                    yield "".join(encode(row) + "\n" for row in rows)
+                else:
+                    chunk = ",".join(encode(row) for row in rows)
+                    yield chunk if first else "," + chunk
+
+                first = False
+
+            if not ndjson:
+                yield "]"
+
+        except Exception as e:
+            # Headers are already sent, so the client just sees a truncated body
+            logging.error(f"Streaming query failed: {e}")
+            raise
+
+        finally:
+            cursor.close()
+
+
+def wants_ndjson():
+    return (
+        request.args.get("format") == "ndjson"
+        or NDJSON_MIMETYPE in request.headers.get("Accept", "")
+    )
+
+
+def stream_response(query, params=None, columns=None, itersize=2000):
+    """
+    Flask response that streams a query as a JSON array, or as NDJSON
+    when the client asks for it (?format=ndjson or Accept header).
+    """
+
+    ndjson = wants_ndjson()
+    chunks = stream_query(query, params, columns=columns, itersize=itersize, ndjson=ndjson)
+
+    # Run the query before sending headers so SQL errors still become a 500
+    first_chunk = next(chunks, "")
+
+    return Response(
+        stream_with_context(itertools.chain([first_chunk], chunks)),
+        mimetype=NDJSON_MIMETYPE if ndjson else "application/json"
+    )
 
 
 # Then routes become clean:
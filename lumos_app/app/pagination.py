@@ -0,0 +1,129 @@
+import base64
+import json
+from datetime import date, datetime
+
+from app.db_utils import transaction
+
+DEFAULT_LIMIT = 100
+MAX_LIMIT = 1000
+
+
+# ---------------------------------------------------
+# Cursor Encoding
+# ---------------------------------------------------
+def encode_cursor(values):
+    """
+    Opaque, URL-safe cursor holding the sort key values of the last row.
+    """
+
+    def encode_value(value):
+        if isinstance(value, datetime):
+            return {"dt": value.isoformat()}
+        if isinstance(value, date):
+            return {"d": value.isoformat()}
+        return value
+
+    payload = json.dumps([encode_value(v) for v in values])
+    return base64.urlsafe_b64encode(payload.encode()).decode()
+
+
+def decode_cursor(cursor):
+
+    def decode_value(value):
+        if isinstance(value, dict) and "dt" in value:
+            return datetime.fromisoformat(value["dt"])
+        if isinstance(value, dict) and "d" in value:
+            return date.fromisoformat(value["d"])
+        return value
+
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except Exception:
+        raise ValueError("Invalid cursor")
+
+    if not isinstance(values, list):
+        raise ValueError("Invalid cursor")
+
+    return [decode_value(v) for v in values]
+
+
+def parse_limit(value, default_limit=DEFAULT_LIMIT):
+    if value in (None, ""):
+        return default_limit
+
+    try:
+        limit = int(value)
+    except (TypeError, ValueError):
+        raise ValueError("limit must be an integer")
+
+    if limit < 1:
+        raise ValueError("limit must be positive")
+
+    return min(limit, MAX_LIMIT)
+
+
+# ---------------------------------------------------
+# Keyset Page Fetch
+# ---------------------------------------------------
+def fetch_page(select, from_clause, keys, args, where=None, params=(),
+               filters=None, descending=True, default_limit=DEFAULT_LIMIT):
+    """
+    Fetches one page ordered by `keys` (SQL expressions, the last one
+    must make the order unique) using a keyset cursor, so every page
+    costs the same as the first one.
+
+    args is the request query string: `limit`, `cursor` and any name in
+    `filters` ({param_name: column}) as a case-insensitive contains filter.
+
+    Returns (rows, next_cursor); rows contain only the `select` columns.
+    """
+
+    limit = parse_limit(args.get("limit"), default_limit)
+
+    clauses = [where] if where else []
+    values = list(params)
+
+    for name, column in (filters or {}).items():
+        value = args.get(name)
+
+        if value:
+            clauses.append(f"{column}::text ILIKE %s")
+            values.append(f"%{value}%")
+
+    cursor = args.get("cursor")
+
+    if cursor:
+        key_values = decode_cursor(cursor)
+
+        if len(key_values) != len(keys):
+            raise ValueError("Invalid cursor")
+
+        operator = "<" if descending else ">"
+        placeholders = ", ".join(["%s"] * len(keys))
+
+        clauses.append(f"({', '.join(keys)}) {operator} ({placeholders})")
+        values.extend(key_values)
+
+    direction = "DESC" if descending else "ASC"
+    where_sql = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+
+    query = f"""
+        SELECT {select}, {', '.join(keys)}
+        FROM {from_clause}
+        {where_sql}
+        ORDER BY {', '.join(f'{key} {direction}' for key in keys)}
+        LIMIT %s
+    """
+    values.append(limit + 1)
+
+    with transaction(readonly=True) as tx:
+        rows = tx.fetchall(query, values)
+
+    key_count = len(keys)
+    next_cursor = None
+
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1][-key_count:])
+
+    return [row[:-key_count] for row in rows], next_cursor
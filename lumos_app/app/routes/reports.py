@@ -1,5 +1,5 @@
 from flask import Blueprint, request, jsonify
-from ..db_utils import execute_query
+from ..db_utils import transaction
 
 reports_bp = Blueprint("reports", __name__)
 
@@ -12,36 +12,30 @@ def developer_report():
         return jsonify({"error": "releaseId is required"}), 400
 
     try:
-        # Step 1: Get start date
-        query1 = """
-            SELECT dt_column
-            FROM lumos.lst_of_val
-            WHERE type = %s AND name = %s
-        """
-
-        date_result = execute_query(
-            query1,
-            ("Lumos_release", releaseid),
-            fetch="all"
-        )
-
-        if not date_result:
-            return jsonify({"error": "Release not found"}), 404
-
-        start_date = date_result[0][0]
-
-        # Step 2: Get developer report data
-        query2 = """
-            SELECT user_id, testcase_count, execution_count
-            FROM your_report_table
-            WHERE start_date >= %s AND release_id = %s
-        """
-
-        data = execute_query(
-            query2,
-            (start_date, releaseid),
-            fetch="all"
-        )
+        with transaction(readonly=True) as tx:
+
+            # Step 1: Get start date
+            query1 = """
+                SELECT dt_column
+                FROM lumos.lst_of_val
+                WHERE type = %s AND name = %s
+            """
+
+            date_result = tx.fetchall(query1, ("Lumos_release", releaseid))
+
+            if not date_result:
+                return jsonify({"error": "Release not found"}), 404
+
+            start_date = date_result[0][0]
+
+            # Step 2: Get developer report data
+            query2 = """
+                SELECT user_id, testcase_count, execution_count
+                FROM your_report_table
+                WHERE start_date >= %s AND release_id = %s
+            """
+
+            data = tx.fetchall(query2, (start_date, releaseid))
 
         # Step 3: Build structured response
         report = []
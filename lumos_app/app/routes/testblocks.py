@@ -1,7 +1,9 @@
 from flask import Blueprint, request, jsonify
 from ..services.activitylog import log_activity
-from ..db_utils import execute_query
-from ..extensions import connection_pool
+from ..services.stepwriter import write_steps
+from ..services.catalog import invalidate
+from ..db_utils import execute_query, transaction
+from ..conditional import conditional_json
 
 testblocks_bp = Blueprint("testblocks", __name__)
 
@@ -10,27 +12,20 @@ testblocks_bp = Blueprint("testblocks", __name__)
 def testblocks_list():
     try:
 
+        # Latest action per block comes from the lumos.last_activity projection
         query = """
-            SELECT blockname, act_date, lumos_user, action_type
+            SELECT b.blockname,
+                   TO_CHAR(la.act_date, 'YYYY-MM-DD HH24:MI:SS GMT') AS act_date,
+                   la.lumos_user,
+                   la.action_type
             FROM (
-                SELECT 
-                    b.blockname,
-                    al.lumos_user,
-                    TO_CHAR(al.act_date, 'YYYY-MM-DD HH24:MI:SS GMT') AS act_date,
-                    al.action_type,
-                    ROW_NUMBER() OVER (
-                        PARTITION BY b.blockname 
-                        ORDER BY al.act_date DESC
-                    ) AS rn
-                FROM (
-                    SELECT DISTINCT blockname
-                    FROM lumos.reuseable_pack
-                    WHERE inactiveflag = 'N'
-                ) b
-                LEFT JOIN lumos.activity_log al
-                    ON b.blockname = al.blockname
-            ) t1
-            WHERE rn = 1
+                SELECT DISTINCT blockname
+                FROM lumos.reuseable_pack
+                WHERE inactiveflag = 'N'
+            ) b
+            LEFT JOIN lumos.last_activity la
+                ON la.entity_type = 'block'
+               AND la.entity_name = b.blockname
         """
 
         testblocks = execute_query(query, fetch="all") or []
@@ -73,22 +68,32 @@ def edit_testblock():
             FROM lumos.reuseable_pack WHERE blockname = %s ORDER BY step
         """
 
-        rows = execute_query(query, (testblock_name,), fetch="all")
-
-        formatted_rows = [
-            {
-                "StepType": row[0],
-                "Element": row[1],
-                "Action": row[2],
-                "ErrorCode": row[3],
-                "Value": row[4],
-                "Variable": row[5],
-                "UpdateFlag": row[6]
-            }
-            for row in rows
-        ]
-
-        return jsonify(formatted_rows), 200
+        def build(tx):
+            rows = tx.fetchall(query, (testblock_name,))
+
+            formatted_rows = [
+                {
+                    "StepType": row[0],
+                    "Element": row[1],
+                    "Action": row[2],
+                    "ErrorCode": row[3],
+                    "Value": row[4],
+                    "Variable": row[5],
+                    "UpdateFlag": row[6]
+                }
+                for row in rows
+            ]
+
+            return formatted_rows, 200
+
+        # 304 when the steps have not changed since the client's copy
+        return conditional_json(
+            """SELECT MAX(lastupd), COUNT(*)
+               FROM lumos.reuseable_pack
+               WHERE blockname = %s""",
+            (testblock_name,),
+            build
+        )
 
     except Exception as e:
         return jsonify({"error": f"Failed at edit_testblock: {str(e)}"}), 500
@@ -116,66 +121,33 @@ def save_testblock():
         return jsonify({'error': 'At least one step is required.'}), 400
 
     try:
-        # Check if block already exists
-        count = execute_query(
-            """
-            SELECT COUNT(*) 
-            FROM lumos.reuseable_pack 
-            WHERE blockname = %s 
-            AND inactiveflag = %s
-            """,
-            (testblockname, 'N'),
-            fetch="one"
-        )
+        with transaction() as tx:
+
+            # Check if block already exists
+            count = tx.fetchval(
+                """
+                SELECT COUNT(*) 
+                FROM lumos.reuseable_pack 
+                WHERE blockname = %s 
+                AND inactiveflag = %s
+                """,
+                (testblockname, 'N')
+            )
 
-        if count[0] != 0:
-            return jsonify({
-                'error': f"Testblock {testblockname} already exists."
-            }), 400
-
-        # Insert steps
-        for step_number, item in enumerate(steplist, start=1):
-
-            step_type = item.get('StepType')
-            element = item.get('Element')
-            action = item.get('Action')
-            errorcode = item.get('ErrorCode')
-            regvalue = item.get('Value')
-            var_value = item.get('Variable')
-
-            query = """
-                INSERT INTO lumos.reuseable_pack
-                (
-                    lastupdby,
-                    blockname,
-                    step,
-                    element,
-                    action,
-                    errorcode,
-                    defaultvalue,
-                    variable,
-                    update_flag,
-                    lastupd
-                )
-                VALUES (
-                    %s, %s, %s, %s, %s, %s, %s, %s,
-                    'YES',
-                    DATE_TRUNC('second', CURRENT_TIMESTAMP)
-                )
-            """
-
-            values = (
-                username,
-                testblockname,
-                step_number,
-                element if step_type == 'Non Reuseable' else step_type,
-                action if step_type == 'Non Reuseable' else 'Reuseable',
-                errorcode,
-                regvalue,
-                var_value
+            if count != 0:
+                return jsonify({
+                    'error': f"Testblock {testblockname} already exists."
+                }), 400
+
+            # Insert all steps in one statement
+            stats = write_steps(
+                tx,
+                "lumos.reuseable_pack",
+                (username, testblockname),
+                steplist
             )
 
-            execute_query(query, values, commit=True)
+        invalidate("step_options")
 
         # Log activity
         log_activity(
@@ -185,7 +157,10 @@ def save_testblock():
             blockname=testblockname
         )
 
-        return jsonify({'message': f"Testblock {testblockname} created successfully."}), 201
+        return jsonify({
+            'message': f"Testblock {testblockname} created successfully.",
+            'rows_per_sec': stats['rows_per_sec']
+        }), 201
 
     except Exception as e:
         return jsonify({'error': f"Failed at save_testblock: {str(e)}"}), 500
@@ -211,85 +186,43 @@ def update_testblock():
         return jsonify({'error': 'User name is missing.'}), 400
 
     try:
-        # Check existence
-        count = execute_query(
-            """
-            SELECT COUNT(*)
-            FROM lumos.reuseable_pack
-            WHERE blockname = %s AND inactiveflag = %s
-            """,
-            (testblockname, 'N'),
-            fetch="one"
-        )
-
-        if count[0] == 0:
-            return jsonify({
-                'error': f"Testblock {testblockname} does not exist."
-            }), 400
-
-        # Start manual transaction
-        conn = connection_pool.getconn()
-
-        try:
-            cursor = conn.cursor()
-
-            # Delete old steps
-            cursor.execute("DELETE FROM lumos.reuseable_pack WHERE blockname = %s", (testblockname,))
-
-            # Insert new steps
-            for step_number, item in enumerate(steplist, start=1):
-
-                cursor.execute("""
-                    INSERT INTO lumos.reuseable_pack
-                    (
-                        lastupdby,
-                        blockname,
-                        step,
-                        element,
-                        action,
-                        errorcode,
-                        defaultvalue,
-                        variable,
-                        update_flag,
-                        lastupd
-                    )
-                    VALUES (
-                        %s, %s, %s, %s, %s, %s, %s, %s,
-                        'YES',
-                        DATE_TRUNC('second', CURRENT_TIMESTAMP)
-                    )
-                """, (
-                    username,
-                    testblockname,
-                    step_number,
-                    item.get('Element'),
-                    item.get('Action'),
-                    item.get('ErrorCode'),
-                    item.get('Value'),
-                    item.get('Variable')
-                ))
-
-            conn.commit()  # Commit once
-
-            log_activity(
-                username,
-                action='Update',
-                testcasename='',
-                blockname=testblockname
+        with transaction() as tx:
+
+            # Check existence
+            count = tx.fetchval(
+                """
+                SELECT COUNT(*)
+                FROM lumos.reuseable_pack
+                WHERE blockname = %s AND inactiveflag = %s
+                """,
+                (testblockname, 'N')
             )
 
-            return jsonify({
-                'message': f"Test Block {testblockname} updated successfully."
-            }), 200
+            if count == 0:
+                return jsonify({
+                    'error': f"Testblock {testblockname} does not exist."
+                }), 400
+
+            # Replace old steps with one multi-row insert
+            stats = write_steps(
+                tx,
+                "lumos.reuseable_pack",
+                (username, testblockname),
+                steplist,
+                replace=True
+            )
 
-        except Exception as error:
-            conn.rollback()  # Rollback everything
-            return jsonify({
-                'error': f"Update failed: {str(error)}"
-            }), 500
+        log_activity(
+            username,
+            action='Update',
+            testcasename='',
+            blockname=testblockname
+        )
 
-        finally:
-            connection_pool.putconn(conn)
+        return jsonify({
+            'message': f"Test Block {testblockname} updated successfully.",
+            'rows_per_sec': stats['rows_per_sec']
+        }), 200
 
     except Exception as e:
         return jsonify({'error': f"Failed at update_testblock: {str(e)}"}), 500
@@ -325,6 +258,8 @@ def delete_testblock():
             commit=True
         )
 
+        invalidate("step_options")
+
         # Log deletion
         log_activity(
             username,
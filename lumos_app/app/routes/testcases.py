@@ -1,7 +1,11 @@
 from flask import Blueprint, request, jsonify
 from ..services.activitylog import log_activity
-from ..db_utils import execute_query
-from ..extensions import connection_pool
+from ..services.stepwriter import write_steps
+from ..services.catalog import get_catalog, invalidate
+from ..services.packindex import invalidate_packs, notify_packs_changed
+from ..db_utils import execute_query, transaction
+from ..pagination import fetch_page
+from ..conditional import etag_json_response, conditional_json
 from datetime import datetime
 
 testcases_bp = Blueprint("testcases", __name__)
@@ -10,27 +14,36 @@ testcases_bp = Blueprint("testcases", __name__)
 @testcases_bp.route("/list", methods=["GET"])
 def testcases_list():
     try:
-        query = """
-            SELECT testcasename, act_date, lumos_user, action_type
-            FROM (
-                SELECT 
-                    t.testcasename,
-                    al.lumos_user,
-                    TO_CHAR(al.act_date, 'YYYY-MM-DD HH24:MI:SS GMT') AS act_date,
-                    al.action_type,
-                    ROW_NUMBER() OVER(
-                        PARTITION BY t.testcasename 
-                        ORDER BY al.act_date DESC
-                    ) AS rn
-                FROM lumos.testcase_list t
-                LEFT JOIN lumos.activity_log al
-                    ON t.testcasename = al.testcasename
-                WHERE t.inactiveflag = 'N'
+        # Latest action per testcase comes from the lumos.last_activity projection
+        from_clause = """
+            (
+                SELECT t.testcasename,
+                       la.lumos_user,
+                       TO_CHAR(la.act_date, 'YYYY-MM-DD HH24:MI:SS GMT') AS act_date,
+                       la.action_type
+                FROM (
+                    SELECT DISTINCT testcasename
+                    FROM lumos.testcase_list
+                    WHERE inactiveflag = 'N'
+                ) t
+                LEFT JOIN lumos.last_activity la
+                    ON la.entity_type = 'testcase'
+                   AND la.entity_name = t.testcasename
             ) t1
-            WHERE rn = 1
         """
 
-        rows = execute_query(query, fetch="all") or []
+        rows, next_cursor = fetch_page(
+            "testcasename, act_date, lumos_user, action_type",
+            from_clause,
+            keys=["t1.testcasename"],
+            args=request.args,
+            filters={
+                "testcasename": "t1.testcasename",
+                "lumos_user": "t1.lumos_user",
+                "action_type": "t1.action_type"
+            },
+            descending=False
+        )
 
         response = [
             {
@@ -42,7 +55,10 @@ def testcases_list():
             for r in rows
         ]
 
-        return jsonify(response), 200
+        return jsonify({"items": response, "next_cursor": next_cursor}), 200
+
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
 
     except Exception as e:
         return jsonify({"error": str(e)}), 500
@@ -62,7 +78,7 @@ def testcase_id():
   
   except Exception as e:
   
-    return jsonify({'error': f"Failed at testcase_id: {str(e))"}), 400
+    return jsonify({'error': f"Failed at testcase_id: {str(e)}"}), 400
 
 
 @testcases_bp.route("/edit", methods=["GET"])
@@ -77,28 +93,38 @@ def edit_testcase():
 
     try:
         query = '''SELECT CASE WHEN action = 'Reuseable' THEN (element) ELSE 'Non Reuseable' END AS step_type, 
-        CASE WHEN action 'Reuseable' THEN ('Plain action') ELSE element END AS element, 
+        CASE WHEN action = 'Reuseable' THEN ('Plain action') ELSE element END AS element, 
         CASE WHEN action = 'Reuseable' THEN ('Action') ELSE action END AS action, 
         errorcode, defaultvalue, variable, update_flag
         FROM lumos.regression_pack
         WHERE testcasename = %s ORDER BY step;'''
 
-        rows = execute_query(query, (testcase_name,), fetch="all")
-
-        formatted_rows = [
-            {
-                "StepType": row[0],
-                "Element": row[1],
-                "Action": row[2],
-                "ErrorCode": row[3],
-                "Value": row[4],
-                "Variable": row[5],
-                "UpdateFlag": row[6]
-            }
-            for row in rows
-        ]
-
-        return jsonify(formatted_rows), 200
+        def build(tx):
+            rows = tx.fetchall(query, (testcase_name,))
+
+            formatted_rows = [
+                {
+                    "StepType": row[0],
+                    "Element": row[1],
+                    "Action": row[2],
+                    "ErrorCode": row[3],
+                    "Value": row[4],
+                    "Variable": row[5],
+                    "UpdateFlag": row[6]
+                }
+                for row in rows
+            ]
+
+            return formatted_rows, 200
+
+        # 304 when the steps have not changed since the client's copy
+        return conditional_json(
+            """SELECT MAX(lastupd), COUNT(*)
+               FROM lumos.regression_pack
+               WHERE testcasename = %s""",
+            (testcase_name,),
+            build
+        )
 
     except Exception as e:
         return jsonify({"error": f"Failed at edit_testcase: {str(e)}"}), 500
@@ -134,73 +160,37 @@ def save_testcase():
         return jsonify({'error': 'At least one step is required.'}), 400
 
     try:
-        # Check if testcase already exists
-        count = execute_query(
-            """
-            SELECT COUNT(*) 
-            FROM lumos.regression_pack 
-            WHERE testcasename = %s 
-            AND inactiveflag = %s
-            """,
-            (testcasename, 'N'),
-            fetch="one"
-        )
+        with transaction() as tx:
+
+            # Check if testcase already exists
+            count = tx.fetchval(
+                """
+                SELECT COUNT(*) 
+                FROM lumos.regression_pack 
+                WHERE testcasename = %s 
+                AND inactiveflag = %s
+                """,
+                (testcasename, 'N')
+            )
 
-        if count[0] != 0:
-            return jsonify({
-                'error': f"Testblock {testcasename} already exists."
-            }), 400
-
-        # Insert steps
-        for step_number, item in enumerate(steplist, start=1):
-
-            step_type = item.get('StepType')
-            element = item.get('Element')
-            action = item.get('Action')
-            errorcode = item.get('ErrorCode')
-            regvalue = item.get('Value')
-            var_value = item.get('Variable')
-
-            query = """
-                INSERT INTO lumos.regression_pack
-                (
-                    testid
-                    lastupdby,
-                    testcasename,
-                    step,
-                    element,
-                    action,
-                    errorcode,
-                    defaultvalue,
-                    variable,
-                    update_flag,
-                    lastupd
-                )
-                VALUES (
-                    %s, %s, %s, %s, %s, %s, %s, %s,
-                    'YES',
-                    DATE_TRUNC('second', CURRENT_TIMESTAMP)
-                )
-            """
-
-            values = (
-                testid,
-                username,
-                testcasename,
-                step_number,
-                element if step_type == 'Non Reuseable' else step_type,
-                action if step_type == 'Non Reuseable' else 'Reuseable',
-                errorcode,
-                regvalue,
-                var_value
+            if count != 0:
+                return jsonify({
+                    'error': f"Testblock {testcasename} already exists."
+                }), 400
+
+            # Insert steps and the TESTCASE_LIST entry
+            stats = write_steps(
+                tx,
+                "lumos.regression_pack",
+                (username, testid, testcasename),
+                steplist
             )
 
-            execute_query(query, values, commit=True)
+            tx.execute('''INSERT INTO lumos.testcase_list
+            (testcasename, testID, priority_level, product_name, scenario_type, channel_type, journey_type)
+            VALUES (%s, %s, 'P2', '', '', '', '')''', (testcasename, testid))
 
-        # The insertion into TESTCASE_LIST table
-        execute_query('''INSERT INTO lumos. TESTCASE_LIST
-        (testcasename, testID, priority_level, product_name, scenario_type, channel_type, journey_type)
-        VALUES (%s, %s, 'P2', '', '', '', '')''', (testcasename, testid), commit=True )
+        invalidate("testcases", "execution_targets")
 
         # Log activity
         log_activity(
@@ -210,14 +200,17 @@ def save_testcase():
             blockname=''
         )
 
-        return jsonify({'message': f"Testcase {testcasename} created successfully."}), 201
+        return jsonify({
+            'message': f"Testcase {testcasename} created successfully.",
+            'rows_per_sec': stats['rows_per_sec']
+        }), 201
 
     except Exception as e:
         return jsonify({'error': f"Failed at save_testcase: {str(e)}"}), 500
 
 
-# API to update an existing Test Block by replacing its steps in the Reuseable_pack table
-@testblocks_bp.route('/update', methods=['PUT'])
+# API to update an existing Test Case by replacing its steps in the Regression_pack table
+@testcases_bp.route('/update', methods=['PUT'])
 def update_testcase():
 
     data = request.get_json(silent=True)
@@ -237,87 +230,43 @@ def update_testcase():
         return jsonify({'error': 'User name is missing.'}), 400
 
     try:
-        # Check existence
-        count = execute_query(
-            """
-            SELECT COUNT(*)
-            FROM lumos.reuseable_pack
-            WHERE testcasename = %s AND inactiveflag = %s
-            """,
-            (testcasename, 'N'),
-            fetch="one"
-        )
-
-        if count[0] == 0:
-            return jsonify({
-                'error': f"Testblock {testcasename} does not exist."
-            }), 400
-
-        # Start manual transaction
-        conn = connection_pool.getconn()
-
-        try:
-            cursor = conn.cursor()
-
-            # Delete old steps
-            cursor.execute("DELETE FROM lumos.regression_pack WHERE testcasename = %s", (testcasename,))
-
-            # Insert new steps
-            for step_number, item in enumerate(steplist, start=1):
-
-                cursor.execute("""
-                    INSERT INTO lumos.regression_pack
-                    (
-                        lastupdby,
-                        testid,
-                        testcasename,
-                        step,
-                        element,
-                        action,
-                        errorcode,
-                        defaultvalue,
-                        variable,
-                        update_flag,
-                        lastupd
-                    )
-                    VALUES (
-                        %s, %s, %s, %s, %s, %s, %s, %s, %s,
-                        'YES',
-                        DATE_TRUNC('second', CURRENT_TIMESTAMP)
-                    )
-                """, (
-                    username,
-                    testid,
-                    testcasename,
-                    step_number,
-                    item.get('Element'),
-                    item.get('Action'),
-                    item.get('ErrorCode'),
-                    item.get('Value'),
-                    item.get('Variable')
-                ))
-
-            conn.commit()  # Commit once
-
-            log_activity(
-                username,
-                action='Update',
-                testcasename=testcasename,
-                blockname=''
+        with transaction() as tx:
+
+            # Check existence
+            count = tx.fetchval(
+                """
+                SELECT COUNT(*)
+                FROM lumos.regression_pack
+                WHERE testcasename = %s AND inactiveflag = %s
+                """,
+                (testcasename, 'N')
             )
 
-            return jsonify({
-                'message': f"Test Block {testcasename} updated successfully."
-            }), 200
+            if count == 0:
+                return jsonify({
+                    'error': f"Testcase {testcasename} does not exist."
+                }), 400
+
+            # Replace old steps with one multi-row insert
+            stats = write_steps(
+                tx,
+                "lumos.regression_pack",
+                (username, testid, testcasename),
+                steplist,
+                replace=True
+            )
 
-        except Exception as error:
-            conn.rollback()  # Rollback everything
-            return jsonify({
-                'error': f"Update failed: {str(error)}"
-            }), 500
+        log_activity(
+            username,
+            action='Update',
+            testcasename=testcasename,
+            blockname=''
+        )
 
-        finally:
-            connection_pool.putconn(conn)
+        return jsonify({
+            'message': f"Testcase {testcasename} updated successfully.",
+            'rows_per_sec': stats['rows_per_sec']
+        }), 200
 
     except Exception as e:
         return jsonify({'error': f"Failed at update_testcase: {str(e)}"}), 500
@@ -327,40 +276,18 @@ def update_testcase():
 @testcases_bp.route('/populate_rows', methods=['GET'])
 def populate_rows():
   
-  conn connection_pool.getconn()
-  
   try:
     
-    cursor conn.cursor()
-    
-    cursor.execute('SELECT DISTINCT blockname FROM lumos.reuseable pack ORDER BY blockname')
-    reuseablelist = ["Non Reuseable"]+ [item[0] for item in cursor.fetchall()]
-    
-    cursor.execute('SELECT DISTINCT element FROM lumos.repository ORDER BY element')
-    elementlist = ["Plain action"]+ [item[0] for item in cursor.fetchall()]
+    # Served from the catalog cache; unchanged lists answer 304
+    payload, etag = get_catalog("step_options")
     
-    cursor.execute('SELECT functions FROM lumos.functions ORDER BY functions')
-    functionlist = ["Action"]+ [item[0] for item in cursor.fetchall()] cursor.execute('SELECT textid FROM lumos.generictexttable')
-  
-    cursor.execute('SELECT tectid FROM lumos.generictexttable')
-    textidlist= [item[0] for item in cursor.fetchall()]
-    
-    return jsonify({
-      "StepType": reuseablelist,
-      "Element": elementlist,
-      "Action": functionlist,
-      "ErrorCode": textidlist
-    }), 200
+    return etag_json_response(payload, etag)
   
   except Exception as e:
-    return jsonify({'error': f"Failed at populate_rows: (str(e))"}), 400
+    return jsonify({'error': f"Failed at populate_rows: {str(e)}"}), 400
 
-  finally:
-    cursor.close()
-    connection_pool.putconn(conn)
 
-
-# API to Soft-delete a Test Block by marking it inactive in Reuseable_pack tables
+# API to Soft-delete a Test Case by marking it inactive in Regression_pack, Testcase_list and Testpack_list tables
 @testcases_bp.route('/delete', methods=['PUT'])
 def delete_testcase():
 
@@ -368,27 +295,28 @@ def delete_testcase():
     testcase_name = data.get('testcase_name')
     username = data.get('userName')
 
-    conn = connection_pool.getconn()
-
     try:
-        cursor = conn.cursor()
-
         tables = [
             "lumos.regression_pack",
             "lumos.testcase_list",
             "lumos.testpack_list"
         ]
 
-        for table in tables:
-            cursor.execute(f"""
-                UPDATE {table}
-                SET inactiveflag = %s,
-                    lastupdby = %s,
-                    lastupd = DATE_TRUNC('second', CURRENT_TIMESTAMP)
-                WHERE testcasename = %s
-            """, ('Y', username, testcase_name))
+        with transaction() as tx:
+            for table in tables:
+                tx.execute(f"""
+                    UPDATE {table}
+                    SET inactiveflag = %s,
+                        lastupdby = %s,
+                        lastupd = DATE_TRUNC('second', CURRENT_TIMESTAMP)
+                    WHERE testcasename = %s
+                """, ('Y', username, testcase_name))
+
+            # The testcase also leaves every pack it was in
+            notify_packs_changed(tx)
 
-        conn.commit()
+        invalidate("testcases", "execution_targets")
+        invalidate_packs()
 
         log_activity(username, action='Delete',
                      testcasename=testcase_name, blockname='')
@@ -396,8 +324,4 @@ def delete_testcase():
         return jsonify({'message': 'Deleted successfully'}), 200
 
     except Exception as e:
-        conn.rollback()
         return jsonify({'error': str(e)}), 500
-
-    finally:
-        connection_pool.putconn(conn)
@@ -1,6 +1,9 @@
 from flask import Blueprint, request, jsonify
-from ..db_utils import execute_query
+from ..db_utils import execute_query, transaction
+from ..pagination import fetch_page
+from ..conditional import conditional_json
 from ..services.activitylog import log_activity
+from ..services.catalog import invalidate
 
 testelements_bp = Blueprint("testelements", __name__)
 
@@ -11,16 +14,20 @@ testelements_bp = Blueprint("testelements", __name__)
 @testelements_bp.route('/list', methods=['GET'])
 def get_testelement_list():
     try:
-        query = """
-            SELECT element, xpath, productname,
-                   TO_CHAR(lastupd, 'YYYY-MM-DD HH24:MI:SS GMT') AS lastupd,
-                   lastupdby
-            FROM lumos.repository
-            WHERE inactiveflag = 'N'
-            ORDER BY lastupd DESC
-        """
-
-        rows = execute_query(query, fetch="all") or []
+        rows, next_cursor = fetch_page(
+            """element, xpath, productname,
+               TO_CHAR(lastupd, 'YYYY-MM-DD HH24:MI:SS GMT') AS lastupd,
+               lastupdby""",
+            "lumos.repository",
+            keys=["COALESCE(lastupd, 'epoch'::timestamp)", "element"],
+            args=request.args,
+            where="inactiveflag = 'N'",
+            filters={
+                "element": "element",
+                "productname": "productname",
+                "lastupdby": "lastupdby"
+            }
+        )
 
         result = [
             {
@@ -33,7 +40,10 @@ def get_testelement_list():
             for r in rows
         ]
 
-        return jsonify(result), 200
+        return jsonify({"items": result, "next_cursor": next_cursor}), 200
+
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
 
     except Exception as e:
         return jsonify({"error": str(e)}), 500
@@ -59,22 +69,31 @@ def edit_testelement():
             WHERE element = %s AND inactiveflag = 'N'
         """
 
-        row = execute_query(query, (elementname,), fetch="one")
+        def build(tx):
+            row = tx.fetchone(query, (elementname,))
 
-        if not row:
-            return jsonify({'error': 'Element not found'}), 404
+            if not row:
+                return {'error': 'Element not found'}, 404
 
-        result = {
-            "element": row[0],
-            "xpath": row[1],
-            "pagetitle": row[2],
-            "popuptitle": row[3],
-            "dropdownvalues": row[4],
-            "defaultvalue": row[5],
-            "productname": row[6]
-        }
+            result = {
+                "element": row[0],
+                "xpath": row[1],
+                "pagetitle": row[2],
+                "popuptitle": row[3],
+                "dropdownvalues": row[4],
+                "defaultvalue": row[5],
+                "productname": row[6]
+            }
 
-        return jsonify(result), 200
+            return result, 200
+
+        return conditional_json(
+            """SELECT MAX(lastupd), COUNT(*)
+               FROM lumos.repository
+               WHERE element = %s AND inactiveflag = 'N'""",
+            (elementname,),
+            build
+        )
 
     except Exception as e:
         return jsonify({"error": str(e)}), 500
@@ -101,42 +120,44 @@ def save_testelement():
         return jsonify({'error': 'Missing required fields'}), 400
 
     try:
-        # Check duplicate element
-        element_count = execute_query(
-            """SELECT COUNT(*) FROM lumos.repository
-               WHERE element = %s AND inactiveflag = 'N'""",
-            (elementname,),
-            fetch="one"
-        )
-
-        if element_count[0] != 0:
-            return jsonify({'error': 'Element already exists'}), 400
-
-        # Check duplicate xpath
-        xpath_count = execute_query(
-            """SELECT COUNT(*) FROM lumos.repository
-               WHERE xpath = %s AND inactiveflag = 'N'""",
-            (xpath,),
-            fetch="one"
-        )
-
-        if xpath_count[0] != 0:
-            return jsonify({'error': 'XPath already exists'}), 400
-
-        # Insert new element
-        execute_query("""
-            INSERT INTO lumos.repository
-            (lastupdby, element, xpath, pagetitle,
-             popuptitle, dropdownvalues, defaultvalue,
-             productname, inactiveflag, lastupd)
-            VALUES (%s, %s, %s, %s, %s, %s, %s, %s,
-                    'N', DATE_TRUNC('second', CURRENT_TIMESTAMP))
-        """, (
-            username, elementname, xpath,
-            pagetitle, popuptitle,
-            dropdownvalues, defaultvalue,
-            productname
-        ), commit=True)
+        with transaction() as tx:
+
+            # Check duplicate element
+            element_count = tx.fetchval(
+                """SELECT COUNT(*) FROM lumos.repository
+                   WHERE element = %s AND inactiveflag = 'N'""",
+                (elementname,)
+            )
+
+            if element_count != 0:
+                return jsonify({'error': 'Element already exists'}), 400
+
+            # Check duplicate xpath
+            xpath_count = tx.fetchval(
+                """SELECT COUNT(*) FROM lumos.repository
+                   WHERE xpath = %s AND inactiveflag = 'N'""",
+                (xpath,)
+            )
+
+            if xpath_count != 0:
+                return jsonify({'error': 'XPath already exists'}), 400
+
+            # Insert new element
+            tx.execute("""
+                INSERT INTO lumos.repository
+                (lastupdby, element, xpath, pagetitle,
+                 popuptitle, dropdownvalues, defaultvalue,
+                 productname, inactiveflag, lastupd)
+                VALUES (%s, %s, %s, %s, %s, %s, %s, %s,
+                        'N', DATE_TRUNC('second', CURRENT_TIMESTAMP))
+            """, (
+                username, elementname, xpath,
+                pagetitle, popuptitle,
+                dropdownvalues, defaultvalue,
+                productname
+            ))
+
+        invalidate("step_options")
 
         log_activity(username, action='Create',
                      testcasename=f'Element: {elementname}',
@@ -228,6 +249,8 @@ def delete_testelement():
         if affected_rows == 0:
             return jsonify({'error': 'Element not found'}), 404
 
+        invalidate("step_options")
+
         log_activity(username, action='Delete',
                      testcasename=f'Element: {elementname}',
                      blockname='')
@@ -1,8 +1,16 @@
 from flask import Blueprint, request, jsonify
 from datetime import datetime
-from ..db_utils import execute_query
+from ..db_utils import execute_query, transaction
+from ..pagination import fetch_page
+from ..conditional import etag_json_response
+from ..services.catalog import get_catalog
 from ..services.activitylog import log_activity
-from ..services.processsubmit import processsubmittedrecords
+from ..services.processsubmit import new_execution_rowid, notify_submitted
+from ..services.resultingest import ingest_results, parse_batch
+from ..services.runtimestats import estimate_completion
+from ..services.scheduler import register_schedule
+from ..services.sharding import parse_parallel_exec, requested_shards
+from ..services.testlist import expand_test_list
 from ..services.stop_containers import stop_containers_by_execution_id
 
 testexecutions_bp = Blueprint("executions", __name__)
@@ -14,23 +22,28 @@ testexecutions_bp = Blueprint("executions", __name__)
 @testexecutions_bp.route('/api/executionslist', methods=['GET'])
 def get_executionslist():
     try:
-        query = """
-            SELECT lumos_user,
-                   rowid,
-                   exec_id,
-                   releaseid,
-                   TO_CHAR(exec_date, 'YYYY-MM-DD HH24:MI:SS GMT') AS exec_date,
-                   TO_CHAR(scheduled_dt, 'YYYY-MM-DD HH24:MI:SS GMT') AS scheduled_dt,
-                   env_name,
-                   exec_status,
-                   exec_test_list
-            FROM lumos.executions
-            WHERE exec_status != ''
-              AND exec_date >= NOW() - INTERVAL '6 months'
-            ORDER BY exec_date DESC
-        """
-
-        rows = execute_query(query, fetch="all") or []
+        rows, next_cursor = fetch_page(
+            """lumos_user,
+               rowid,
+               exec_id,
+               releaseid,
+               TO_CHAR(exec_date, 'YYYY-MM-DD HH24:MI:SS GMT') AS exec_date,
+               TO_CHAR(scheduled_dt, 'YYYY-MM-DD HH24:MI:SS GMT') AS scheduled_dt,
+               env_name,
+               exec_status,
+               exec_test_list""",
+            "lumos.executions",
+            keys=["executions.exec_date", "rowid"],
+            args=request.args,
+            where="exec_status != '' AND exec_date >= NOW() - INTERVAL '6 months'",
+            filters={
+                "lumos_user": "lumos_user",
+                "exec_id": "exec_id",
+                "releaseid": "releaseid",
+                "env_name": "env_name",
+                "exec_status": "exec_status"
+            }
+        )
 
         result = [
             {
@@ -47,7 +60,10 @@ def get_executionslist():
             for r in rows
         ]
 
-        return jsonify(result), 200
+        return jsonify({"items": result, "next_cursor": next_cursor}), 200
+
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
 
     except Exception as e:
         return jsonify({"error": str(e)}), 500
@@ -59,26 +75,65 @@ def get_executionslist():
 @testexecutions_bp.route('/api/new_execution', methods=['GET'])
 def new_execution():
     try:
-        query = """
-            SELECT testcasename AS name, 'Testcase' AS type
-            FROM lumos.testcase_list
-            WHERE inactiveflag = 'N'
+        payload, etag = get_catalog("execution_targets")
 
-            UNION
+        return etag_json_response(payload, etag)
 
-            SELECT testpack_name AS name, 'Testpack' AS type
-            FROM lumos.testpack_list
-            WHERE inactiveflag = 'N'
-        """
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
 
-        rows = execute_query(query, fetch="all") or []
 
-        result = [
-            {"name": r[0], "type": r[1]}
-            for r in rows
-        ]
+# ---------------------------------------------------
+# Estimated Run Time of an Execution / Test List
+# ---------------------------------------------------
+@testexecutions_bp.route('/api/estimate', methods=['GET'])
+def estimate_execution():
+    """
+    ?rowid=<execution>  or  ?testlist=A.tc,Pack.tp&containers=N
+    Expected (EWMA) and p90 run time from exec_details history.
+    """
+
+    rowid = request.args.get('rowid')
+    testlist = request.args.get('testlist')
+
+    if not rowid and not testlist:
+        return jsonify({'error': 'rowid or testlist is required'}), 400
+
+    try:
+        start = datetime.utcnow()
+
+        if rowid:
+            row = execute_query(
+                """SELECT COALESCE(resolved_test_list, exec_test_list),
+                          parallel_exec, scheduled_dt
+                   FROM lumos.executions
+                   WHERE rowid = %s""",
+                (rowid,),
+                fetch="one"
+            )
 
-        return jsonify(result), 200
+            if not row:
+                return jsonify({'error': 'Execution not found'}), 404
+
+            testlist, parallel_exec, scheduled_dt = row
+            containers = requested_shards(parallel_exec)
+
+            if scheduled_dt and scheduled_dt > start:
+                start = scheduled_dt
+        else:
+            containers = int(request.args.get('containers', 1))
+
+        tests = expand_test_list(testlist)
+
+        estimate = estimate_completion(tests, max(containers, 1), start)
+
+        for key in ("expected_completion", "p90_completion"):
+            estimate[key] = estimate[key].strftime('%Y-%m-%d %H:%M:%S GMT')
+
+        return jsonify(estimate), 200
+
+    except ValueError:
+        return jsonify({'error': 'containers must be an integer'}), 400
 
     except Exception as e:
         return jsonify({"error": str(e)}), 500
@@ -108,54 +163,65 @@ def save_execution():
     if not testlist:
         return jsonify({'error': 'Select at least one Testcase/Testpack'}), 400
 
-    rowid = datetime.now().strftime('%Y%m%d%H%M%S')
+    try:
+        parallel_exec = parse_parallel_exec(data.get('parallelExec'))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
     total_testlist = ",".join(testlist)
 
     try:
-        count = execute_query(
-            "SELECT COUNT(*) FROM lumos.executions WHERE exec_id = %s",
-            (executionname,),
-            fetch="one"
-        )
+        with transaction() as tx:
 
-        if count[0] != 0:
-            return jsonify({'error': 'Execution name already exists'}), 400
+            count = tx.fetchval(
+                "SELECT COUNT(*) FROM lumos.executions WHERE exec_id = %s",
+                (executionname,)
+            )
 
-        execute_query("""
-            INSERT INTO lumos.executions
-            (
+            if count != 0:
+                return jsonify({'error': 'Execution name already exists'}), 400
+
+            rowid = new_execution_rowid(tx, datetime.now())
+
+            tx.execute("""
+                INSERT INTO lumos.executions
+                (
+                    releaseid,
+                    lumos_user,
+                    exec_status,
+                    exec_id,
+                    rowid,
+                    env_name,
+                    browser,
+                    parallel_exec,
+                    screen_capture,
+                    scheduled_dt,
+                    frequency,
+                    exec_test_list,
+                    exec_date
+                )
+                VALUES
+                (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s,
+                 DATE_TRUNC('second', CURRENT_TIMESTAMP))
+            """, (
                 releaseid,
-                lumos_user,
-                exec_status,
-                exec_id,
+                username,
+                "Submitted",
+                executionname,
                 rowid,
                 env_name,
                 browser,
-                screen_capture,
+                parallel_exec,
+                screencapture,
                 scheduled_dt,
                 frequency,
-                exec_test_list,
-                exec_date
-            )
-            VALUES
-            (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s,
-             DATE_TRUNC('second', CURRENT_TIMESTAMP))
-        """, (
-            releaseid,
-            username,
-            "Submitted",
-            executionname,
-            rowid,
-            env_name,
-            browser,
-            screencapture,
-            scheduled_dt,
-            frequency,
-            total_testlist
-        ), commit=True)
-
-        # Optional
-        # processsubmittedrecords()
+                total_testlist
+            ))
+
+            # Daily / Weekly / ... runs are re-armed by the scheduler
+            register_schedule(tx, rowid, frequency, scheduled_dt)
+
+            notify_submitted(tx, rowid)
 
         log_activity(username,
                      action='Execution Submitted',
@@ -171,6 +237,32 @@ def save_execution():
         return jsonify({"error": str(e)}), 500
 
 
+# ---------------------------------------------------
+# Result Ingestion (batches posted by running containers)
+# ---------------------------------------------------
+@testexecutions_bp.route('/api/results', methods=['POST'])
+def post_results():
+
+    try:
+        execid, batch_id, rows = parse_batch(request.get_json(silent=True))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    try:
+        counters = ingest_results(execid, batch_id, rows)
+
+        if counters is None:
+            return jsonify({'message': 'Batch already ingested', 'batch_id': batch_id}), 200
+
+        return jsonify({'batch_id': batch_id, 'rows': len(rows), **counters}), 201
+
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 404
+
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
 # ---------------------------------------------------
 # 4️⃣ Stop Execution
 # ---------------------------------------------------
@@ -200,15 +292,18 @@ def delete_pod():
         if status == "Completed":
             return jsonify({'message': 'Execution already completed'}), 200
 
-        # Optional
-        # stop_containers_by_execution_id(executionid, username)
+        outcome = stop_containers_by_execution_id(executionid, username)
 
         log_activity(username,
                      action='Execution Stopped',
                      testcasename=f'Execution: {executionid}',
                      blockname='')
 
-        return jsonify({'message': 'Execution stopped successfully'}), 200
+        return jsonify({
+            'message': 'Execution stopped successfully',
+            'stopped': outcome['stopped'],
+            'failed': outcome['failed']
+        }), 200
 
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -229,56 +324,62 @@ def retrigger_pod():
     if not executionid or not executionname or not username:
         return jsonify({'error': 'Missing required fields'}), 400
 
-    new_rowid = datetime.now().strftime('%Y%m%d%H%M%S')
-
     try:
-        row = execute_query(
-            """SELECT releaseid, env_name, browser,
-                      screen_capture, scheduled_dt,
-                      frequency, exec_test_list
-               FROM lumos.executions
-               WHERE rowid = %s""",
-            (executionid,),
-            fetch="one"
-        )
-
-        if not row:
-            return jsonify({'error': 'Execution not found'}), 404
-
-        releaseid, env_name, browser, screencapture, scheduled_dt, frequency, total_testlist = row
+        with transaction() as tx:
+
+            row = tx.fetchone(
+                """SELECT releaseid, env_name, browser, parallel_exec,
+                          screen_capture, scheduled_dt,
+                          frequency, exec_test_list
+                   FROM lumos.executions
+                   WHERE rowid = %s""",
+                (executionid,)
+            )
 
-        execute_query("""
-            INSERT INTO lumos.executions
-            (
+            if not row:
+                return jsonify({'error': 'Execution not found'}), 404
+
+            (releaseid, env_name, browser, parallel_exec,
+             screencapture, scheduled_dt, frequency, total_testlist) = row
+
+            new_rowid = new_execution_rowid(tx, datetime.now())
+
+            tx.execute("""
+                INSERT INTO lumos.executions
+                (
+                    releaseid,
+                    lumos_user,
+                    exec_status,
+                    exec_id,
+                    rowid,
+                    env_name,
+                    browser,
+                    parallel_exec,
+                    screen_capture,
+                    scheduled_dt,
+                    frequency,
+                    exec_test_list,
+                    exec_date
+                )
+                VALUES
+                (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s,
+                 DATE_TRUNC('second', CURRENT_TIMESTAMP))
+            """, (
                 releaseid,
-                lumos_user,
-                exec_status,
-                exec_id,
-                rowid,
+                username,
+                "Submitted",
+                executionname,
+                new_rowid,
                 env_name,
                 browser,
-                screen_capture,
+                parallel_exec,
+                screencapture,
                 scheduled_dt,
                 frequency,
-                exec_test_list,
-                exec_date
-            )
-            VALUES
-            (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s,
-             DATE_TRUNC('second', CURRENT_TIMESTAMP))
-        """, (
-            releaseid,
-            username,
-            "Submitted",
-            executionname,
-            new_rowid,
-            env_name,
-            browser,
-            screencapture,
-            scheduled_dt,
-            frequency,
-            total_testlist
-        ), commit=True)
+                total_testlist
+            ))
+
+            notify_submitted(tx, new_rowid)
 
         log_activity(username,
                      action='Execution Retriggered',
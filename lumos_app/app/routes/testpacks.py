@@ -1,6 +1,10 @@
 from flask import Blueprint, request, jsonify
-from ..db_utils import execute_query
+from ..db_utils import execute_query, transaction
+from ..pagination import fetch_page
+from ..conditional import etag_json_response, conditional_json
 from ..services.activitylog import log_activity
+from ..services.catalog import get_catalog, invalidate
+from ..services.packindex import invalidate_packs, notify_packs_changed
 
 testpacks_bp = Blueprint("testpacks", __name__)
 
@@ -11,16 +15,20 @@ testpacks_bp = Blueprint("testpacks", __name__)
 @testpacks_bp.route('/list', methods=['GET'])
 def get_testpacklist():
     try:
-        query = """
-            SELECT DISTINCT testpack_name,
-                   TO_CHAR(lastupd, 'YYYY-MM-DD HH24:MI:SS GMT') AS lastupd,
-                   lastupdby
-            FROM lumos.testpack_list
-            WHERE inactiveflag = 'N'
-            ORDER BY testpack_name
-        """
-
-        rows = execute_query(query, fetch="all") or []
+        rows, next_cursor = fetch_page(
+            """DISTINCT testpack_name,
+               TO_CHAR(lastupd, 'YYYY-MM-DD HH24:MI:SS GMT') AS lastupd,
+               lastupdby""",
+            "lumos.testpack_list",
+            keys=["testpack_name", "COALESCE(lastupd, 'epoch'::timestamp)", "COALESCE(lastupdby, '')"],
+            args=request.args,
+            where="inactiveflag = 'N'",
+            filters={
+                "testpack_name": "testpack_name",
+                "lastupdby": "lastupdby"
+            },
+            descending=False
+        )
 
         result = [
             {
@@ -31,7 +39,10 @@ def get_testpacklist():
             for r in rows
         ]
 
-        return jsonify(result), 200
+        return jsonify({"items": result, "next_cursor": next_cursor}), 200
+
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
 
     except Exception as e:
         return jsonify({"error": str(e)}), 500
@@ -43,18 +54,9 @@ def get_testpacklist():
 @testpacks_bp.route('/populate_testcases', methods=['GET'])
 def populate_testcases():
     try:
-        query = """
-            SELECT DISTINCT testcasename
-            FROM lumos.testcase_list
-            WHERE inactiveflag = 'N'
-            ORDER BY testcasename
-        """
-
-        rows = execute_query(query, fetch="all") or []
+        payload, etag = get_catalog("testcases")
 
-        return jsonify({
-            "TestcasesList": [r[0] for r in rows]
-        }), 200
+        return etag_json_response(payload, etag)
 
     except Exception as e:
         return jsonify({"error": str(e)}), 500
@@ -72,44 +74,74 @@ def edit_testpack():
         return jsonify({'error': 'Test Pack Name is required'}), 400
 
     try:
-        # Testcases inside pack
-        query1 = """
-            SELECT DISTINCT testcasename
-            FROM lumos.testpack_list
-            WHERE testpack_name = %s
-              AND inactiveflag = 'N'
-              AND testcasename IS NOT NULL
-            ORDER BY testcasename
-        """
-
-        pack_cases = execute_query(query1, (testpack_name,), fetch="all") or []
-
-        # Active testcases NOT in pack
-        query2 = """
-            SELECT DISTINCT t.testcasename
-            FROM lumos.testcase_list t
-            WHERE t.inactiveflag = 'N'
-              AND NOT EXISTS (
-                  SELECT 1
-                  FROM lumos.testpack_list tp
-                  WHERE tp.testpack_name = %s
-                    AND tp.testcasename = t.testcasename
-                    AND tp.inactiveflag = 'N'
-              )
-            ORDER BY t.testcasename
-        """
-
-        other_cases = execute_query(query2, (testpack_name,), fetch="all") or []
-
-        return jsonify({
-            "testpack_testcases": [r[0] for r in pack_cases],
-            "testcases": [r[0] for r in other_cases]
-        }), 200
+        def build(tx):
+
+            # Testcases inside pack
+            query1 = """
+                SELECT DISTINCT testcasename
+                FROM lumos.testpack_list
+                WHERE testpack_name = %s
+                  AND inactiveflag = 'N'
+                  AND testcasename IS NOT NULL
+                ORDER BY testcasename
+            """
+
+            pack_cases = tx.fetchall(query1, (testpack_name,))
+
+            # Active testcases NOT in pack
+            query2 = """
+                SELECT DISTINCT t.testcasename
+                FROM lumos.testcase_list t
+                WHERE t.inactiveflag = 'N'
+                  AND NOT EXISTS (
+                      SELECT 1
+                      FROM lumos.testpack_list tp
+                      WHERE tp.testpack_name = %s
+                        AND tp.testcasename = t.testcasename
+                        AND tp.inactiveflag = 'N'
+                  )
+                ORDER BY t.testcasename
+            """
+
+            other_cases = tx.fetchall(query2, (testpack_name,))
+
+            return {
+                "testpack_testcases": [r[0] for r in pack_cases],
+                "testcases": [r[0] for r in other_cases]
+            }, 200
+
+        # The payload also lists testcases outside the pack, so
+        # testcase_list changes must invalidate it as well
+        return conditional_json(
+            """SELECT GREATEST(
+                          (SELECT MAX(lastupd) FROM lumos.testpack_list WHERE testpack_name = %s),
+                          (SELECT MAX(lastupd) FROM lumos.testcase_list)
+                      ),
+                      (SELECT COUNT(*) FROM lumos.testpack_list
+                       WHERE testpack_name = %s AND inactiveflag = 'N'),
+                      (SELECT COUNT(*) FROM lumos.testcase_list
+                       WHERE inactiveflag = 'N')""",
+            (testpack_name, testpack_name),
+            build
+        )
 
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
 
+# ---------------------------------------------------
+# Helper: Insert Pack Membership Rows
+# ---------------------------------------------------
+def insert_pack_testcases(tx, testpackname, testcaselist, username):
+    tx.execute_values("""
+        INSERT INTO lumos.testpack_list
+        (created_by, lastupdby, testpack_name,
+         testcasename, inactiveflag, lastupd)
+        VALUES %s
+    """, [(username, username, testpackname, tc) for tc in testcaselist],
+       template="(%s, %s, %s, %s, 'N', DATE_TRUNC('second', CURRENT_TIMESTAMP))")
+
+
 # ---------------------------------------------------
 # 4️⃣ Save Test Pack
 # ---------------------------------------------------
@@ -129,25 +161,22 @@ def save_testpack():
         return jsonify({'error': 'Empty test pack'}), 400
 
     try:
-        count = execute_query(
-            """SELECT COUNT(*) FROM lumos.testpack_list
-               WHERE testpack_name = %s AND inactiveflag = 'N'""",
-            (testpackname,),
-            fetch="one"
-        )
+        with transaction() as tx:
+
+            count = tx.fetchval(
+                """SELECT COUNT(*) FROM lumos.testpack_list
+                   WHERE testpack_name = %s AND inactiveflag = 'N'""",
+                (testpackname,)
+            )
+
+            if count != 0:
+                return jsonify({'error': 'Test Pack already exists'}), 400
 
-        if count[0] != 0:
-            return jsonify({'error': 'Test Pack already exists'}), 400
+            insert_pack_testcases(tx, testpackname, testcaselist, username)
+            notify_packs_changed(tx)
 
-        for tc in testcaselist:
-            execute_query("""
-                INSERT INTO lumos.testpack_list
-                (created_by, lastupdby, testpack_name,
-                 testcasename, inactiveflag, lastupd)
-                VALUES (%s, %s, %s, %s,
-                        'N', DATE_TRUNC('second', CURRENT_TIMESTAMP))
-            """, (username, username, testpackname, tc),
-               commit=True)
+        invalidate("execution_targets")
+        invalidate_packs()
 
         log_activity(username,
                      action='Create',
@@ -176,21 +205,18 @@ def update_testpack():
         return jsonify({'error': 'Missing required fields'}), 400
 
     try:
-        execute_query(
-            "DELETE FROM lumos.testpack_list WHERE testpack_name = %s",
-            (testpackname,),
-            commit=True
-        )
+        with transaction() as tx:
+
+            tx.execute(
+                "DELETE FROM lumos.testpack_list WHERE testpack_name = %s",
+                (testpackname,)
+            )
+
+            insert_pack_testcases(tx, testpackname, new_testcases, username)
+            notify_packs_changed(tx)
 
-        for tc in new_testcases:
-            execute_query("""
-                INSERT INTO lumos.testpack_list
-                (created_by, lastupdby, testpack_name,
-                 testcasename, inactiveflag, lastupd)
-                VALUES (%s, %s, %s, %s,
-                        'N', DATE_TRUNC('second', CURRENT_TIMESTAMP))
-            """, (username, username, testpackname, tc),
-               commit=True)
+        invalidate("execution_targets")
+        invalidate_packs()
 
         log_activity(username,
                      action='Update',
@@ -218,18 +244,22 @@ def delete_testpack():
         return jsonify({'error': 'Missing required fields'}), 400
 
     try:
-        affected = execute_query("""
-            UPDATE lumos.testpack_list
-            SET inactiveflag='Y',
-                lastupdby=%s,
-                lastupd=DATE_TRUNC('second', CURRENT_TIMESTAMP)
-            WHERE testpack_name=%s
-        """, (username, testpackname),
-           commit=True,
-           return_rowcount=True)
-
-        if affected == 0:
-            return jsonify({'error': 'Test Pack not found'}), 404
+        with transaction() as tx:
+            affected = tx.execute("""
+                UPDATE lumos.testpack_list
+                SET inactiveflag='Y',
+                    lastupdby=%s,
+                    lastupd=DATE_TRUNC('second', CURRENT_TIMESTAMP)
+                WHERE testpack_name=%s
+            """, (username, testpackname))
+
+            if affected == 0:
+                return jsonify({'error': 'Test Pack not found'}), 404
+
+            notify_packs_changed(tx)
+
+        invalidate("execution_targets")
+        invalidate_packs()
 
         log_activity(username,
                      action='Delete',
@@ -1,11 +1,22 @@
-from flask import Blueprint, request, jsonify, send_file
-from ..db_utils import execute_query
+from flask import Blueprint, Response, request, jsonify, send_file, stream_with_context
+from ..db_utils import execute_query, stream_response
 from ..services.config_tab import get_page_info 
+from ..services.ledger import containers_for
 from ..services.file_utils import list_files    
+from ..services.progress import ALL_EXECUTIONS, subscribe, unsubscribe
 import os
 import io
+import json
+import queue
 import zipfile
 
+# Comment sent to idle progress streams so proxies keep them open
+SSE_HEARTBEAT_SECONDS = int(os.getenv("SSE_HEARTBEAT_SECONDS", "15"))
+SSE_RETRY_MS = 5000
+
+# Retry-After sent when this worker already serves its maximum of streams
+SSE_BUSY_RETRY_SECONDS = 30
+
 testreports_bp = Blueprint("reports", __name__)
 
 
@@ -17,6 +28,20 @@ def get_reportslist():
 
     rowid = request.args.get('rowid', '*')
 
+    columns = [
+        "lumos_user",
+        "rowid",
+        "exec_id",
+        "releaseid",
+        "env_name",
+        "exec_status",
+        "exec_date",
+        "exec_time",
+        "pass_count",
+        "fail_count",
+        "total_count"
+    ]
+
     try:
         if rowid == '*':
             query = """
@@ -36,49 +61,133 @@ def get_reportslist():
                   AND exec_date >= NOW() - INTERVAL '6 months'
                 ORDER BY exec_date DESC
             """
-            rows = execute_query(query, fetch="all") or []
+            return stream_response(query, columns=columns)
+
+        query = """
+            SELECT lumos_user,
+                   rowid,
+                   exec_id,
+                   releaseid,
+                   env_name,
+                   exec_status,
+                   TO_CHAR(exec_date, 'YYYY-MM-DD HH24:MI:SS GMT') AS exec_date,
+                   exec_time,
+                   pass_count,
+                   fail_count,
+                   total_count
+            FROM lumos.executions
+            WHERE exec_status IN ('In-Progress', 'Completed')
+              AND rowid = %s
+        """
+        rows = execute_query(query, (rowid,), fetch="all") or []
+
+        result = [dict(zip(columns, r)) for r in rows]
 
-        else:
-            query = """
-                SELECT lumos_user,
-                       rowid,
-                       exec_id,
-                       releaseid,
-                       env_name,
-                       exec_status,
-                       TO_CHAR(exec_date, 'YYYY-MM-DD HH24:MI:SS GMT') AS exec_date,
-                       exec_time,
-                       pass_count,
-                       fail_count,
-                       total_count
+        return jsonify(result), 200
+
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
+# ---------------------------------------------------
+# Containers of an Execution (placement ledger)
+# ---------------------------------------------------
+@testreports_bp.route('/api/containers', methods=['GET'])
+def get_containers():
+
+    rowid = request.args.get('rowid')
+
+    if not rowid:
+        return jsonify({'error': 'Missing required parameters'}), 400
+
+    try:
+        entries = containers_for(rowid)
+
+        for entry in entries:
+            for key in ("started_at", "finished_at"):
+                if entry[key]:
+                    entry[key] = entry[key].strftime('%Y-%m-%d %H:%M:%S GMT')
+
+        return jsonify(entries), 200
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+# ---------------------------------------------------
+# Live Progress (Server-Sent Events)
+# ---------------------------------------------------
+def _sse(event, name="progress"):
+    return f"event: {name}\ndata: {json.dumps(event, default=str)}\n\n"
+
+
+@testreports_bp.route('/api/progress', methods=['GET'])
+def stream_progress():
+    """
+    text/event-stream of status changes, pass/fail counters and new
+    exec_details rows for one execution (?rowid=) or all of them.
+    Events come from this worker's single LISTEN connection, so
+    watchers cost no queries after the initial snapshot. Each stream
+    holds a request thread; past PROGRESS_MAX_SUBSCRIBERS per worker
+    the answer is 503 and clients fall back to polling.
+    """
+
+    rowid = request.args.get('rowid', ALL_EXECUTIONS)
+
+    # Subscribe before the snapshot so nothing falls in between
+    events = subscribe(rowid)
+
+    if events is None:
+        response = jsonify({'error': 'Too many live progress streams, poll reportslist instead'})
+        response.headers["Retry-After"] = str(SSE_BUSY_RETRY_SECONDS)
+        return response, 503
+
+    try:
+        snapshot = None
+
+        if rowid != ALL_EXECUTIONS:
+            row = execute_query("""
+                SELECT exec_status, pass_count, fail_count, total_count
                 FROM lumos.executions
-                WHERE exec_status IN ('In-Progress', 'Completed')
-                  AND rowid = %s
-            """
-            rows = execute_query(query, (rowid,), fetch="all") or []
+                WHERE rowid = %s
+            """, (rowid,), fetch="one")
 
-        result = [
-            {
-                "lumos_user": r[0],
-                "rowid": r[1],
-                "exec_id": r[2],
-                "releaseid": r[3],
-                "env_name": r[4],
-                "exec_status": r[5],
-                "exec_date": r[6],
-                "exec_time": r[7],
-                "pass_count": r[8],
-                "fail_count": r[9],
-                "total_count": r[10]
-            }
-            for r in rows
-        ]
+            if not row:
+                unsubscribe(rowid, events)
+                return jsonify({'error': 'Execution not found'}), 404
 
-        return jsonify(result), 200
+            snapshot = dict(zip(("exec_status", "pass_count", "fail_count", "total_count"), row))
+            snapshot["execid"] = rowid
 
     except Exception as e:
+        unsubscribe(rowid, events)
         return jsonify({"error": str(e)}), 500
 
+    def generate():
+        try:
+            yield f"retry: {SSE_RETRY_MS}\n\n"
+
+            if snapshot:
+                yield _sse(snapshot, "snapshot")
+
+            while True:
+                try:
+                    event = events.get(timeout=SSE_HEARTBEAT_SECONDS)
+                except queue.Empty:
+                    yield ": keepalive\n\n"
+                    continue
+
+                yield _sse(event, "resync" if event.get("resync") else "progress")
+
+        finally:
+            unsubscribe(rowid, events)
+
+    return Response(
+        stream_with_context(generate()),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 
 # ---------------------------------------------------
 # Execution Details / Logs / Reports
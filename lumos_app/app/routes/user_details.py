@@ -1,6 +1,7 @@
 from flask import Blueprint, request, jsonify, session, redirect, url_for, render_template
 from functools import wraps
-from ..db_utils import execute_query
+from ..db_utils import execute_query, transaction, stream_response
+from ..pagination import fetch_page
 from ..services.activitylog import log_activity
 from ..services.login import authenticate_user
 
@@ -165,32 +166,33 @@ def createuser():
         return jsonify({'error': 'Missing required fields'}), 400
 
     try:
-        count = execute_query(
-            """SELECT COUNT(*)
-               FROM lumos.userlist
-               WHERE username=%s
-               AND inactiveflag='N'""",
-            (username,),
-            fetch="one"
-        )
-
-        if count[0] != 0:
-            return jsonify({'error': 'User already exists'}), 400
-
-        execute_query("""
-            INSERT INTO lumos.userlist
-            (lastupdby, username, password, type,
-             mailid, inactiveflag, lastupd)
-            VALUES (%s, %s, %s, %s,
-                    %s, 'N',
-                    DATE_TRUNC('second', CURRENT_TIMESTAMP))
-        """, (
-            created_by,
-            username,
-            password,
-            user_type,
-            mailid
-        ), commit=True)
+        with transaction() as tx:
+
+            count = tx.fetchval(
+                """SELECT COUNT(*)
+                   FROM lumos.userlist
+                   WHERE username=%s
+                   AND inactiveflag='N'""",
+                (username,)
+            )
+
+            if count != 0:
+                return jsonify({'error': 'User already exists'}), 400
+
+            tx.execute("""
+                INSERT INTO lumos.userlist
+                (lastupdby, username, password, type,
+                 mailid, inactiveflag, lastupd)
+                VALUES (%s, %s, %s, %s,
+                        %s, 'N',
+                        DATE_TRUNC('second', CURRENT_TIMESTAMP))
+            """, (
+                created_by,
+                username,
+                password,
+                user_type,
+                mailid
+            ))
 
         return jsonify({'message': 'User created successfully'}), 201
 
@@ -231,17 +233,39 @@ def get_audit():
 def get_allaudit():
 
     try:
-        rows = execute_query("""
-            SELECT lumos_user,
-                   TO_CHAR(act_date, 'YYYY-MM-DD HH24:MI:SS GMT') AS act_date,
-                   action_type,
-                   testcasename,
-                   blockname
-            FROM lumos.activity_log
-            ORDER BY act_date DESC
-        """, fetch="all") or []
+        # Without limit/cursor the whole log is streamed instead of paged
+        if not request.args.get("limit") and not request.args.get("cursor"):
+            return stream_response("""
+                SELECT lumos_user,
+                       TO_CHAR(act_date, 'YYYY-MM-DD HH24:MI:SS GMT') AS act_date,
+                       action_type,
+                       testcasename,
+                       blockname
+                FROM lumos.activity_log
+                ORDER BY act_date DESC, act_seq DESC
+            """)
+
+        rows, next_cursor = fetch_page(
+            """lumos_user,
+               TO_CHAR(act_date, 'YYYY-MM-DD HH24:MI:SS GMT') AS act_date,
+               action_type,
+               testcasename,
+               blockname""",
+            "lumos.activity_log",
+            keys=["activity_log.act_date", "act_seq"],
+            args=request.args,
+            filters={
+                "lumos_user": "lumos_user",
+                "action_type": "action_type",
+                "testcasename": "testcasename",
+                "blockname": "blockname"
+            }
+        )
 
-        return jsonify(rows), 200
+        return jsonify({"items": rows, "next_cursor": next_cursor}), 200
+
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
 
     except Exception as e:
         return jsonify({'error': str(e)}), 500
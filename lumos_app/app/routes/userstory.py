@@ -1,5 +1,7 @@
 from flask import Blueprint, request, jsonify
 from ..db_utils import execute_query
+from ..pagination import fetch_page
+from ..conditional import conditional_json
 from ..services.activitylog import log_activity
 
 userstory_bp = Blueprint("userstory", __name__)
@@ -11,26 +13,37 @@ userstory_bp = Blueprint("userstory", __name__)
 @userstory_bp.route('/api/userstorylist', methods=['GET'])
 def get_userstory():
     try:
-        rows = execute_query("""
-            SELECT rowid,
-                   releaseid,
-                   productfamily,
-                   epicid,
-                   featureid,
-                   storydesc,
-                   developers,
-                   designers,
-                   status,
-                   manual_tcount,
-                   lumos_tcount,
-                   lastupdby,
-                   TO_CHAR(lastupd_at, 'YYYY-MM-DD HH24:MI:SS GMT')
-            FROM lumos.user_story
-            WHERE inactiveflag = 'N'
-            ORDER BY lastupd_at DESC
-        """, fetch="all") or []
-
-        return jsonify({"UserStories": rows}), 200
+        rows, next_cursor = fetch_page(
+            """rowid,
+               releaseid,
+               productfamily,
+               epicid,
+               featureid,
+               storydesc,
+               developers,
+               designers,
+               status,
+               manual_tcount,
+               lumos_tcount,
+               lastupdby,
+               TO_CHAR(lastupd_at, 'YYYY-MM-DD HH24:MI:SS GMT')""",
+            "lumos.user_story",
+            keys=["COALESCE(lastupd_at, 'epoch'::timestamp)", "rowid"],
+            args=request.args,
+            where="inactiveflag = 'N'",
+            filters={
+                "releaseid": "releaseid",
+                "productfamily": "productfamily",
+                "epicid": "epicid",
+                "featureid": "featureid",
+                "status": "status"
+            }
+        )
+
+        return jsonify({"UserStories": rows, "next_cursor": next_cursor}), 200
+
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
 
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -48,38 +61,47 @@ def edit_userstory():
         return jsonify({'error': 'RowId is required'}), 400
 
     try:
-        row = execute_query("""
-            SELECT releaseid,
-                   productfamily,
-                   epicid,
-                   featureid,
-                   storydesc,
-                   developers,
-                   designers,
-                   status,
-                   manual_tcount,
-                   lumos_tcount
-            FROM lumos.user_story
-            WHERE rowid = %s
-        """, (rowid,), fetch="one")
-
-        if not row:
-            return jsonify({'error': 'User story not found'}), 404
-
-        result = {
-            "releaseId": row[0],
-            "productFamily": row[1],
-            "epicId": row[2],
-            "featureId": row[3],
-            "storyDesc": row[4],
-            "developers": row[5],
-            "designers": row[6],
-            "status": row[7],
-            "manual_tcount": row[8],
-            "lumos_tcount": row[9]
-        }
-
-        return jsonify(result), 200
+        def build(tx):
+            row = tx.fetchone("""
+                SELECT releaseid,
+                       productfamily,
+                       epicid,
+                       featureid,
+                       storydesc,
+                       developers,
+                       designers,
+                       status,
+                       manual_tcount,
+                       lumos_tcount
+                FROM lumos.user_story
+                WHERE rowid = %s
+            """, (rowid,))
+
+            if not row:
+                return {'error': 'User story not found'}, 404
+
+            result = {
+                "releaseId": row[0],
+                "productFamily": row[1],
+                "epicId": row[2],
+                "featureId": row[3],
+                "storyDesc": row[4],
+                "developers": row[5],
+                "designers": row[6],
+                "status": row[7],
+                "manual_tcount": row[8],
+                "lumos_tcount": row[9]
+            }
+
+            return result, 200
+
+        return conditional_json(
+            """SELECT MAX(lastupd_at), COUNT(*)
+               FROM lumos.user_story
+               WHERE rowid = %s""",
+            (rowid,),
+            build
+        )
 
     except Exception as e:
         return jsonify({'error': str(e)}), 500
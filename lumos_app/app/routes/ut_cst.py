@@ -1,6 +1,7 @@
 from flask import Blueprint, request, jsonify
 from datetime import datetime
-from ..db_utils import execute_query
+from ..db_utils import execute_query, transaction
+from ..conditional import conditional_json
 from ..services.activitylog import log_activity
 
 ut_bp = Blueprint("ut", __name__)
@@ -50,42 +51,51 @@ def edit_utlist():
         return jsonify({'error': 'RowId is required'}), 400
 
     try:
-        row = execute_query("""
-            SELECT rowid,
-                   releaseid,
-                   storyref,
-                   name,
-                   description,
-                   acceptancecriteria,
-                   type,
-                   review,
-                   reviewcomments,
-                   status,
-                   regressiontest,
-                   passivesite
-            FROM lumos.ut_list
-            WHERE rowid = %s
-        """, (rowid,), fetch="one")
-
-        if not row:
-            return jsonify({'error': 'UT record not found'}), 404
-
-        result = {
-            "rowId": row[0],
-            "releaseId": row[1],
-            "storyRef": row[2],
-            "name": row[3],
-            "description": row[4],
-            "acceptancecriteria": row[5],
-            "type": row[6],
-            "review": row[7],
-            "reviewcomments": row[8],
-            "status": row[9],
-            "regressiontest": row[10],
-            "passivesite": row[11]
-        }
-
-        return jsonify(result), 200
+        def build(tx):
+            row = tx.fetchone("""
+                SELECT rowid,
+                       releaseid,
+                       storyref,
+                       name,
+                       description,
+                       acceptancecriteria,
+                       type,
+                       review,
+                       reviewcomments,
+                       status,
+                       regressiontest,
+                       passivesite
+                FROM lumos.ut_list
+                WHERE rowid = %s
+            """, (rowid,))
+
+            if not row:
+                return {'error': 'UT record not found'}, 404
+
+            result = {
+                "rowId": row[0],
+                "releaseId": row[1],
+                "storyRef": row[2],
+                "name": row[3],
+                "description": row[4],
+                "acceptancecriteria": row[5],
+                "type": row[6],
+                "review": row[7],
+                "reviewcomments": row[8],
+                "status": row[9],
+                "regressiontest": row[10],
+                "passivesite": row[11]
+            }
+
+            return result, 200
+
+        return conditional_json(
+            """SELECT MAX(lastupd_at), COUNT(*)
+               FROM lumos.ut_list
+               WHERE rowid = %s""",
+            (rowid,),
+            build
+        )
 
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -226,21 +236,23 @@ def delete_utlist():
         return jsonify({'error': 'RowId and userName required'}), 400
 
     try:
-        execute_query("""
-            UPDATE lumos.ut_list
-            SET inactiveflag='Y',
-                lastupdby=%s,
-                lastupd_at=DATE_TRUNC('second', CURRENT_TIMESTAMP)
-            WHERE rowid=%s
-        """, (username, rowid), commit=True)
-
-        execute_query("""
-            UPDATE lumos.ut_cst_int
-            SET inactiveflag='Y',
-                lastupdby=%s,
-                lastupd_at=DATE_TRUNC('second', CURRENT_TIMESTAMP)
-            WHERE ut_rowid=%s
-        """, (username, rowid), commit=True)
+        with transaction() as tx:
+
+            tx.execute("""
+                UPDATE lumos.ut_list
+                SET inactiveflag='Y',
+                    lastupdby=%s,
+                    lastupd_at=DATE_TRUNC('second', CURRENT_TIMESTAMP)
+                WHERE rowid=%s
+            """, (username, rowid))
+
+            tx.execute("""
+                UPDATE lumos.ut_cst_int
+                SET inactiveflag='Y',
+                    lastupdby=%s,
+                    lastupd_at=DATE_TRUNC('second', CURRENT_TIMESTAMP)
+                WHERE ut_rowid=%s
+            """, (username, rowid))
 
         log_activity(
             username,
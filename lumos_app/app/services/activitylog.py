@@ -1,42 +1,88 @@
-import configparser
-import socket
+import atexit
+import logging
+import os
+import queue
+import threading
+import time
 from datetime import datetime
-from ..db_utils import execute_query
+
+import psycopg2
+
+from ..config import get_settings
+from ..db_utils import transaction
 
 
 # ---------------------------------------------------------
-# Load DB Details from config.ini
+# Writer Settings
 # ---------------------------------------------------------
-def get_db_details():
+LOG_BATCH_SIZE = int(os.getenv("ACTIVITY_LOG_BATCH_SIZE", "200"))
+LOG_FLUSH_INTERVAL_MS = int(os.getenv("ACTIVITY_LOG_FLUSH_MS", "500"))
+LOG_QUEUE_SIZE = int(os.getenv("ACTIVITY_LOG_QUEUE_SIZE", "10000"))
+LOG_PUT_TIMEOUT = float(os.getenv("ACTIVITY_LOG_PUT_TIMEOUT", "2"))
 
-    config = configparser.ConfigParser()
-    config.read('config.ini')
+# Rows that could not be written are tried again this often, at most
+# LOG_WRITE_ATTEMPTS times in all
+LOG_WRITE_ATTEMPTS = int(os.getenv("ACTIVITY_LOG_WRITE_ATTEMPTS", "5"))
+LOG_RETRY_DELAY = float(os.getenv("ACTIVITY_LOG_RETRY_SECONDS", "5"))
 
-    active_db = config['LUMOS_DB']['active_db']
-    db_details = config[active_db]
+_log_queue = queue.Queue(maxsize=LOG_QUEUE_SIZE)
+_stop_event = threading.Event()
+_writer_thread = None
 
-    return db_details, active_db
+_retry_lock = threading.Lock()
+_retry = []        # (attempts, row)
+_retry_at = 0.0
 
 
 # ---------------------------------------------------------
-# Log Activity using execute_query()
+# Write a Batch of Activity Rows
 # ---------------------------------------------------------
-def log_activity(username, action, testcasename="", blockname=""):
+def latest_activity(rows):
+    """
+    Reduces activity rows to the newest (user, date, action) per
+    testcase and per block, for the lumos.last_activity projection.
+    """
 
-    try:
-        db_details, active_db = get_db_details()
+    latest = {}
 
-        db_user = db_details.get('user')
-        db_schema = db_details.get('schema_name', 'lumos')
+    for (username, _db_user, _db_schema, _act_id, act_date,
+         action, testcasename, blockname, _ip, _host) in rows:
+
+        for entity_type, entity_name in (("testcase", testcasename), ("block", blockname)):
+            if not entity_name:
+                continue
+
+            key = (entity_type, entity_name)
+
+            if key not in latest or act_date >= latest[key][3]:
+                latest[key] = (entity_type, entity_name, username, act_date, action)
+
+    return list(latest.values())
 
-        act_date = datetime.now()
-        current_time = datetime.now().strftime('%d%m%Y%H%M%S')
-        act_id = f"{username}_{current_time}"
 
-        hostname = socket.gethostname()
-        ip_address = socket.gethostbyname(hostname)
+def write_activity_rows(rows):
+    """
+    Inserts all rows into lumos.activity_log with one multi-row INSERT
+    and moves lumos.last_activity forward in the same transaction.
+    """
 
-        query = """
+    if not rows:
+        return
+
+    with transaction() as tx:
+        tx.execute_values("""
+            INSERT INTO lumos.last_activity
+            (entity_type, entity_name, lumos_user, act_date, action_type)
+            VALUES %s
+            ON CONFLICT (entity_type, entity_name) DO UPDATE
+            SET lumos_user = EXCLUDED.lumos_user,
+                act_date = EXCLUDED.act_date,
+                action_type = EXCLUDED.action_type
+            WHERE lumos.last_activity.act_date IS NULL
+               OR EXCLUDED.act_date >= lumos.last_activity.act_date
+        """, latest_activity(rows))
+
+        tx.execute_values("""
             INSERT INTO lumos.activity_log
             (lumos_user,
              db_user,
@@ -48,25 +94,198 @@ def log_activity(username, action, testcasename="", blockname=""):
              blockname,
              ip_address,
              hostname)
-            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-        """
-
-        execute_query(
-            query,
-            (
-                username,
-                db_user,
-                db_schema,
-                act_id,
-                act_date,
-                action,
-                testcasename,
-                blockname,
-                ip_address,
-                hostname
-            ),
-            commit=True
+            VALUES %s
+        """, rows)
+
+
+def _keep_for_retry(rows, attempts, error):
+    global _retry_at
+
+    kept = [(attempts, row) for row in rows if attempts < LOG_WRITE_ATTEMPTS]
+
+    if len(kept) < len(rows):
+        logging.error(
+            f"Activity logging gave up on {len(rows) - len(kept)} entries "
+            f"after {attempts} attempts: {error}"
+        )
+
+    if kept:
+        with _retry_lock:
+            _retry.extend(kept)
+            _retry_at = time.monotonic() + LOG_RETRY_DELAY
+
+
+def _write_batch(rows, attempts=0):
+    """
+    Writes rows with one INSERT. If that fails they are written one by
+    one, so a bad row does not cost the batch; rows that still fail
+    (or all the rest, once the database is unreachable) are kept and
+    retried later, up to LOG_WRITE_ATTEMPTS times.
+    """
+
+    try:
+        write_activity_rows(rows)
+        return
+    except Exception as e:
+        error = e
+
+    if len(rows) == 1 or isinstance(error, (psycopg2.OperationalError, psycopg2.InterfaceError)):
+        _keep_for_retry(rows, attempts + 1, error)
+        return
+
+    logging.warning(f"Activity batch of {len(rows)} entries failed, writing them one by one: {error}")
+
+    failed = []
+
+    for n, row in enumerate(rows):
+        try:
+            write_activity_rows([row])
+
+        except (psycopg2.OperationalError, psycopg2.InterfaceError) as e:
+            error = e
+            failed.extend(rows[n:])
+            break
+
+        except Exception as e:
+            error = e
+            failed.append(row)
+
+    if failed:
+        _keep_for_retry(failed, attempts + 1, error)
+
+
+def _write_retries(force=False):
+    """Writes rows kept by earlier failures once their retry is due."""
+
+    with _retry_lock:
+        if not _retry or (time.monotonic() < _retry_at and not force):
+            return
+
+        pending = list(_retry)
+        _retry.clear()
+
+    by_attempts = {}
+
+    for attempts, row in pending:
+        by_attempts.setdefault(attempts, []).append(row)
+
+    for attempts, rows in by_attempts.items():
+        _write_batch(rows, attempts)
+
+
+# ---------------------------------------------------------
+# Background Flusher
+# ---------------------------------------------------------
+def _flush_loop():
+    interval = LOG_FLUSH_INTERVAL_MS / 1000
+
+    while not (_stop_event.is_set() and _log_queue.empty()):
+        _write_retries()
+
+        try:
+            batch = [_log_queue.get(timeout=interval)]
+        except queue.Empty:
+            continue
+
+        deadline = time.monotonic() + interval
+
+        while len(batch) < LOG_BATCH_SIZE:
+            # On shutdown drain without waiting
+            remaining = 0 if _stop_event.is_set() else max(deadline - time.monotonic(), 0)
+
+            try:
+                batch.append(_log_queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+
+        _write_batch(batch)
+
+    # Shutdown: one last try for rows still waiting
+    _write_retries(force=True)
+
+    with _retry_lock:
+        if _retry:
+            logging.error(f"Activity logging lost {len(_retry)} entries at shutdown")
+
+
+def start_activity_logger():
+    """
+    Starts the background flusher. Safe to call more than once.
+    """
+
+    global _writer_thread
+
+    if _writer_thread and _writer_thread.is_alive():
+        return
+
+    _stop_event.clear()
+
+    _writer_thread = threading.Thread(
+        target=_flush_loop,
+        name="activity-log-writer",
+        daemon=True
+    )
+    _writer_thread.start()
+
+    atexit.register(stop_activity_logger)
+
+
+def stop_activity_logger(timeout=10):
+    """
+    Flushes everything still queued and stops the background flusher.
+    """
+
+    global _writer_thread
+
+    if not _writer_thread:
+        return
+
+    _stop_event.set()
+    _writer_thread.join(timeout)
+    _writer_thread = None
+
+
+# ---------------------------------------------------------
+# Log Activity (queued)
+# ---------------------------------------------------------
+def log_activity(username, action, testcasename="", blockname=""):
+
+    try:
+        settings = get_settings()
+
+        db_user = settings.db.user
+        db_schema = settings.schema_name
+
+        act_date = datetime.now()
+        current_time = act_date.strftime('%d%m%Y%H%M%S')
+        act_id = f"{username}_{current_time}"
+
+        hostname, ip_address = settings.hostname, settings.ip_address
+
+        entry = (
+            username,
+            db_user,
+            db_schema,
+            act_id,
+            act_date,
+            action,
+            testcasename,
+            blockname,
+            ip_address,
+            hostname
         )
 
+        # No flusher running (scripts, shutdown) -> write straight through
+        if not _writer_thread or _stop_event.is_set():
+            _write_batch([entry])
+            return
+
+        try:
+            # Backpressure: wait for room instead of growing without bound
+            _log_queue.put(entry, timeout=LOG_PUT_TIMEOUT)
+        except queue.Full:
+            logging.warning("Activity log queue full, writing entry synchronously")
+            _write_batch([entry])
+
     except Exception as e:
         print(f"Activity logging failed: {e}")
@@ -0,0 +1,209 @@
+import logging
+import os
+import select
+import threading
+import time
+
+import psycopg2
+
+from ..conditional import payload_etag
+from ..config import load_db_config
+from ..db_utils import execute_query, transaction
+
+
+# ==========================================================
+# Configuration
+# ==========================================================
+# invalidate() NOTIFYs the changed catalog names here; every worker
+# process listens and drops its copies
+CATALOG_CHANNEL = "lumos_catalog"
+
+# Upper bound on staleness if a notification is missed
+CATALOG_TTL = int(os.getenv("CATALOG_TTL_SECONDS", "300"))
+
+LISTEN_RECONNECT = 5
+
+_lock = threading.Lock()
+_entries = {}
+_versions = {}
+_listener_thread = None
+
+
+# ==========================================================
+# Loaders
+# ==========================================================
+def load_step_options(tx):
+    """Dropdown lists of the step editor (/testcases/populate_rows)."""
+
+    blocks = tx.fetchall('SELECT DISTINCT blockname FROM lumos.reuseable_pack ORDER BY blockname')
+    elements = tx.fetchall('SELECT DISTINCT element FROM lumos.repository ORDER BY element')
+    functions = tx.fetchall('SELECT functions FROM lumos.functions ORDER BY functions')
+    textids = tx.fetchall('SELECT textid FROM lumos.generictexttable')
+
+    return {
+        "StepType": ["Non Reuseable"] + [r[0] for r in blocks],
+        "Element": ["Plain action"] + [r[0] for r in elements],
+        "Action": ["Action"] + [r[0] for r in functions],
+        "ErrorCode": [r[0] for r in textids]
+    }
+
+
+def load_active_testcases(tx):
+    """Active testcase names (/testpacks/populate_testcases)."""
+
+    rows = tx.fetchall("""
+        SELECT DISTINCT testcasename
+        FROM lumos.testcase_list
+        WHERE inactiveflag = 'N'
+        ORDER BY testcasename
+    """)
+
+    return {"TestcasesList": [r[0] for r in rows]}
+
+
+def load_execution_targets(tx):
+    """Testcases and testpacks that can be executed (/executions/api/new_execution)."""
+
+    rows = tx.fetchall("""
+        SELECT testcasename AS name, 'Testcase' AS type
+        FROM lumos.testcase_list
+        WHERE inactiveflag = 'N'
+
+        UNION
+
+        SELECT testpack_name AS name, 'Testpack' AS type
+        FROM lumos.testpack_list
+        WHERE inactiveflag = 'N'
+    """)
+
+    return [{"name": r[0], "type": r[1]} for r in rows]
+
+
+LOADERS = {
+    "step_options": load_step_options,
+    "testcases": load_active_testcases,
+    "execution_targets": load_execution_targets
+}
+
+
+# ==========================================================
+# Cache Access
+# ==========================================================
+def get_catalog(name):
+    """
+    Returns (payload, etag) for a catalog, loading it on first use,
+    after invalidate() and after CATALOG_TTL seconds.
+    """
+
+    _ensure_listener()
+
+    with _lock:
+        version = _versions.get(name, 0)
+        entry = _entries.get(name)
+
+        if entry and entry["version"] == version and time.monotonic() - entry["loaded_at"] < CATALOG_TTL:
+            return entry["payload"], entry["etag"]
+
+    with transaction(readonly=True) as tx:
+        payload = LOADERS[name](tx)
+
+    entry = {
+        "version": version,
+        "payload": payload,
+        "etag": payload_etag(payload),
+        "loaded_at": time.monotonic()
+    }
+
+    with _lock:
+        # Do not store a load that raced with an invalidation
+        if _versions.get(name, 0) == version:
+            _entries[name] = entry
+
+    return entry["payload"], entry["etag"]
+
+
+def _drop(names):
+    with _lock:
+        for name in names:
+            _versions[name] = _versions.get(name, 0) + 1
+            _entries.pop(name, None)
+
+
+def invalidate(*names):
+    """
+    Bumps the version of the given catalogs so the next read reloads
+    them, here and in every other worker. Call after the change commits.
+    """
+
+    _drop(names)
+
+    try:
+        execute_query(
+            "SELECT pg_notify(%s, %s)",
+            (CATALOG_CHANNEL, ",".join(names)),
+            commit=True
+        )
+    except Exception as e:
+        # Other workers catch up after CATALOG_TTL
+        logging.error(f"Could not announce catalog change {names}: {e}")
+
+
+# ==========================================================
+# Cross-process Invalidation (one listener per worker process)
+# ==========================================================
+def _listen_loop():
+    """
+    Holds one dedicated autocommit connection on LISTEN and drops the
+    catalogs named in each notification. Reconnects on failure; every
+    catalog is dropped after a gap, since notifications may be lost.
+    """
+
+    while True:
+        conn = None
+
+        try:
+            conn = psycopg2.connect(**load_db_config())
+            conn.autocommit = True
+            conn.cursor().execute(f"LISTEN {CATALOG_CHANNEL}")
+
+            _drop(list(LOADERS))
+
+            while True:
+                if select.select([conn], [], [], 5) == ([], [], []):
+                    continue
+
+                conn.poll()
+
+                names = {
+                    name
+                    for notify in conn.notifies
+                    for name in notify.payload.split(",")
+                    if name in LOADERS
+                }
+                conn.notifies.clear()
+
+                if names:
+                    _drop(names)
+
+        except Exception as e:
+            logging.error(f"Catalog listener failed: {e}")
+            time.sleep(LISTEN_RECONNECT)
+
+        finally:
+            if conn is not None:
+                conn.close()
+
+
+def _ensure_listener():
+    global _listener_thread
+
+    with _lock:
+        if _listener_thread and _listener_thread.is_alive():
+            return
+
+        _listener_thread = threading.Thread(
+            target=_listen_loop,
+            name="catalog-listener",
+            daemon=True
+        )
+        _listener_thread.start()
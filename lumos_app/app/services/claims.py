@@ -0,0 +1,90 @@
+import logging
+import os
+import socket
+
+from ..db_utils import transaction
+
+
+# ==========================================================
+# Configuration
+# ==========================================================
+# Identifies this process in lumos.executions.claimed_by
+WORKER_ID = os.getenv("DISPATCHER_ID", f"{socket.gethostname()}:{os.getpid()}")
+
+# A Claimed row older than this is considered abandoned and re-claimed
+LEASE_SECONDS = int(os.getenv("EXECUTION_CLAIM_LEASE_SECONDS", "300"))
+
+
+# ==========================================================
+# Claim Submitted Executions
+# ==========================================================
+def claim_executions(columns, due_before, limit=None):
+    """
+    Atomically moves due Submitted executions (and Claimed ones whose
+    lease expired) to Claimed by WORKER_ID and returns them as dicts
+    with `columns`. Rows locked by another claimer are skipped, so
+    concurrent dispatchers never get the same row.
+    """
+
+    limit_sql = "LIMIT %s" if limit else ""
+    params = [WORKER_ID, due_before, LEASE_SECONDS]
+
+    if limit:
+        params.append(limit)
+
+    with transaction() as tx:
+        return tx.fetchall(f"""
+            UPDATE lumos.executions
+            SET exec_status = 'Claimed',
+                claimed_by = %s,
+                claimed_at = CURRENT_TIMESTAMP
+            WHERE rowid IN (
+                SELECT rowid
+                FROM lumos.executions
+                WHERE inactiveflag = 'N'
+                  AND scheduled_dt <= %s
+                  AND (exec_status = 'Submitted'
+                       OR (exec_status = 'Claimed'
+                           AND claimed_at < CURRENT_TIMESTAMP - make_interval(secs => %s)))
+                ORDER BY scheduled_dt
+                {limit_sql}
+                FOR UPDATE SKIP LOCKED
+            )
+            RETURNING {', '.join(columns)}
+        """, params, as_="dict")
+
+
+def renew_claim(execid):
+    """Extends the lease of a row this process still holds. False if lost."""
+
+    with transaction() as tx:
+        return tx.execute("""
+            UPDATE lumos.executions
+            SET claimed_at = CURRENT_TIMESTAMP
+            WHERE rowid = %s
+              AND exec_status = 'Claimed'
+              AND claimed_by = %s
+        """, (execid, WORKER_ID)) > 0
+
+
+def release_claims(execids):
+    """Hands claimed rows back to the queue as Submitted."""
+
+    if not execids:
+        return 0
+
+    try:
+        with transaction() as tx:
+            return tx.execute("""
+                UPDATE lumos.executions
+                SET exec_status = 'Submitted',
+                    claimed_by = NULL,
+                    claimed_at = NULL
+                WHERE rowid = ANY(%s)
+                  AND exec_status = 'Claimed'
+                  AND claimed_by = %s
+            """, (list(execids), WORKER_ID))
+
+    except Exception as e:
+        logging.error(f"Error releasing execution claims: {e}")
+        return 0
@@ -0,0 +1,396 @@
+import json
+import logging
+import os
+import select
+import signal
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import psycopg2
+
+from ..config import init_settings, load_db_config
+from ..extensions import init_db_pool
+from . import hostregistry, ledger, podman_client, reaper, scheduler, warmpool
+from .placement import get_inventory
+from .packindex import PACKS_CHANNEL, invalidate_packs
+from .resultingest import start_spool_collector, stop_spool_collector
+from .runtimestats import refresh_runtime_stats
+from .sharding import refresh_sharded_executions
+from .claims import release_claims, renew_claim
+from .processsubmit import (
+    EXECUTIONS_CHANNEL,
+    get_next_scheduled_delay,
+    get_submitted_records,
+    process_row
+)
+
+
+# ==========================================================
+# Configuration
+# ==========================================================
+WORKERS = int(os.getenv("DISPATCHER_WORKERS", "5"))
+
+# Safety sweep in case a notification is lost (listener reconnecting, etc.)
+SWEEP_INTERVAL = float(os.getenv("DISPATCHER_SWEEP_SECONDS", "30"))
+
+# How long a claimed execution that found every host full waits before a retry
+CAPACITY_RETRY = float(os.getenv("DISPATCHER_CAPACITY_RETRY_SECONDS", "5"))
+
+# Also run the recurring-execution timer in this process
+SCHEDULER_ENABLED = os.getenv("SCHEDULER_ENABLED", "Y") == "Y"
+
+# Drain container result files from the spool directory in this process
+RESULT_SPOOL_ENABLED = os.getenv("RESULT_SPOOL_ENABLED", "Y") == "Y"
+
+# Follow container exits on every host (one events stream per host)
+REAPER_ENABLED = os.getenv("REAPER_ENABLED", "Y") == "Y"
+
+# Fold new results into runtime stats, launch waiting shards and merge
+# shard results this often
+SHARD_REFRESH_INTERVAL = float(os.getenv("DISPATCHER_SHARD_REFRESH_SECONDS", "15"))
+
+HEALTH_PORT = int(os.getenv("DISPATCHER_HEALTH_PORT", "8089"))
+LISTEN_RECONNECT = 5
+
+_stop_event = threading.Event()
+_wake_event = threading.Event()
+
+_lock = threading.Lock()
+_in_flight = set()
+_deferred = {}     # execid -> (retry_at, row); still claimed by this process
+_refresh_now = threading.Event()
+
+_status = {
+    "started_at": None,
+    "listener_connected": False,
+    "last_sweep": None,
+    "dispatched": 0,
+    "errors": 0
+}
+
+
+# ==========================================================
+# LISTEN for New Executions
+# ==========================================================
+def _listen_loop():
+    """
+    Holds one dedicated autocommit connection on LISTEN. Execution
+    notifications wake the dispatch loop, testpack ones drop the pack
+    index. Reconnects on failure.
+    """
+
+    while not _stop_event.is_set():
+        conn = None
+
+        try:
+            conn = psycopg2.connect(**load_db_config())
+            conn.autocommit = True
+            conn.cursor().execute(f"LISTEN {EXECUTIONS_CHANNEL}; LISTEN {PACKS_CHANNEL}")
+
+            _status["listener_connected"] = True
+            logging.info(f"Listening on {EXECUTIONS_CHANNEL}, {PACKS_CHANNEL}")
+
+            # Catch up on anything submitted or changed while we were not listening
+            invalidate_packs()
+            _wake_event.set()
+
+            while not _stop_event.is_set():
+                if select.select([conn], [], [], 1) == ([], [], []):
+                    continue
+
+                conn.poll()
+
+                channels = {notify.channel for notify in conn.notifies}
+                conn.notifies.clear()
+
+                if PACKS_CHANNEL in channels:
+                    invalidate_packs()
+
+                if EXECUTIONS_CHANNEL in channels:
+                    _wake_event.set()
+
+        except Exception as e:
+            logging.error(f"Dispatcher listener failed: {e}")
+            _stop_event.wait(LISTEN_RECONNECT)
+
+        finally:
+            _status["listener_connected"] = False
+
+            if conn is not None:
+                conn.close()
+
+
+# ==========================================================
+# Dispatch
+# ==========================================================
+def _count(key):
+    with _lock:
+        _status[key] += 1
+
+
+def _run_row(row):
+    execid = row["rowid"]
+
+    try:
+        # Keep the claim while waiting for capacity; released on shutdown
+        result = process_row(row, release_on_wait=False)
+
+        if result == "Nocapacity":
+            with _lock:
+                _deferred[execid] = (time.monotonic() + CAPACITY_RETRY, row)
+
+    finally:
+        with _lock:
+            _in_flight.discard(execid)
+
+        # A worker is free again
+        _wake_event.set()
+
+
+def _submit(executor, row):
+    with _lock:
+        if row["rowid"] in _in_flight:
+            return False
+
+        _in_flight.add(row["rowid"])
+
+    future = executor.submit(_run_row, row)
+    future.add_done_callback(lambda f: _check_worker(f, row["rowid"]))
+    _count("dispatched")
+    return True
+
+
+def _check_worker(future, execid):
+    """Done-callback: counts and logs what escaped a worker."""
+
+    if future.cancelled():
+        return
+
+    error = future.exception()
+
+    if error:
+        _count("errors")
+        logging.error(f"Dispatching execution {execid} failed: {error!r}")
+
+
+def _sweep(executor):
+    """
+    Hands due work to free workers: first our own executions waiting
+    for capacity, then newly claimed Submitted rows. Returns how long
+    the loop may sleep before something else becomes due.
+    """
+
+    now = time.monotonic()
+    retries = []
+
+    with _lock:
+        free = WORKERS - len(_in_flight)
+
+        for execid, (retry_at, row) in list(_deferred.items()):
+            if retry_at <= now and len(retries) < free:
+                del _deferred[execid]
+                retries.append(row)
+
+    _status["last_sweep"] = time.time()
+
+    for row in retries:
+        if renew_claim(row["rowid"]) and _submit(executor, row):
+            free -= 1
+
+    if free > 0:
+        for row in get_submitted_records(limit=free):
+            _submit(executor, row)
+
+    waits = [SWEEP_INTERVAL]
+
+    next_due = get_next_scheduled_delay()
+
+    if next_due is not None:
+        waits.append(next_due)
+
+    with _lock:
+        if _deferred:
+            earliest = min(retry_at for retry_at, _ in _deferred.values())
+            waits.append(max(earliest - time.monotonic(), 0))
+
+    return min(waits)
+
+
+def _refresh_shards():
+    try:
+        refresh_runtime_stats()
+    except Exception as e:
+        _count("errors")
+        logging.error(f"Runtime stats refresh failed: {e}")
+
+    try:
+        refresh_sharded_executions()
+    except Exception as e:
+        _count("errors")
+        logging.error(f"Shard refresh failed: {e}")
+
+
+def _refresh_loop():
+    """
+    Shard upkeep on its own thread, so a long pass never holds a worker
+    while claimed executions wait for one with their lease running.
+    """
+
+    while not _stop_event.is_set():
+        _refresh_now.clear()
+        _refresh_shards()
+
+        # Capacity freed during the pass (or meanwhile) -> next one right away
+        _refresh_now.wait(SHARD_REFRESH_INTERVAL)
+
+
+def capacity_freed(entry=None):
+    """
+    Called by the reaper when a container exits: executions waiting for
+    capacity are retried and waiting shards launched right away.
+    """
+
+    with _lock:
+        for execid, (_, row) in list(_deferred.items()):
+            _deferred[execid] = (0.0, row)
+
+    _refresh_now.set()
+    _wake_event.set()
+
+
+def _dispatch_loop(executor):
+    while not _stop_event.is_set():
+        _wake_event.clear()
+        timeout = SWEEP_INTERVAL
+
+        try:
+            timeout = _sweep(executor)
+        except Exception as e:
+            _count("errors")
+            logging.error(f"Dispatcher sweep failed: {e}")
+
+        _wake_event.wait(timeout)
+
+
+# ==========================================================
+# Health Endpoint
+# ==========================================================
+def health():
+    with _lock:
+        in_flight = len(_in_flight)
+        deferred = len(_deferred)
+        status = dict(_status)
+
+    healthy = status["listener_connected"] and not _stop_event.is_set()
+
+    return {
+        "status": "ok" if healthy else "degraded",
+        "workers": WORKERS,
+        "in_flight": in_flight,
+        "waiting_for_capacity": deferred,
+        **status
+    }
+
+
+class HealthHandler(BaseHTTPRequestHandler):
+
+    def do_GET(self):
+        if self.path.rstrip("/") != "/health":
+            self.send_error(404)
+            return
+
+        body = health()
+        payload = json.dumps(body, default=str).encode()
+
+        self.send_response(200 if body["status"] == "ok" else 503)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass
+
+
+# ==========================================================
+# Main Entry Point
+# ==========================================================
+def _request_stop(signum, frame):
+    logging.info(f"Dispatcher received signal {signum}, shutting down")
+    _stop_event.set()
+    _wake_event.set()
+
+
+def run_dispatcher():
+    """
+    Resident dispatcher: wakes on NOTIFY lumos_executions, claims and
+    starts Submitted executions on WORKERS threads and, on SIGTERM/SIGINT,
+    finishes the executions already being started before exiting.
+    Several dispatchers can run side by side.
+    """
+
+    init_settings()
+    init_db_pool(load_db_config())
+
+    signal.signal(signal.SIGTERM, _request_stop)
+    signal.signal(signal.SIGINT, _request_stop)
+
+    _status["started_at"] = time.time()
+
+    server = ThreadingHTTPServer(("0.0.0.0", HEALTH_PORT), HealthHandler)
+    threading.Thread(target=server.serve_forever, name="dispatcher-health", daemon=True).start()
+
+    # Launches are recorded in the placement ledger in batches
+    ledger.start_ledger_writer()
+
+    listener = threading.Thread(target=_listen_loop, name="dispatcher-listen", daemon=True)
+    listener.start()
+
+    if SCHEDULER_ENABLED:
+        scheduler.start_scheduler()
+
+    if RESULT_SPOOL_ENABLED:
+        start_spool_collector()
+
+    if REAPER_ENABLED:
+        reaper.start_reaper([h["url"] for h in get_inventory()["hosts"]], on_exit=capacity_freed)
+
+    # Optional: hosts with warm_pool > 0 in podman_hosts.ini
+    if warmpool.pool_enabled():
+        warmpool.start_warm_pool()
+
+    refresher = threading.Thread(target=_refresh_loop, name="dispatcher-refresh", daemon=True)
+    refresher.start()
+
+    logging.info(f"Dispatcher started: {WORKERS} workers, health on :{HEALTH_PORT}")
+
+    with ThreadPoolExecutor(max_workers=WORKERS, thread_name_prefix="dispatcher") as executor:
+        _dispatch_loop(executor)
+        _refresh_now.set()
+        scheduler.stop_scheduler()
+        stop_spool_collector()
+        reaper.stop_reaper()
+        warmpool.stop_warm_pool()
+        logging.info("Waiting for executions already being started")
+
+    # Hand executions still waiting for capacity to other dispatchers
+    with _lock:
+        waiting = list(_deferred)
+        _deferred.clear()
+
+    release_claims(waiting)
+
+    listener.join(LISTEN_RECONNECT)
+    refresher.join(LISTEN_RECONNECT)
+    server.shutdown()
+    hostregistry.stop_host_registry()
+    ledger.stop_ledger_writer()
+    podman_client.close_all()
+
+    logging.info("Dispatcher stopped")
+
+
+if __name__ == "__main__":
+    run_dispatcher()
@@ -3,69 +3,42 @@ from datetime import datetime
 import os
 
 from ..db_utils import execute_query
+from .claims import WORKER_ID, claim_executions
 
 
 # ==========================================================
 # Fetch Scheduled Executions
 # ==========================================================
-def fetch_scheduled_executions():
+def fetch_scheduled_executions(limit=None):
     """
-    Fetch all executions that are scheduled and still in 'Submitted' status.
+    Claim executions that are scheduled and still in 'Submitted' status.
+    Claimed rows are not returned to any other scheduler or dispatcher.
     """
 
     try:
         current_time = datetime.now()
 
-        rows = execute_query("""
-            SELECT lumos_user,
-                   exec_id,
-                   exec_date,
-                   env_name,
-                   exec_status,
-                   total_count,
-                   pass_count,
-                   fail_count,
-                   exec_time,
-                   browser,
-                   parallel_exec,
-                   delay,
-                   screen_capture,
-                   inactiveflag,
-                   orgid,
-                   frequency,
-                   scheduled_dt,
-                   exec_test_list
-            FROM lumos.executions
-            WHERE scheduled_dt <= %s
-              AND exec_status = 'Submitted'
-              AND inactiveflag = 'N'
-        """, (current_time,), fetch="all") or []
-
-        executions = []
-
-        for row in rows:
-            executions.append({
-                "lumos_user": row[0],
-                "exec_id": row[1],
-                "exec_date": row[2],
-                "env_name": row[3],
-                "exec_status": row[4],
-                "total_count": row[5],
-                "pass_count": row[6],
-                "fail_count": row[7],
-                "exec_time": row[8],
-                "browser": row[9],
-                "parallel_exec": row[10],
-                "delay": row[11],
-                "screen_capture": row[12],
-                "inactiveflag": row[13],
-                "orgid": row[14],
-                "frequency": row[15],
-                "scheduled_dt": row[16],
-                "exec_test_list": row[17]
-            })
-
-        return executions
+        return claim_executions([
+            "rowid",
+            "lumos_user",
+            "exec_id",
+            "exec_date",
+            "env_name",
+            "exec_status",
+            "total_count",
+            "pass_count",
+            "fail_count",
+            "exec_time",
+            "browser",
+            "parallel_exec",
+            "delay",
+            "screen_capture",
+            "inactiveflag",
+            "orgid",
+            "frequency",
+            "scheduled_dt",
+            "exec_test_list"
+        ], current_time, limit)
 
     except Exception as e:
         print(f"Failed to fetch scheduled executions: {e}")
@@ -80,13 +53,19 @@ def process_executions_in_parallel(executions):
     Process multiple executions using threads.
     """
 
+    def set_status(execution, status):
+        # Leaves Claimed, so the lease does not hand it out again
+        execute_query("""
+            UPDATE lumos.executions
+            SET exec_status = %s
+            WHERE rowid = %s
+              AND claimed_by = %s
+        """, (status, execution.get("rowid"), WORKER_ID), commit=True)
+
     def process_execution(execution):
 
         try:
-            exec_test_list = execution.get("exec_test_list")
-
-            if not exec_test_list:
-                return
+            exec_test_list = execution.get("exec_test_list") or ""
 
             tests = exec_test_list.split(',')
 
@@ -98,8 +77,15 @@ def process_executions_in_parallel(executions):
                 if test:
                     test_dict[f"test_{i+1}"] = test
 
+            if not test_dict:
+                print(f"Execution {execution.get('rowid')} has no testcases to run")
+                set_status(execution, "Failed")
+                return
+
             env = execution.get("env_name")
 
+            set_status(execution, "Started")
+
             call_lumos(test_dict, env, trigger_flag="Y")
 
         except Exception as e:
@@ -0,0 +1,205 @@
+import os
+import time
+import random
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+
+# ==========================================================
+# Configuration
+# ==========================================================
+POLL_INTERVAL = float(os.getenv("HOST_REGISTRY_POLL_SECONDS", "5"))
+STALE_AFTER = float(os.getenv("HOST_REGISTRY_STALE_SECONDS", str(POLL_INTERVAL * 3)))
+
+# Circuit breaker: after FAILURE_THRESHOLD failed probes a host is skipped
+# and re-probed with exponential backoff up to MAX_BACKOFF seconds
+FAILURE_THRESHOLD = int(os.getenv("HOST_REGISTRY_FAILURE_THRESHOLD", "3"))
+BASE_BACKOFF = float(os.getenv("HOST_REGISTRY_BASE_BACKOFF", "5"))
+MAX_BACKOFF = float(os.getenv("HOST_REGISTRY_MAX_BACKOFF", "300"))
+
+_lock = threading.Lock()
+_states = {}
+_stop_event = threading.Event()
+_poller = None
+
+
+def _new_state(host):
+    return {
+        "host": host,
+        "running": None,
+        "mem_percent": None,
+        "failures": 0,
+        "last_seen": None,
+        "circuit_open": False,
+        "next_probe_at": 0.0
+    }
+
+
+# ==========================================================
+# Record Probe Results
+# ==========================================================
+def record_probe(host, load):
+    """
+    Stores one probe result: {"running", "mem_percent"}, or None when
+    the host failed. Live probes made by the dispatcher are recorded too.
+    """
+
+    now = time.monotonic()
+
+    with _lock:
+        state = _states.setdefault(host, _new_state(host))
+
+        if load is not None:
+            if state["circuit_open"]:
+                logging.info(f"Host {host} is back, closing circuit")
+
+            state.update(
+                running=load["running"],
+                mem_percent=load.get("mem_percent"),
+                failures=0,
+                last_seen=now,
+                circuit_open=False,
+                next_probe_at=now + POLL_INTERVAL
+            )
+            return
+
+        state["failures"] += 1
+
+        if state["failures"] >= FAILURE_THRESHOLD:
+            if not state["circuit_open"]:
+                logging.warning(f"Host {host} failed {state['failures']} probes, opening circuit")
+
+            backoff = min(
+                BASE_BACKOFF * 2 ** (state["failures"] - FAILURE_THRESHOLD),
+                MAX_BACKOFF
+            )
+            state["circuit_open"] = True
+            state["next_probe_at"] = now + backoff * random.uniform(0.8, 1.2)
+        else:
+            state["next_probe_at"] = now + POLL_INTERVAL
+
+
+def note_placement(host):
+    """
+    Counts a container placed on `host` right away, so placements made
+    before the next poll do not all pick the same host.
+    """
+
+    with _lock:
+        state = _states.get(host)
+
+        if state and state["running"] is not None:
+            state["running"] += 1
+
+
+def release_placement(host):
+    """Undoes note_placement() when the container could not be started."""
+
+    with _lock:
+        state = _states.get(host)
+
+        if state and state["running"]:
+            state["running"] -= 1
+
+
+# ==========================================================
+# Read the Snapshot
+# ==========================================================
+def snapshot():
+    with _lock:
+        return {host: dict(state) for host, state in _states.items()}
+
+
+def is_available(state):
+    """Healthy, circuit closed and polled recently enough to trust."""
+
+    return (
+        not state["circuit_open"]
+        and state["running"] is not None
+        and state["last_seen"] is not None
+        and time.monotonic() - state["last_seen"] <= STALE_AFTER
+    )
+
+
+def is_circuit_open(host):
+    with _lock:
+        state = _states.get(host)
+        return bool(state and state["circuit_open"])
+
+
+def available_loads(hosts):
+    """
+    {host: {"running", "mem_percent"}} for the hosts whose snapshot can
+    be trusted; placement needs no network calls for these.
+    """
+
+    states = snapshot()
+
+    return {
+        host: {"running": states[host]["running"], "mem_percent": states[host]["mem_percent"]}
+        for host in hosts
+        if host in states and is_available(states[host])
+    }
+
+
+# ==========================================================
+# Background Poller
+# ==========================================================
+def poll_once(hosts, probe, executor):
+    now = time.monotonic()
+
+    with _lock:
+        due = [
+            host for host in hosts
+            if _states.setdefault(host, _new_state(host))["next_probe_at"] <= now
+        ]
+
+    futures = {executor.submit(probe, host): host for host in due}
+
+    for future, host in futures.items():
+        try:
+            record_probe(host, future.result())
+        except Exception as e:
+            logging.error(f"Host registry probe failed for {host}: {e}")
+            record_probe(host, None)
+
+
+def _poll_loop(hosts, probe):
+    with ThreadPoolExecutor(max_workers=max(len(hosts), 1), thread_name_prefix="host-registry") as executor:
+        while not _stop_event.is_set():
+            poll_once(hosts, probe, executor)
+            _stop_event.wait(1)
+
+
+def start_host_registry(hosts, probe):
+    """
+    Starts polling `hosts` with probe(host) -> load dict or None.
+    Safe to call more than once.
+    """
+
+    global _poller
+
+    if _poller and _poller.is_alive():
+        return
+
+    _stop_event.clear()
+
+    _poller = threading.Thread(
+        target=_poll_loop,
+        args=(list(hosts), probe),
+        name="host-registry",
+        daemon=True
+    )
+    _poller.start()
+
+
+def stop_host_registry(timeout=5):
+    global _poller
+
+    if not _poller:
+        return
+
+    _stop_event.set()
+    _poller.join(timeout)
+    _poller = None
@@ -0,0 +1,316 @@
+import atexit
+import logging
+import os
+import threading
+from datetime import datetime, timedelta
+
+from ..db_utils import transaction
+
+
+# ==========================================================
+# Configuration
+# ==========================================================
+LEDGER_BATCH_SIZE = int(os.getenv("LEDGER_BATCH_SIZE", "200"))
+LEDGER_FLUSH_INTERVAL_MS = int(os.getenv("LEDGER_FLUSH_MS", "500"))
+
+# Finished containers stay in the in-memory mirror this long
+FINISHED_RETENTION = timedelta(seconds=int(os.getenv("LEDGER_FINISHED_RETENTION_SECONDS", "3600")))
+
+COLUMNS = (
+    "execid",
+    "container_name",
+    "shard_no",
+    "host",
+    "container_id",
+    "image",
+    "started_at",
+    "finished_at",
+    "exit_code"
+)
+
+_lock = threading.Lock()
+_entries = {}          # (execid, container_name) -> entry
+_by_container_id = {}  # container_id -> (execid, container_name)
+_pending = {}          # entries not yet written, latest state per key
+
+_stop_event = threading.Event()
+_wake_event = threading.Event()
+_writer_thread = None
+
+
+# ==========================================================
+# Write Entries
+# ==========================================================
+def write_entries(entries):
+    """
+    Upserts ledger entries with one multi-row INSERT. A relaunch under
+    the same name (newer started_at) replaces the finish fields; an
+    older snapshot never clears an exit that is already recorded.
+    """
+
+    if not entries:
+        return
+
+    with transaction() as tx:
+        tx.execute_values("""
+            INSERT INTO lumos.container_ledger
+            (execid, container_name, shard_no, host, container_id,
+             image, started_at, finished_at, exit_code)
+            VALUES %s
+            ON CONFLICT (execid, container_name) DO UPDATE
+            SET shard_no = COALESCE(EXCLUDED.shard_no, lumos.container_ledger.shard_no),
+                host = EXCLUDED.host,
+                container_id = EXCLUDED.container_id,
+                image = COALESCE(EXCLUDED.image, lumos.container_ledger.image),
+                finished_at = CASE
+                    WHEN EXCLUDED.started_at > lumos.container_ledger.started_at
+                    THEN EXCLUDED.finished_at
+                    ELSE COALESCE(EXCLUDED.finished_at, lumos.container_ledger.finished_at)
+                END,
+                exit_code = CASE
+                    WHEN EXCLUDED.started_at > lumos.container_ledger.started_at
+                    THEN EXCLUDED.exit_code
+                    ELSE COALESCE(EXCLUDED.exit_code, lumos.container_ledger.exit_code)
+                END,
+                started_at = GREATEST(EXCLUDED.started_at, lumos.container_ledger.started_at)
+        """, [tuple(entry[c] for c in COLUMNS) for entry in entries])
+
+
+def flush():
+    """Writes everything pending; entries of a failed batch are retried later."""
+
+    with _lock:
+        batch = list(_pending.items())
+        _pending.clear()
+
+    for start in range(0, len(batch), LEDGER_BATCH_SIZE):
+        chunk = batch[start:start + LEDGER_BATCH_SIZE]
+
+        try:
+            write_entries([entry for _, entry in chunk])
+
+        except Exception as e:
+            logging.error(f"Ledger write failed for {len(chunk)} entries: {e}")
+
+            with _lock:
+                for key, entry in chunk:
+                    # A newer state queued meanwhile wins
+                    _pending.setdefault(key, entry)
+
+
+def _enqueue(entry):
+    key = (entry["execid"], entry["container_name"])
+
+    with _lock:
+        _pending[key] = dict(entry)
+        full = len(_pending) >= LEDGER_BATCH_SIZE
+
+    # No writer running (scripts, shutdown) -> write straight through
+    if not _writer_thread or _stop_event.is_set():
+        flush()
+    elif full:
+        _wake_event.set()
+
+
+# ==========================================================
+# Record Launches and Exits
+# ==========================================================
+def _remember(entry):
+    key = (entry["execid"], entry["container_name"])
+
+    with _lock:
+        previous = _entries.get(key)
+
+        if previous and previous["container_id"] != entry["container_id"]:
+            _by_container_id.pop(previous["container_id"], None)
+
+        _entries[key] = entry
+        _by_container_id[entry["container_id"]] = key
+
+
+def record_launch(execid, container_name, host, container_id,
+                  image=None, shard_no=None, started_at=None):
+    entry = {
+        "execid": str(execid),
+        "container_name": container_name,
+        "shard_no": shard_no,
+        "host": host,
+        "container_id": container_id,
+        "image": image,
+        "started_at": started_at or datetime.utcnow().replace(microsecond=0),
+        "finished_at": None,
+        "exit_code": None
+    }
+
+    _remember(entry)
+    _enqueue(entry)
+
+    return entry
+
+
+def record_exit(container_id, exit_code, finished_at=None):
+    """
+    Marks a container finished. Returns its ledger entry, or None for
+    containers the ledger does not know (not launched by Lumos).
+    """
+
+    entry = find_container(container_id)
+
+    if not entry:
+        return None
+
+    with _lock:
+        if entry["finished_at"] is not None:
+            return None
+
+        entry["finished_at"] = finished_at or datetime.utcnow().replace(microsecond=0)
+        entry["exit_code"] = exit_code
+
+    _enqueue(entry)
+
+    return entry
+
+
+# ==========================================================
+# Read the Ledger
+# ==========================================================
+def _load(where, params):
+    with transaction(readonly=True) as tx:
+        return tx.fetchall(f"""
+            SELECT {", ".join(COLUMNS)}
+            FROM lumos.container_ledger
+            WHERE {where}
+        """, params, as_="dict")
+
+
+def load_open_entries(host=None):
+    """
+    Adds containers not yet finished (of one host, or all) to the
+    mirror: at dispatcher start, and when the reaper reconciles.
+    Entries already mirrored are newer than the table and kept.
+    """
+
+    if host:
+        rows = _load("finished_at IS NULL AND host = %s", (host,))
+    else:
+        rows = _load("finished_at IS NULL", None)
+
+    with _lock:
+        rows = [row for row in rows if (row["execid"], row["container_name"]) not in _entries]
+
+    for row in rows:
+        _remember(row)
+
+    return len(rows)
+
+
+def find_container(container_id):
+    with _lock:
+        key = _by_container_id.get(container_id)
+
+        if key:
+            return _entries[key]
+
+    rows = _load("container_id = %s ORDER BY started_at DESC LIMIT 1", (container_id,))
+
+    if not rows:
+        return None
+
+    _remember(rows[0])
+    return rows[0]
+
+
+def containers_for(execid, open_only=False):
+    """Ledger entries of one execution; this process's mirror wins over the table."""
+
+    execid = str(execid)
+    entries = {(row["execid"], row["container_name"]): row for row in _load("execid = %s", (execid,))}
+
+    with _lock:
+        entries.update({key: dict(entry) for key, entry in _entries.items() if key[0] == execid})
+
+    result = sorted(entries.values(), key=lambda e: (e["shard_no"] or 0, e["container_name"]))
+
+    if open_only:
+        result = [entry for entry in result if entry["finished_at"] is None]
+
+    return result
+
+
+def open_containers(host=None):
+    """Running containers known to this process's mirror."""
+
+    with _lock:
+        return [
+            dict(entry) for entry in _entries.values()
+            if entry["finished_at"] is None and (host is None or entry["host"] == host)
+        ]
+
+
+def _prune(now):
+    with _lock:
+        for key, entry in list(_entries.items()):
+            if entry["finished_at"] and now - entry["finished_at"] > FINISHED_RETENTION:
+                del _entries[key]
+
+                if _by_container_id.get(entry["container_id"]) == key:
+                    del _by_container_id[entry["container_id"]]
+
+
+# ==========================================================
+# Background Writer
+# ==========================================================
+def _flush_loop():
+    interval = LEDGER_FLUSH_INTERVAL_MS / 1000
+
+    while not _stop_event.is_set():
+        _wake_event.wait(interval)
+        _wake_event.clear()
+
+        flush()
+        _prune(datetime.utcnow())
+
+    # Shutdown: write what is left
+    flush()
+
+
+def start_ledger_writer():
+    """
+    Loads running containers into the mirror and starts the batched
+    writer. Safe to call more than once.
+    """
+
+    global _writer_thread
+
+    if _writer_thread and _writer_thread.is_alive():
+        return
+
+    try:
+        load_open_entries()
+    except Exception as e:
+        logging.error(f"Could not load open ledger entries: {e}")
+
+    _stop_event.clear()
+
+    _writer_thread = threading.Thread(
+        target=_flush_loop,
+        name="ledger-writer",
+        daemon=True
+    )
+    _writer_thread.start()
+
+    atexit.register(stop_ledger_writer)
+
+
+def stop_ledger_writer(timeout=10):
+    """Writes everything still pending and stops the writer."""
+
+    global _writer_thread
+
+    if not _writer_thread:
+        return
+
+    _stop_event.set()
+    _wake_event.set()
+    _writer_thread.join(timeout)
+    _writer_thread = None
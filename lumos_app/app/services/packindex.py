@@ -0,0 +1,88 @@
+import os
+import threading
+import time
+
+from ..db_utils import transaction
+
+
+# ==========================================================
+# Configuration
+# ==========================================================
+# Pack routes NOTIFY this channel; the dispatcher invalidates on it
+PACKS_CHANNEL = "lumos_testpacks"
+
+# Upper bound on staleness if a notification is missed
+PACK_INDEX_TTL = int(os.getenv("PACK_INDEX_TTL_SECONDS", "300"))
+
+_lock = threading.Lock()
+_index = None
+_version = 0
+
+
+# ==========================================================
+# Build the Index
+# ==========================================================
+def load_pack_index(tx):
+    """{testpack_name: [testcasename, ...]} for every active pack."""
+
+    rows = tx.fetchall("""
+        SELECT testpack_name, testcasename
+        FROM lumos.testpack_list
+        WHERE inactiveflag = 'N'
+          AND testcasename IS NOT NULL
+        ORDER BY testpack_name, testcasename
+    """)
+
+    index = {}
+
+    for testpack_name, testcasename in rows:
+        members = index.setdefault(testpack_name, [])
+
+        if testcasename not in members:
+            members.append(testcasename)
+
+    return index
+
+
+def get_pack_index():
+    global _index
+
+    with _lock:
+        version = _version
+        entry = _index
+
+        if entry and entry["version"] == version and time.monotonic() - entry["loaded_at"] < PACK_INDEX_TTL:
+            return entry["packs"]
+
+    with transaction(readonly=True) as tx:
+        packs = load_pack_index(tx)
+
+    with _lock:
+        # Do not store a load that raced with an invalidation
+        if _version == version:
+            _index = {"version": version, "packs": packs, "loaded_at": time.monotonic()}
+
+    return packs
+
+
+def get_pack_members(testpack_name):
+    return list(get_pack_index().get(testpack_name, []))
+
+
+# ==========================================================
+# Invalidation
+# ==========================================================
+def invalidate_packs():
+    """Drops the index in this process; the next lookup rebuilds it."""
+
+    global _index, _version
+
+    with _lock:
+        _version += 1
+        _index = None
+
+
+def notify_packs_changed(tx):
+    """Invalidates the index in other processes once `tx` commits."""
+
+    tx.notify(PACKS_CHANNEL)
@@ -0,0 +1,186 @@
+import configparser
+import logging
+import os
+import threading
+
+
+# ==========================================================
+# Configuration
+# ==========================================================
+INVENTORY_PATH = os.getenv(
+    "PODMAN_INVENTORY",
+    os.path.join(
+        os.path.dirname(os.path.dirname(os.path.dirname(__file__))),
+        "podman_hosts.ini"
+    )
+)
+
+DEFAULT_SLOTS = 4
+DEFAULT_WARM_POOL_SIZE = 0
+DEFAULT_MAX_MEMORY_PERCENT = 85.0
+
+BROWSER_IMAGES = {
+    "chrome": "lumoslite_lean",
+    "edge": "lumoslite_edge"
+}
+
+_lock = threading.Lock()
+_inventory = None
+
+
+# ==========================================================
+# Host Inventory
+# ==========================================================
+def _split(value):
+    return [item.strip() for item in value.split(",") if item.strip()]
+
+
+def load_inventory(path=INVENTORY_PATH):
+    """
+    Reads podman_hosts.ini. Every section except [PLACEMENT] is a host:
+
+        url, slots, images, environments, max_memory_percent, warm_pool
+
+    warm_pool is the number of idle pre-started containers kept per
+    image (default [PLACEMENT] warm_pool_size; 0 disables the pool).
+    An environment listed explicitly on some host runs only on those
+    hosts; "*" in `environments` takes every environment nobody lists.
+    """
+
+    config = configparser.ConfigParser()
+
+    if not config.read(path):
+        raise FileNotFoundError(f"Podman inventory not found: {path}")
+
+    hosts = []
+    warm_pool_size = config.getint("PLACEMENT", "warm_pool_size", fallback=DEFAULT_WARM_POOL_SIZE)
+
+    for name in config.sections():
+        if name == "PLACEMENT":
+            continue
+
+        section = config[name]
+
+        hosts.append({
+            "name": name,
+            "url": section["url"].rstrip("/"),
+            "slots": section.getint("slots", DEFAULT_SLOTS),
+            "images": _split(section.get("images", ",".join(BROWSER_IMAGES.values()))),
+            "environments": _split(section.get("environments", "*")),
+            "max_memory_percent": section.getfloat("max_memory_percent", DEFAULT_MAX_MEMORY_PERCENT),
+            "warm_pool": section.getint("warm_pool", warm_pool_size)
+        })
+
+    return {
+        "strategy": config.get("PLACEMENT", "strategy", fallback="free_capacity"),
+        "hosts": hosts
+    }
+
+
+def get_inventory():
+    global _inventory
+
+    with _lock:
+        if _inventory is None:
+            _inventory = load_inventory()
+
+        return _inventory
+
+
+def reload_inventory():
+    global _inventory
+
+    inventory = load_inventory()
+
+    with _lock:
+        _inventory = inventory
+
+    return inventory
+
+
+def image_for_browser(browser):
+    return BROWSER_IMAGES.get((browser or "").lower(), BROWSER_IMAGES["edge"])
+
+
+def hosts_for(env, image, inventory=None):
+    """Inventory hosts allowed to run `env` that carry `image`."""
+
+    inventory = inventory or get_inventory()
+    hosts = [h for h in inventory["hosts"] if image in h["images"]]
+
+    explicit = [h for h in hosts if env in h["environments"]]
+
+    if explicit:
+        return explicit
+
+    claimed = any(env in h["environments"] for h in inventory["hosts"])
+
+    return [] if claimed else [h for h in hosts if "*" in h["environments"]]
+
+
+# ==========================================================
+# Capacity
+# ==========================================================
+def free_slots(host, load):
+    return host["slots"] - load["running"]
+
+
+def has_capacity(host, load):
+    mem_percent = load.get("mem_percent") or 0
+
+    return free_slots(host, load) > 0 and mem_percent < host["max_memory_percent"]
+
+
+# ==========================================================
+# Strategies
+# ==========================================================
+# Each strategy gets [(host, load)] of hosts with room and returns one host
+
+def free_capacity(candidates):
+    """Most free slots relative to size, then least memory in use."""
+
+    def score(candidate):
+        host, load = candidate
+        return (
+            free_slots(host, load) / host["slots"],
+            -(load.get("mem_percent") or 0)
+        )
+
+    return max(candidates, key=score)[0]
+
+
+def least_containers(candidates):
+    """Fewest running containers (the previous balancing rule)."""
+
+    return min(candidates, key=lambda candidate: candidate[1]["running"])[0]
+
+
+STRATEGIES = {
+    "free_capacity": free_capacity,
+    "least_containers": least_containers
+}
+
+
+def choose_host(hosts, loads, strategy=None):
+    """
+    Picks a host from `hosts` using `loads` ({url: {"running", "mem_percent"}}).
+
+    Returns the chosen host, or None when every host with a known load is
+    full. Hosts without a load (unhealthy, unreachable) are ignored.
+    """
+
+    strategy = strategy or get_inventory()["strategy"]
+
+    if strategy not in STRATEGIES:
+        logging.warning(f"Unknown placement strategy '{strategy}', using free_capacity")
+        strategy = "free_capacity"
+
+    candidates = [
+        (host, loads[host["url"]]) for host in hosts
+        if host["url"] in loads and has_capacity(host, loads[host["url"]])
+    ]
+
+    if not candidates:
+        return None
+
+    return STRATEGIES[strategy](candidates)
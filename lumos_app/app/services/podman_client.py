@@ -0,0 +1,365 @@
+import asyncio
+import concurrent.futures
+import json
+import logging
+import os
+import random
+import threading
+from dataclasses import dataclass
+from datetime import datetime
+
+import httpx
+
+
+# ==========================================================
+# Configuration
+# ==========================================================
+API_VERSION = "v4.8.0"
+
+# Short connect timeout so a dead host fails fast; read timeouts stay generous
+CONNECT_TIMEOUT = float(os.getenv("PODMAN_CONNECT_TIMEOUT", "1.5"))
+READ_TIMEOUT = float(os.getenv("PODMAN_READ_TIMEOUT", "15"))
+
+# Connections kept open per host; more concurrent calls queue for one
+MAX_CONNECTIONS_PER_HOST = int(os.getenv("PODMAN_MAX_CONNECTIONS_PER_HOST", "20"))
+
+# Idempotent calls are retried on network errors and 5xx
+RETRIES = int(os.getenv("PODMAN_RETRIES", "2"))
+RETRY_BASE_DELAY = float(os.getenv("PODMAN_RETRY_BASE_DELAY", "0.25"))
+
+_loop = None
+_loop_thread = None
+_loop_lock = threading.Lock()
+_clients = {}
+
+
+class PodmanError(Exception):
+    """A libpod call failed; status is None for network errors."""
+
+    def __init__(self, host, message, status=None):
+        super().__init__(f"{host}: {message}")
+        self.host = host
+        self.status = status
+
+
+# ==========================================================
+# Typed Responses
+# ==========================================================
+@dataclass
+class Container:
+    id: str
+    name: str
+    state: str
+    exit_code: int = None
+    exited_at: datetime = None
+
+
+@dataclass
+class ContainerEvent:
+    container_id: str
+    action: str
+    exit_code: int = None
+    time: int = None          # unix seconds, for `since`
+    at: datetime = None       # same instant, naive UTC
+
+
+def _int_or_none(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _utc(timestamp):
+    return datetime.utcfromtimestamp(timestamp).replace(microsecond=0) if timestamp else None
+
+
+def _container(item):
+    return Container(
+        id=item["Id"],
+        name=(item.get("Names") or [item["Id"]])[0].lstrip("/"),
+        state=item.get("State", ""),
+        exit_code=_int_or_none(item.get("ExitCode")),
+        exited_at=_utc(item.get("ExitedAt"))
+    )
+
+
+def _event(item):
+    actor = item.get("Actor") or {}
+    attributes = actor.get("Attributes") or {}
+
+    return ContainerEvent(
+        container_id=actor.get("ID") or item.get("id"),
+        action=item.get("Action") or item.get("status", ""),
+        exit_code=_int_or_none(attributes.get("containerExitCode")),
+        time=item.get("time"),
+        at=_utc(item.get("time"))
+    )
+
+
+# ==========================================================
+# Event Loop (one per process)
+# ==========================================================
+def _get_loop():
+    """Starts the background loop that runs every libpod call."""
+
+    global _loop, _loop_thread
+
+    with _loop_lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+
+            _loop_thread = threading.Thread(
+                target=_loop.run_forever,
+                name="podman-client",
+                daemon=True
+            )
+            _loop_thread.start()
+
+        return _loop
+
+
+def submit(coro):
+    """Schedules a coroutine on the client loop; returns a concurrent Future."""
+
+    return asyncio.run_coroutine_threadsafe(coro, _get_loop())
+
+
+def run(coro, timeout=None):
+    """Runs a coroutine on the client loop and waits for its result."""
+
+    return submit(coro).result(timeout)
+
+
+def _client(host):
+    # Only called on the loop thread, so no lock is needed
+    client = _clients.get(host)
+
+    if client is None:
+        client = httpx.AsyncClient(
+            base_url=f"{host}/{API_VERSION}",
+            verify=False,
+            trust_env=False,
+            timeout=httpx.Timeout(READ_TIMEOUT, connect=CONNECT_TIMEOUT),
+            limits=httpx.Limits(
+                max_connections=MAX_CONNECTIONS_PER_HOST,
+                max_keepalive_connections=MAX_CONNECTIONS_PER_HOST
+            )
+        )
+        _clients[host] = client
+
+    return client
+
+
+async def _request(host, method, path, ok=(200,), retries=None, timeout=None, **kwargs):
+    """
+    One libpod call. Idempotent methods are retried on network errors
+    and 5xx with exponential backoff and full jitter.
+    """
+
+    if retries is None:
+        retries = RETRIES if method in ("GET", "DELETE") else 0
+
+    if timeout is not None:
+        kwargs["timeout"] = httpx.Timeout(timeout, connect=CONNECT_TIMEOUT)
+
+    for attempt in range(retries + 1):
+        try:
+            response = await _client(host).request(method, path, **kwargs)
+
+            if response.status_code in ok:
+                return response
+
+            error = PodmanError(host, f"{method} {path} -> {response.status_code}: {response.text[:300]}",
+                                response.status_code)
+
+            if response.status_code < 500:
+                raise error
+
+        except httpx.HTTPError as e:
+            error = PodmanError(host, f"{method} {path}: {e}")
+
+        if attempt < retries:
+            await asyncio.sleep(random.uniform(0, RETRY_BASE_DELAY * 2 ** attempt))
+
+    raise error
+
+
+# ==========================================================
+# Async API
+# ==========================================================
+async def ping_async(host):
+    try:
+        await _request(host, "GET", "/libpod/_ping", retries=0, timeout=5)
+        return True
+    except PodmanError:
+        return False
+
+
+async def list_containers_async(host, all_containers=False, filters=None):
+    params = {"all": "true" if all_containers else "false"}
+
+    if filters:
+        params["filters"] = json.dumps(filters)
+
+    response = await _request(host, "GET", "/libpod/containers/json", params=params)
+    return [_container(item) for item in response.json()]
+
+
+async def memory_percent_async(host):
+    """Share of host memory used by running containers."""
+
+    response = await _request(host, "GET", "/libpod/containers/stats", params={"stream": "false"})
+    return sum(s.get("MemPerc") or 0 for s in response.json().get("Stats") or [])
+
+
+async def create_container_async(host, config, start=True):
+    """Creates a container and, unless start is False, starts it; returns its ID."""
+
+    response = await _request(host, "POST", "/libpod/containers/create", ok=(201,), json=config)
+    container_id = response.json()["Id"]
+
+    if start:
+        await start_container_async(host, container_id)
+
+    return container_id
+
+
+async def start_container_async(host, container_id):
+    await _request(host, "POST", f"/libpod/containers/{container_id}/start", ok=(204, 304))
+
+
+async def stop_container_async(host, container_id, grace_seconds=10):
+    # 304: already stopped, 404: already removed
+    await _request(
+        host, "POST", f"/libpod/containers/{container_id}/stop",
+        ok=(204, 304, 404),
+        retries=RETRIES,
+        params={"timeout": grace_seconds},
+        timeout=grace_seconds + 15
+    )
+
+
+async def remove_container_async(host, container_id):
+    await _request(host, "DELETE", f"/libpod/containers/{container_id}", ok=(200, 204, 404))
+
+
+async def rename_container_async(host, container_id, name):
+    await _request(host, "POST", f"/libpod/containers/{container_id}/rename",
+                   ok=(204,), params={"name": name})
+
+
+async def events_async(host, filters=None, since=None, idle_timeout=300):
+    """
+    Follows libpod's event stream; yields ContainerEvent. Ends with
+    PodmanError when the stream fails or stays idle for idle_timeout.
+    """
+
+    params = {"stream": "true"}
+
+    if filters:
+        params["filters"] = json.dumps(filters)
+
+    if since:
+        params["since"] = str(since)
+
+    timeout = httpx.Timeout(idle_timeout, connect=CONNECT_TIMEOUT)
+
+    try:
+        async with _client(host).stream("GET", "/libpod/events", params=params, timeout=timeout) as response:
+            if response.status_code != 200:
+                raise PodmanError(host, f"events -> {response.status_code}", response.status_code)
+
+            async for line in response.aiter_lines():
+                if not line:
+                    continue
+
+                try:
+                    yield _event(json.loads(line))
+                except ValueError:
+                    logging.warning(f"Ignoring malformed event from {host}: {line[:200]}")
+
+    except httpx.HTTPError as e:
+        raise PodmanError(host, f"events: {e}")
+
+
+# ==========================================================
+# Blocking API (callers on ordinary threads)
+# ==========================================================
+def ping(host):
+    return run(ping_async(host))
+
+
+def list_containers(host, all_containers=False, filters=None):
+    return run(list_containers_async(host, all_containers, filters))
+
+
+def memory_percent(host):
+    return run(memory_percent_async(host))
+
+
+def create_container(host, config, start=True):
+    return run(create_container_async(host, config, start))
+
+
+def start_container(host, container_id):
+    return run(start_container_async(host, container_id))
+
+
+def stop_container(host, container_id, grace_seconds=10):
+    return run(stop_container_async(host, container_id, grace_seconds))
+
+
+def remove_container(host, container_id):
+    return run(remove_container_async(host, container_id))
+
+
+def rename_container(host, container_id, name):
+    return run(rename_container_async(host, container_id, name))
+
+
+def iter_events(host, filters=None, since=None, idle_timeout=300, stop_event=None):
+    """
+    Blocking iterator over events_async. Setting stop_event ends it
+    within a second, also while waiting for the next event.
+    """
+
+    events = events_async(host, filters, since, idle_timeout)
+    pending = None
+
+    try:
+        while not (stop_event and stop_event.is_set()):
+            pending = submit(events.__anext__())
+
+            while True:
+                try:
+                    event = pending.result(timeout=1)
+                    break
+                except concurrent.futures.TimeoutError:
+                    if stop_event and stop_event.is_set():
+                        # Cancelling the read also closes the stream
+                        pending.cancel()
+                        return
+                except StopAsyncIteration:
+                    return
+
+            pending = None
+            yield event
+
+    finally:
+        if pending is None or pending.done():
+            submit(events.aclose())
+
+
+def close_all():
+    """Closes every host connection pool (shutdown)."""
+
+    async def close():
+        clients = list(_clients.values())
+        _clients.clear()
+
+        for client in clients:
+            await client.aclose()
+
+    if _loop is not None:
+        run(close(), timeout=10)
@@ -3,8 +3,12 @@ import logging
 import json
 from concurrent.futures import ThreadPoolExecutor, as_completed
 
-from ..db_utils import execute_query
-from submitpodreq import runpod
+from ..db_utils import execute_query, transaction
+from .claims import WORKER_ID, claim_executions, release_claims
+from .progress import EXECUTIONS_CHANNEL, notify_progress
+from .sharding import requested_shards, start_sharded_execution
+from .submitpodreq import runpod
+from .testlist import expand_test_list
 
 
 # ==========================================================
@@ -19,13 +23,31 @@ logging.basicConfig(
 # ==========================================================
 # Update Execution Status
 # ==========================================================
-def update_execution_status(execid, status):
+def update_execution_status(execid, status, from_status=None):
+    """
+    Sets the status of an execution this process owns; with from_status
+    only while the row still has that status.
+    """
+
+    status_sql = "AND exec_status = %s" if from_status else ""
+    params = [status, execid, WORKER_ID]
+
+    if from_status:
+        params.append(from_status)
+
     try:
-        updated = execute_query("""
-            UPDATE lumos.executions
-            SET exec_status = %s
-            WHERE rowid = %s
-        """, (status, execid), commit=True)
+        with transaction() as tx:
+            # Skip rows another dispatcher re-claimed after our lease expired
+            updated = tx.execute(f"""
+                UPDATE lumos.executions
+                SET exec_status = %s
+                WHERE rowid = %s
+                  AND (claimed_by IS NULL OR claimed_by = %s)
+                  {status_sql}
+            """, params)
+
+            if updated:
+                notify_progress(tx, execid, exec_status=status)
 
         return updated
 
@@ -35,31 +57,64 @@ def update_execution_status(execid, status):
 
 
 # ==========================================================
-# Fetch Submitted Records
+# Wake the Dispatcher
 # ==========================================================
-def get_submitted_records():
-    try:
-        current_time = datetime.datetime.utcnow()
+def notify_submitted(tx, execid):
+    """
+    Tells the dispatcher a Submitted row exists. Sent inside the
+    inserting transaction, so it is delivered only after the commit.
+    """
+
+    tx.notify(EXECUTIONS_CHANNEL, str(execid))
+
+
+# ==========================================================
+# Allocate an Execution rowid
+# ==========================================================
+def new_execution_rowid(tx, now):
+    """
+    rowid in the executions format (YYYYMMDDHHMMSS) for a row inserted
+    in this transaction. Allocation is serialised by an advisory lock
+    held until commit, so saves, retriggers and the schedulers of every
+    dispatcher never pick the same one. A second already in use gets a
+    _2, _3, ... suffix rather than a later timestamp.
+    """
+
+    base = now.strftime('%Y%m%d%H%M%S')
+
+    tx.execute("SELECT pg_advisory_xact_lock(hashtext('lumos.executions.rowid'))")
 
-        rows = execute_query("""
-            SELECT rowid,
-                   lumos_user,
-                   exec_id,
-                   env_name,
-                   exec_test_list,
-                   browser,
-                   exec_status,
-                   total_count,
-                   pass_count,
-                   fail_count,
-                   frequency,
-                   scheduled_dt,
-                   screen_capture
+    taken = {
+        row[0] for row in tx.fetchall("""
+            SELECT rowid
             FROM lumos.executions
-            WHERE exec_status = 'Submitted'
-              AND scheduled_dt <= %s
-              AND inactiveflag = 'N'
-        """, (current_time,), fetch="all") or []
+            WHERE rowid = %s
+               OR rowid LIKE %s
+        """, (base, base + r"\_%"))
+    }
+
+    rowid = base
+    suffix = 1
+
+    while rowid in taken:
+        suffix += 1
+        rowid = f"{base}_{suffix}"
+
+    return rowid
+
+
+# ==========================================================
+# Claim Submitted Records
+# ==========================================================
+def get_submitted_records(limit=None):
+    """
+    Claims up to `limit` due Submitted executions for this process
+    (see claims.claim_executions), so overlapping runs never get the
+    same row.
+    """
+
+    try:
+        current_time = datetime.datetime.utcnow()
 
         columns = [
             "rowid",
@@ -74,20 +129,75 @@ def get_submitted_records():
             "fail_count",
             "frequency",
             "scheduled_dt",
-            "screen_capture"
+            "screen_capture",
+            "parallel_exec"
         ]
 
-        return [dict(zip(columns, row)) for row in rows]
+        return claim_executions(columns, current_time, limit)
 
     except Exception as e:
-        logging.error(f"Error fetching submitted records: {e}")
+        logging.error(f"Error claiming submitted records: {e}")
         return []
 
 
+def get_next_scheduled_delay():
+    """
+    Seconds until the earliest Submitted execution scheduled in the
+    future becomes due, or None when there is none.
+    """
+
+    try:
+        current_time = datetime.datetime.utcnow()
+
+        row = execute_query("""
+            SELECT MIN(scheduled_dt)
+            FROM lumos.executions
+            WHERE exec_status = 'Submitted'
+              AND scheduled_dt > %s
+              AND inactiveflag = 'N'
+        """, (current_time,), fetch="one")
+
+        if not row or row[0] is None:
+            return None
+
+        return max((row[0] - current_time).total_seconds(), 0)
+
+    except Exception as e:
+        logging.error(f"Error fetching next scheduled execution: {e}")
+        return None
+
+
+# ==========================================================
+# Resolve the Test List
+# ==========================================================
+def resolve_test_list(execid, exec_test_list):
+    """
+    Expands packs into a concrete, de-duplicated testcase list and
+    stores it with the execution together with the exact total_count.
+    """
+
+    tests = expand_test_list(exec_test_list)
+
+    execute_query("""
+        UPDATE lumos.executions
+        SET resolved_test_list = %s,
+            total_count = %s
+        WHERE rowid = %s
+    """, (",".join(tests), len(tests), execid), commit=True)
+
+    return tests
+
+
 # ==========================================================
 # Process Single Execution Row
 # ==========================================================
-def process_row(row):
+def process_row(row, release_on_wait=True):
+    """
+    Starts one claimed execution; returns the runpod result (container
+    id or reason). With release_on_wait the claim goes back to the
+    queue when every host is full.
+    """
+
     try:
         logging.info(f"Processing execution: {row.get('rowid')}")
 
@@ -98,25 +208,41 @@ def process_row(row):
         screencapture = row.get("screen_capture")
         freq = row.get("frequency")
 
-        exec_test_list = row.get("exec_test_list", "")
+        tests = resolve_test_list(execid, row.get("exec_test_list", ""))
+
+        if not tests:
+            logging.error(f"Execution {execid} has no testcases to run")
+            update_execution_status(execid, "Failed")
+            return None
+
+        shards = requested_shards(row.get("parallel_exec"))
 
-        # Normalize test list
-        test_list = exec_test_list.replace(".tp", ".testpack").replace(".tc", "")
-        test_list = ",".join([s.strip() for s in test_list.split(",") if s.strip()])
+        # parallel_exec: one container per shard of the resolved test list
+        if shards > 1 and len(tests) > 1:
+            result = start_sharded_execution(row, tests, shards)
+        else:
+            result = runpod(env, ",".join(tests), user, browser, screencapture, execid, freq)
 
-        # Run pod
-        result = runpod(env, test_list, user, browser, screencapture, execid, freq)
+        if result == "Nocapacity":
+            # Every eligible host is full; back to Submitted for the next pass
+            logging.info(f"Execution {execid} waiting for a free Podman slot")
 
-        if result == "Nohostfound":
+            if release_on_wait:
+                release_claims([execid])
+        elif result == "Nohostfound":
             logging.error(f"Error processing execution {execid}: Host not found")
             update_execution_status(execid, "Failed")
         else:
-            update_execution_status(execid, "Started")
+            # A container that already exited was finished by the reaper
+            update_execution_status(execid, "Started", from_status="Claimed")
             logging.info(f"Execution {execid} started successfully")
 
+        return result
+
     except Exception as e:
         logging.error(f"Exception while processing execution {row.get('rowid')}: {e}")
         update_execution_status(row.get("rowid"), "Failed")
+        return None
 
 
 # ==========================================================
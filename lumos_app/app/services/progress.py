@@ -0,0 +1,209 @@
+import json
+import logging
+import os
+import queue
+import select
+import threading
+
+import psycopg2
+
+from ..config import load_db_config
+
+
+# ==========================================================
+# Configuration
+# ==========================================================
+# Progress notifications for live views; payload must stay under 8000 bytes
+PROGRESS_CHANNEL = "lumos_progress"
+PROGRESS_PAYLOAD_LIMIT = 7000
+
+# Submitted executions are announced here (see processsubmit.notify_submitted)
+EXECUTIONS_CHANNEL = "lumos_executions"
+
+# Events buffered per subscriber; a slow browser loses the oldest ones
+SUBSCRIBER_QUEUE_SIZE = int(os.getenv("PROGRESS_SUBSCRIBER_QUEUE_SIZE", "200"))
+
+# Open streams per worker process. Under a threaded WSGI server every
+# stream holds a request thread, so keep this well below the thread
+# count; raise it when streams are served by gevent (see README).
+MAX_SUBSCRIBERS = int(os.getenv("PROGRESS_MAX_SUBSCRIBERS", "8"))
+
+LISTEN_RECONNECT = 5
+
+ALL_EXECUTIONS = "*"
+
+_lock = threading.Lock()
+_subscribers = {}    # execid or ALL_EXECUTIONS -> set of queues
+_listener_thread = None
+_stop_event = threading.Event()
+
+
+# ==========================================================
+# Publish (inside the writing transaction)
+# ==========================================================
+def notify_progress(tx, execid, **fields):
+    """
+    Sends a progress event for one execution. Delivered on commit, so
+    subscribers never see a change that was rolled back.
+    """
+
+    payload = json.dumps({"execid": str(execid), **fields}, default=str)
+
+    if len(payload) > PROGRESS_PAYLOAD_LIMIT:
+        logging.warning(f"Progress event for {execid} too large, sending counters only")
+        fields.pop("results", None)
+        payload = json.dumps({"execid": str(execid), **fields, "truncated": True}, default=str)
+
+    tx.notify(PROGRESS_CHANNEL, payload)
+
+
+# ==========================================================
+# Subscribe (one listener per worker process)
+# ==========================================================
+def subscribe(execid=ALL_EXECUTIONS):
+    """
+    Queue receiving progress events for one execution (or all), or
+    None when this process already serves MAX_SUBSCRIBERS streams.
+    """
+
+    events = queue.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+
+    with _lock:
+        if sum(len(s) for s in _subscribers.values()) >= MAX_SUBSCRIBERS:
+            return None
+
+        _subscribers.setdefault(str(execid), set()).add(events)
+
+    _ensure_listener()
+    return events
+
+
+def unsubscribe(execid, events):
+    with _lock:
+        subscribers = _subscribers.get(str(execid))
+
+        if subscribers:
+            subscribers.discard(events)
+
+            if not subscribers:
+                del _subscribers[str(execid)]
+
+
+def subscriber_count():
+    with _lock:
+        return sum(len(s) for s in _subscribers.values())
+
+
+def _offer(events, event):
+    try:
+        events.put_nowait(event)
+    except queue.Full:
+        try:
+            events.get_nowait()
+        except queue.Empty:
+            pass
+
+        try:
+            events.put_nowait(event)
+        except queue.Full:
+            pass
+
+
+def publish(event):
+    """Hands one decoded event to every subscriber of its execution."""
+
+    execid = str(event.get("execid", ""))
+
+    with _lock:
+        if execid == ALL_EXECUTIONS:
+            targets = [events for subscribers in _subscribers.values() for events in subscribers]
+        else:
+            targets = list(_subscribers.get(execid, ())) + list(_subscribers.get(ALL_EXECUTIONS, ()))
+
+    for events in targets:
+        _offer(events, event)
+
+
+def _decode(notify):
+    if notify.channel == EXECUTIONS_CHANNEL:
+        return {"execid": notify.payload, "exec_status": "Submitted"}
+
+    try:
+        event = json.loads(notify.payload)
+    except ValueError:
+        logging.warning(f"Ignoring malformed progress event: {notify.payload[:200]}")
+        return None
+
+    return event if isinstance(event, dict) and event.get("execid") else None
+
+
+def _listen_loop():
+    """
+    Holds one dedicated autocommit connection on LISTEN for this
+    process and fans notifications out to the subscriber queues.
+    Reconnects on failure.
+    """
+
+    while not _stop_event.is_set():
+        conn = None
+
+        try:
+            conn = psycopg2.connect(**load_db_config())
+            conn.autocommit = True
+            conn.cursor().execute(f"LISTEN {PROGRESS_CHANNEL}; LISTEN {EXECUTIONS_CHANNEL}")
+
+            logging.info(f"Progress listener on {PROGRESS_CHANNEL}, {EXECUTIONS_CHANNEL}")
+
+            # Subscribers re-read state after a gap instead of trusting the stream
+            publish({"execid": ALL_EXECUTIONS, "resync": True})
+
+            while not _stop_event.is_set():
+                if select.select([conn], [], [], 1) == ([], [], []):
+                    continue
+
+                conn.poll()
+
+                notifies = list(conn.notifies)
+                conn.notifies.clear()
+
+                for notify in notifies:
+                    event = _decode(notify)
+
+                    if event:
+                        publish(event)
+
+        except Exception as e:
+            logging.error(f"Progress listener failed: {e}")
+            _stop_event.wait(LISTEN_RECONNECT)
+
+        finally:
+            if conn is not None:
+                conn.close()
+
+
+def _ensure_listener():
+    global _listener_thread
+
+    with _lock:
+        if _listener_thread and _listener_thread.is_alive():
+            return
+
+        _stop_event.clear()
+
+        _listener_thread = threading.Thread(
+            target=_listen_loop,
+            name="progress-listener",
+            daemon=True
+        )
+        _listener_thread.start()
+
+
+def stop_progress_listener(timeout=5):
+    global _listener_thread
+
+    if not _listener_thread:
+        return
+
+    _stop_event.set()
+    _listener_thread.join(timeout)
+    _listener_thread = None
@@ -0,0 +1,307 @@
+import logging
+import os
+import threading
+import time
+
+from ..db_utils import transaction
+from . import hostregistry, ledger, podman_client
+from .progress import notify_progress
+from .sharding import merge_shard_results
+
+
+# ==========================================================
+# Configuration
+# ==========================================================
+# The events stream is silent while nothing happens; reconnect (with
+# `since`, so nothing is missed) after this long without an event
+IDLE_RECONNECT = float(os.getenv("REAPER_IDLE_RECONNECT_SECONDS", "300"))
+RECONNECT_DELAY = float(os.getenv("REAPER_RECONNECT_SECONDS", "5"))
+
+# Remove harvested containers (they are no longer started with --rm)
+REMOVE_EXITED = os.getenv("REAPER_REMOVE_EXITED", "Y") == "Y"
+
+# Exits of containers the ledger does not know yet (launch not recorded
+# yet, another dispatcher's batch not written yet) are retried this long
+UNKNOWN_EXIT_RETRY = float(os.getenv("REAPER_UNKNOWN_EXIT_RETRY_SECONDS", "120"))
+RETRY_INTERVAL = float(os.getenv("REAPER_RETRY_SECONDS", "5"))
+
+# Open ledger entries are checked against podman this often, for exits
+# no event or retry caught
+RECONCILE_INTERVAL = float(os.getenv("REAPER_RECONCILE_SECONDS", "300"))
+
+_stop_event = threading.Event()
+_threads = {}
+_on_exit = None
+
+_lock = threading.Lock()
+_unknown = {}    # container_id -> (host, exit_code, finished_at, give_up_at)
+_retry_thread = None
+
+
+# ==========================================================
+# Handle One Exit
+# ==========================================================
+def _final_status(exit_code):
+    return "Completed" if exit_code == 0 else "Failed"
+
+
+def finish_execution(entry):
+    """
+    Moves the execution (or its shard) of an exited container on.
+    A single container decides the execution's status; a shard only
+    its own, and the merge completes the execution with the last one.
+    """
+
+    execid = entry["execid"]
+    status = _final_status(entry["exit_code"])
+    seconds = (entry["finished_at"] - entry["started_at"]).total_seconds()
+
+    if entry["shard_no"] is not None:
+        with transaction() as tx:
+            tx.execute("""
+                UPDATE lumos.execution_shards
+                SET status = %s,
+                    finished_at = %s
+                WHERE execid = %s
+                  AND shard_no = %s
+                  AND status IN ('Launching', 'Started')
+            """, (status, entry["finished_at"], execid, entry["shard_no"]))
+
+        merge_shard_results(execid)
+        return
+
+    with transaction() as tx:
+        # Stopped / already Completed executions keep their status. A
+        # container that exits before process_row marks its execution
+        # Started finds it still Claimed; process_row then leaves it.
+        updated = tx.execute("""
+            UPDATE lumos.executions
+            SET exec_status = %s
+            WHERE rowid = %s
+              AND exec_status IN ('Claimed', 'Started')
+        """, (status, execid))
+
+        if updated:
+            notify_progress(
+                tx, execid,
+                exec_status=status,
+                exit_code=entry["exit_code"],
+                duration_seconds=round(seconds)
+            )
+
+
+def remove_container(host, container_id):
+    try:
+        podman_client.remove_container(host, container_id)
+    except Exception as e:
+        logging.warning(f"Could not remove {container_id} on {host}: {e}")
+
+
+def reap(host, container_id, exit_code, finished_at=None, retry=True):
+    """
+    Records one container exit: ledger, capacity, execution status.
+    Returns False for containers Lumos did not launch or exits already
+    recorded, so replayed events are harmless. With retry, exits of
+    containers the ledger does not know are kept for a later attempt.
+    """
+
+    entry = ledger.record_exit(container_id, exit_code, finished_at)
+
+    if not entry:
+        if retry and ledger.find_container(container_id) is None:
+            with _lock:
+                _unknown.setdefault(
+                    container_id,
+                    (host, exit_code, finished_at, time.monotonic() + UNKNOWN_EXIT_RETRY)
+                )
+
+        return False
+
+    with _lock:
+        _unknown.pop(container_id, None)
+
+    # Free the slot now instead of at the next registry poll
+    hostregistry.release_placement(host)
+
+    logging.info(
+        f"Container {entry['container_name']} on {host} exited with {exit_code} "
+        f"after {(entry['finished_at'] - entry['started_at']).total_seconds():.0f}s"
+    )
+
+    try:
+        finish_execution(entry)
+    except Exception as e:
+        logging.error(f"Could not finish execution {entry['execid']}: {e}")
+
+    if REMOVE_EXITED:
+        remove_container(host, container_id)
+
+    if _on_exit:
+        _on_exit(entry)
+
+    return True
+
+
+# ==========================================================
+# Catch Up and Follow Events
+# ==========================================================
+def reconcile_host(host):
+    """
+    Harvests containers of this host that exited while no stream was
+    connected (reaper restart, network gap) or whose exit came before
+    their launch was known. Open entries are re-read from the table, so
+    launches of other dispatchers are covered too.
+    """
+
+    ledger.load_open_entries(host)
+    open_ids = {entry["container_id"] for entry in ledger.open_containers(host)}
+
+    if not open_ids:
+        return 0
+
+    exited = podman_client.list_containers(host, all_containers=True, filters={"status": ["exited"]})
+
+    return sum(
+        reap(host, container.id, container.exit_code, container.exited_at, retry=False)
+        for container in exited
+        if container.id in open_ids
+    )
+
+
+def retry_unknown_exits():
+    """Retries exits that arrived before their launch was in the ledger."""
+
+    now = time.monotonic()
+
+    with _lock:
+        pending = list(_unknown.items())
+
+        for container_id, (_, _, _, give_up_at) in pending:
+            if give_up_at <= now:
+                del _unknown[container_id]
+
+    for container_id, (host, exit_code, finished_at, give_up_at) in pending:
+        if give_up_at > now:
+            reap(host, container_id, exit_code, finished_at, retry=False)
+
+
+def _retry_loop(hosts):
+    next_reconcile = time.monotonic() + RECONCILE_INTERVAL
+
+    while not _stop_event.wait(RETRY_INTERVAL):
+        try:
+            retry_unknown_exits()
+        except Exception as e:
+            logging.error(f"Retrying unknown container exits failed: {e}")
+
+        if time.monotonic() < next_reconcile:
+            continue
+
+        next_reconcile = time.monotonic() + RECONCILE_INTERVAL
+
+        for host in hosts:
+            if hostregistry.is_circuit_open(host):
+                continue
+
+            try:
+                reconcile_host(host)
+            except Exception as e:
+                logging.error(f"Reconciling containers of {host} failed: {e}")
+
+
+def follow_events(host, since=None):
+    """
+    One streaming connection to libpod's events endpoint, filtered to
+    container deaths. Returns the time of the last event seen.
+    """
+
+    events = podman_client.iter_events(
+        host,
+        filters={"type": ["container"], "event": ["died"]},
+        since=since,
+        idle_timeout=IDLE_RECONNECT,
+        stop_event=_stop_event
+    )
+
+    for event in events:
+        if event.container_id:
+            reap(host, event.container_id, event.exit_code, event.at)
+
+        since = event.time or since
+
+    return since
+
+
+def _reap_loop(host):
+    since = None
+
+    while not _stop_event.is_set():
+        try:
+            # Nothing to resume from -> look for exits we never saw
+            if since is None:
+                started = int(time.time())
+                reconcile_host(host)
+                since = started
+
+            since = follow_events(host, since)
+
+        except Exception as e:
+            if _stop_event.is_set():
+                break
+
+            # Idle read timeouts land here too; replayed exits are ignored
+            logging.info(f"Events stream of {host} ended, resuming: {e}")
+            _stop_event.wait(RECONNECT_DELAY)
+
+
+def start_reaper(hosts, on_exit=None):
+    """
+    Follows container exits on every host, one streaming connection per
+    host, plus one thread retrying early exits and reconciling open
+    ledger entries. on_exit(entry) is called after each harvested exit.
+    Safe to call more than once.
+    """
+
+    global _on_exit, _retry_thread
+
+    _on_exit = on_exit
+    _stop_event.clear()
+
+    if not (_retry_thread and _retry_thread.is_alive()):
+        _retry_thread = threading.Thread(
+            target=_retry_loop,
+            args=(list(hosts),),
+            name="reaper-retry",
+            daemon=True
+        )
+        _retry_thread.start()
+
+    for host in hosts:
+        thread = _threads.get(host)
+
+        if thread and thread.is_alive():
+            continue
+
+        _threads[host] = threading.Thread(
+            target=_reap_loop,
+            args=(host,),
+            name=f"reaper-{host}",
+            daemon=True
+        )
+        _threads[host].start()
+
+
+def stop_reaper(timeout=5):
+    global _retry_thread
+
+    # Streams notice within a second, also while waiting for an event
+    _stop_event.set()
+
+    for thread in _threads.values():
+        thread.join(timeout)
+
+    _threads.clear()
+
+    if _retry_thread:
+        _retry_thread.join(timeout)
+        _retry_thread = None
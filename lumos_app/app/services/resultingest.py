@@ -0,0 +1,266 @@
+import json
+import logging
+import os
+import threading
+import uuid
+from datetime import datetime, timezone
+
+from ..db_utils import transaction
+from .progress import PROGRESS_CHANNEL, PROGRESS_PAYLOAD_LIMIT
+
+
+# ==========================================================
+# Configuration
+# ==========================================================
+FLASK_ENV = os.getenv("FLASK_ENV", "DEV")
+
+# Containers drop result batches here (write *.tmp, then rename to *.json)
+RESULT_SPOOL_DIR = os.getenv("RESULT_SPOOL_DIR", f"/appfs/{FLASK_ENV}/results_spool")
+SPOOL_POLL_INTERVAL = float(os.getenv("RESULT_SPOOL_POLL_SECONDS", "2"))
+
+MAX_BATCH_ROWS = 1000
+
+_stop_event = threading.Event()
+_collector_thread = None
+
+
+# ==========================================================
+# Validate a Batch
+# ==========================================================
+def parse_batch(payload):
+    """
+    {"execid": ..., "batch_id": optional, "results": [{"testcasename",
+    "status", "exec_time", "exec_date" (optional, ISO)}, ...]}
+    -> (execid, batch_id, rows). Raises ValueError on bad input.
+    """
+
+    if not isinstance(payload, dict):
+        raise ValueError("Batch must be a JSON object")
+
+    execid = str(payload.get("execid") or "").strip()
+    results = payload.get("results")
+
+    if not execid:
+        raise ValueError("execid is required")
+
+    if not isinstance(results, list) or not results:
+        raise ValueError("results must be a non-empty list")
+
+    if len(results) > MAX_BATCH_ROWS:
+        raise ValueError(f"At most {MAX_BATCH_ROWS} results per batch")
+
+    rows = []
+
+    for result in results:
+        if not isinstance(result, dict) or not result.get("testcasename") or not result.get("status"):
+            raise ValueError("Every result needs testcasename and status")
+
+        exec_date = result.get("exec_date")
+
+        try:
+            exec_date = datetime.fromisoformat(exec_date) if exec_date else datetime.utcnow()
+        except (TypeError, ValueError):
+            raise ValueError(f"Invalid exec_date: {exec_date}")
+
+        # exec_details holds naive UTC timestamps
+        if exec_date.tzinfo:
+            exec_date = exec_date.astimezone(timezone.utc).replace(tzinfo=None)
+
+        rows.append((
+            execid,
+            exec_date.replace(microsecond=0),
+            str(result["testcasename"]),
+            str(result["status"]),
+            result.get("exec_time")
+        ))
+
+    batch_id = str(payload.get("batch_id") or uuid.uuid4())
+
+    return execid, batch_id, rows
+
+
+# ==========================================================
+# Ingest a Batch
+# ==========================================================
+def progress_payload(execid, counters, rows):
+    """
+    NOTIFY payload for live views: counters plus as many of the new
+    rows as fit the notification size limit.
+    """
+
+    payload = {"execid": execid, **counters, "results": []}
+
+    for _, exec_date, testcasename, status, exec_time in rows:
+        payload["results"].append({
+            "testcasename": testcasename,
+            "status": status,
+            "exec_time": exec_time,
+            "exec_date": exec_date.strftime('%Y-%m-%d %H:%M:%S GMT')
+        })
+
+        if len(json.dumps(payload, default=str)) > PROGRESS_PAYLOAD_LIMIT:
+            payload["results"].pop()
+            payload["truncated"] = True
+            break
+
+    return json.dumps(payload, default=str)
+
+
+def ingest_results(execid, batch_id, rows):
+    """
+    Writes one batch: a single multi-row INSERT into exec_details and a
+    single UPDATE of the execution's counters, in one transaction.
+    Counters are the latest result per test (as in the shard merge), so
+    retried tests count once. Only an unsharded execution is completed
+    here, once every test has reported; sharded ones are finished by
+    merge_shard_results. Returns the counters, or None when the batch
+    was already applied.
+    """
+
+    with transaction() as tx:
+        # Serialises batches of one execution, so each recount sees the
+        # rows of every batch committed before it
+        found = tx.fetchone("""
+            SELECT 1
+            FROM lumos.executions
+            WHERE rowid = %s
+            FOR UPDATE
+        """, (execid,))
+
+        if not found:
+            raise ValueError(f"Execution {execid} not found")
+
+        first_time = tx.execute("""
+            INSERT INTO lumos.result_batches (batch_id, execid, row_count)
+            VALUES (%s, %s, %s)
+            ON CONFLICT (batch_id) DO NOTHING
+        """, (batch_id, execid, len(rows)))
+
+        if not first_time:
+            logging.info(f"Result batch {batch_id} for {execid} already ingested")
+            return None
+
+        tx.execute_values("""
+            INSERT INTO lumos.exec_details
+            (exec_id, exec_date, testcasename, status, exec_time)
+            VALUES %s
+        """, rows)
+
+        counters = tx.fetchone("""
+            WITH latest AS (
+                SELECT DISTINCT ON (testcasename) status
+                FROM lumos.exec_details
+                WHERE exec_id = %s
+                ORDER BY testcasename, exec_date DESC
+            )
+            UPDATE lumos.executions
+            SET pass_count = (SELECT COUNT(*) FROM latest WHERE status ILIKE 'pass%%'),
+                fail_count = (SELECT COUNT(*) FROM latest WHERE status ILIKE 'fail%%'),
+                exec_status = CASE
+                    WHEN exec_status = 'Started'
+                     AND total_count > 0
+                     AND (SELECT COUNT(*) FROM latest) >= total_count
+                     AND NOT EXISTS (
+                         SELECT 1
+                         FROM lumos.execution_shards
+                         WHERE execid = %s
+                     )
+                    THEN 'Completed'
+                    ELSE exec_status
+                END
+            WHERE rowid = %s
+            RETURNING exec_status, pass_count, fail_count, total_count
+        """, (execid, execid, execid), as_="dict")
+
+        tx.notify(PROGRESS_CHANNEL, progress_payload(execid, counters, rows))
+
+    return counters
+
+
+# ==========================================================
+# Spool Collector
+# ==========================================================
+def _move(path, folder):
+    target_dir = os.path.join(RESULT_SPOOL_DIR, folder)
+    os.makedirs(target_dir, exist_ok=True)
+    os.replace(path, os.path.join(target_dir, os.path.basename(path)))
+
+
+def drain_spool():
+    """
+    Ingests every *.json batch in the spool directory, oldest first.
+    Unless the batch names one, its batch_id is "<execid>/<file name>",
+    so a file drained twice is applied once and executions writing the
+    same file name never collide. Returns the number of files handled.
+    """
+
+    try:
+        names = [n for n in os.listdir(RESULT_SPOOL_DIR) if n.endswith(".json")]
+    except FileNotFoundError:
+        return 0
+
+    paths = sorted(
+        (os.path.join(RESULT_SPOOL_DIR, name) for name in names),
+        key=os.path.getmtime
+    )
+
+    for path in paths:
+        try:
+            with open(path) as f:
+                payload = json.load(f)
+
+            if isinstance(payload, dict):
+                payload.setdefault("batch_id", f"{payload.get('execid')}/{os.path.basename(path)}")
+
+            ingest_results(*parse_batch(payload))
+            os.remove(path)
+
+        except (ValueError, json.JSONDecodeError) as e:
+            logging.error(f"Rejected result batch {path}: {e}")
+            _move(path, "failed")
+
+        except Exception as e:
+            # DB trouble: leave the file for the next pass
+            logging.error(f"Could not ingest result batch {path}: {e}")
+            break
+
+    return len(paths)
+
+
+def _collect_loop():
+    while not _stop_event.is_set():
+        try:
+            drain_spool()
+        except Exception as e:
+            logging.error(f"Result spool drain failed: {e}")
+
+        _stop_event.wait(SPOOL_POLL_INTERVAL)
+
+
+def start_spool_collector():
+    """Starts draining RESULT_SPOOL_DIR in the background. Safe to call more than once."""
+
+    global _collector_thread
+
+    if _collector_thread and _collector_thread.is_alive():
+        return
+
+    _stop_event.clear()
+
+    _collector_thread = threading.Thread(
+        target=_collect_loop,
+        name="result-spool-collector",
+        daemon=True
+    )
+    _collector_thread.start()
+
+
+def stop_spool_collector(timeout=10):
+    global _collector_thread
+
+    if not _collector_thread:
+        return
+
+    _stop_event.set()
+    _collector_thread.join(timeout)
+    _collector_thread = None
@@ -34,6 +34,7 @@ def runpod(env, test_list, user, browser, screencapture, execid, frequency):
             "run",
             "-d",                        # detached mode
             "--rm",                       # remove container after exit
+            "--name", str(execid),        # name the stop search looks for
             "-v", "/appfs:/appfs",        # bind mount
             IMAGE_NAME,
             "sh",
@@ -0,0 +1,281 @@
+import heapq
+import logging
+import math
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+
+from ..db_utils import transaction
+from .testlist import exec_time_seconds
+
+
+# ==========================================================
+# Configuration
+# ==========================================================
+EWMA_ALPHA = float(os.getenv("RUNTIME_EWMA_ALPHA", "0.3"))
+RECENT_WINDOW = int(os.getenv("RUNTIME_RECENT_WINDOW", "50"))
+
+# Duration assumed for a test without history
+DEFAULT_TEST_SECONDS = float(os.getenv("RUNTIME_DEFAULT_TEST_SECONDS", "120"))
+
+# Estimates read by other processes are reloaded after this long
+CACHE_TTL = int(os.getenv("RUNTIME_CACHE_TTL_SECONDS", "300"))
+
+REFRESH_BATCH = 5000
+
+_lock = threading.Lock()
+_cache = {}
+
+
+# ==========================================================
+# Statistics
+# ==========================================================
+def percentile(values, q):
+    """Nearest-rank percentile of a non-empty list."""
+
+    ordered = sorted(values)
+    return ordered[max(math.ceil(q * len(ordered)) - 1, 0)]
+
+
+def apply_samples(current, samples):
+    """
+    Folds new durations (oldest first) into a stats dict
+    {"ewma", "p90", "samples", "recent"}; current may be None.
+    """
+
+    ewma = current["ewma"] if current else None
+    recent = list(current["recent"]) if current else []
+    count = current["samples"] if current else 0
+
+    for seconds in samples:
+        ewma = seconds if ewma is None else EWMA_ALPHA * seconds + (1 - EWMA_ALPHA) * ewma
+        recent.append(seconds)
+        count += 1
+
+    recent = recent[-RECENT_WINDOW:]
+
+    return {
+        "ewma": ewma,
+        "p90": percentile(recent, 0.9),
+        "samples": count,
+        "recent": recent
+    }
+
+
+def _row_stats(row):
+    return {
+        "ewma": float(row["ewma_seconds"]),
+        "p90": float(row["p90_seconds"]),
+        "samples": row["sample_count"],
+        "recent": [float(v) for v in row["recent_seconds"]]
+    }
+
+
+# ==========================================================
+# Incremental Update
+# ==========================================================
+def record_samples(tx, samples):
+    """
+    Folds [(testcasename, exec_date, seconds)] into lumos.test_runtime_stats
+    inside the caller's transaction and returns the updated stats.
+    """
+
+    by_test = {}
+
+    for testcasename, exec_date, seconds in sorted(samples, key=lambda s: s[1]):
+        entry = by_test.setdefault(testcasename, {"seconds": [], "last": exec_date})
+        entry["seconds"].append(seconds)
+        entry["last"] = exec_date
+
+    if not by_test:
+        return {}
+
+    rows = tx.fetchall("""
+        SELECT testcasename, ewma_seconds, p90_seconds, sample_count, recent_seconds
+        FROM lumos.test_runtime_stats
+        WHERE testcasename = ANY(%s)
+        FOR UPDATE
+    """, (list(by_test),), as_="dict")
+
+    existing = {row["testcasename"]: _row_stats(row) for row in rows}
+    updated = {}
+
+    for name, entry in by_test.items():
+        updated[name] = apply_samples(existing.get(name), entry["seconds"])
+
+    tx.execute_values("""
+        INSERT INTO lumos.test_runtime_stats
+        (testcasename, ewma_seconds, p90_seconds, sample_count,
+         recent_seconds, last_exec_date, updated_at)
+        VALUES %s
+        ON CONFLICT (testcasename) DO UPDATE
+        SET ewma_seconds = EXCLUDED.ewma_seconds,
+            p90_seconds = EXCLUDED.p90_seconds,
+            sample_count = EXCLUDED.sample_count,
+            recent_seconds = EXCLUDED.recent_seconds,
+            last_exec_date = GREATEST(lumos.test_runtime_stats.last_exec_date,
+                                      EXCLUDED.last_exec_date),
+            updated_at = EXCLUDED.updated_at
+    """, [
+        (name, round(stats["ewma"], 3), round(stats["p90"], 3), stats["samples"],
+         [round(v, 3) for v in stats["recent"]], by_test[name]["last"])
+        for name, stats in updated.items()
+    ], template="(%s, %s, %s, %s, %s::numeric[], %s, CURRENT_TIMESTAMP)")
+
+    return updated
+
+
+def _remember(stats):
+    now = time.monotonic()
+
+    with _lock:
+        for name, entry in stats.items():
+            _cache[name] = dict(entry, loaded_at=now)
+
+
+def refresh_runtime_stats(batch=REFRESH_BATCH):
+    """
+    Folds exec_details rows not yet counted into the estimates and marks
+    them counted in the same transaction, so every committed result is
+    applied once whatever its exec_date or commit order. One process at
+    a time (advisory lock); returns the number of results applied.
+    """
+
+    with transaction() as tx:
+        if not tx.fetchval("SELECT pg_try_advisory_xact_lock(hashtext('lumos.test_runtime_stats'))"):
+            return 0
+
+        # Rows without a usable exec_time are marked too, so they are
+        # not read again
+        rows = tx.fetchall("""
+            WITH picked AS (
+                SELECT ctid
+                FROM lumos.exec_details
+                WHERE NOT runtime_counted
+                ORDER BY exec_date
+                LIMIT %s
+                FOR UPDATE
+            )
+            UPDATE lumos.exec_details d
+            SET runtime_counted = TRUE
+            FROM picked
+            WHERE d.ctid = picked.ctid
+            RETURNING d.testcasename, d.exec_date, d.exec_time
+        """, (batch,))
+
+        samples = []
+
+        for testcasename, exec_date, exec_time in rows:
+            if not testcasename or exec_time is None:
+                continue
+
+            seconds = exec_time_seconds(exec_time)
+
+            if seconds is not None and seconds >= 0:
+                samples.append((testcasename, exec_date, seconds))
+
+        updated = record_samples(tx, samples)
+
+    _remember(updated)
+
+    if samples:
+        logging.info(f"Runtime stats: {len(samples)} results folded into {len(updated)} tests")
+
+    return len(samples)
+
+
+# ==========================================================
+# Read Estimates
+# ==========================================================
+def get_estimates(tests):
+    """{testcasename: {"ewma", "p90", "samples"}} for tests with history."""
+
+    now = time.monotonic()
+
+    with _lock:
+        missing = [
+            name for name in tests
+            if name not in _cache or now - _cache[name]["loaded_at"] >= CACHE_TTL
+        ]
+
+    if missing:
+        with transaction(readonly=True) as tx:
+            rows = tx.fetchall("""
+                SELECT testcasename, ewma_seconds, p90_seconds, sample_count, recent_seconds
+                FROM lumos.test_runtime_stats
+                WHERE testcasename = ANY(%s)
+            """, (missing,), as_="dict")
+
+        found = {row["testcasename"]: _row_stats(row) for row in rows}
+
+        # Remember tests without history too, so they are not re-queried
+        _remember({name: found.get(name, {"ewma": None}) for name in missing})
+
+    with _lock:
+        return {
+            name: {key: _cache[name][key] for key in ("ewma", "p90", "samples")}
+            for name in tests if name in _cache and _cache[name]["ewma"] is not None
+        }
+
+
+def duration(estimates, test, measure="ewma"):
+    entry = estimates.get(test)
+    return entry[measure] if entry else DEFAULT_TEST_SECONDS
+
+
+# ==========================================================
+# Ordering, Bin Packing, Completion Estimates
+# ==========================================================
+def order_lpt(tests, estimates=None, measure="ewma"):
+    """Tests longest first (longest-processing-time order)."""
+
+    estimates = get_estimates(tests) if estimates is None else estimates
+    return sorted(tests, key=lambda t: duration(estimates, t, measure), reverse=True)
+
+
+def bin_pack(tests, bins, estimates=None, measure="ewma"):
+    """
+    LPT bin packing: each test, longest first, goes to the bin with the
+    least estimated time so far. Returns [(tests, seconds)] without
+    empty bins.
+    """
+
+    estimates = get_estimates(tests) if estimates is None else estimates
+    bins = max(1, min(bins, len(tests)))
+
+    packed = [[] for _ in range(bins)]
+    loads = [0.0] * bins
+    heap = [(0.0, n) for n in range(bins)]
+
+    for test in order_lpt(tests, estimates, measure):
+        _, n = heapq.heappop(heap)
+
+        packed[n].append(test)
+        loads[n] += duration(estimates, test, measure)
+        heapq.heappush(heap, (loads[n], n))
+
+    return [(shard, load) for shard, load in zip(packed, loads) if shard]
+
+
+def estimate_completion(tests, containers=1, start=None):
+    """
+    Expected (EWMA) and pessimistic (p90) run time of `tests` packed
+    onto `containers`, and the matching completion times from `start`.
+    """
+
+    start = start or datetime.utcnow()
+    estimates = get_estimates(tests)
+
+    expected = max((load for _, load in bin_pack(tests, containers, estimates, "ewma")), default=0)
+    pessimistic = max((load for _, load in bin_pack(tests, containers, estimates, "p90")), default=0)
+
+    return {
+        "tests": len(tests),
+        "containers": max(1, min(containers, len(tests))) if tests else 0,
+        "tests_without_history": len([t for t in tests if t not in estimates]),
+        "expected_seconds": round(expected),
+        "p90_seconds": round(pessimistic),
+        "expected_completion": start + timedelta(seconds=expected),
+        "p90_completion": start + timedelta(seconds=pessimistic)
+    }
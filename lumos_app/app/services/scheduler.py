@@ -0,0 +1,304 @@
+import calendar
+import heapq
+import logging
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+
+from ..db_utils import transaction
+from .processsubmit import new_execution_rowid, notify_submitted
+
+
+# ==========================================================
+# Configuration
+# ==========================================================
+# Python and SQL forms of the same step; Monthly clamps to the month end
+# in both (Jan 31 -> Feb 28), as PostgreSQL's '1 month' does.
+FREQUENCIES = {
+    "Hourly": "1 hour",
+    "Daily": "1 day",
+    "Weekly": "7 days",
+    "Monthly": "1 month"
+}
+
+RELOAD_INTERVAL = float(os.getenv("SCHEDULER_RELOAD_SECONDS", "60"))
+
+# Occurrences later than this are catch-up: missed ones are coalesced
+# into a single run and the run is scheduled for now
+CATCHUP_GRACE = timedelta(seconds=int(os.getenv("SCHEDULER_CATCHUP_GRACE_SECONDS", "300")))
+
+# Upper bound on occurrences created per minute (token bucket)
+MAX_FIRES_PER_MINUTE = int(os.getenv("SCHEDULER_MAX_FIRES_PER_MINUTE", "30"))
+
+_stop_event = threading.Event()
+_scheduler_thread = None
+
+
+# ==========================================================
+# Frequency Arithmetic
+# ==========================================================
+def normalize_frequency(frequency):
+    frequency = (frequency or "").strip().title()
+    return frequency if frequency in FREQUENCIES else None
+
+
+def is_recurring(frequency):
+    return normalize_frequency(frequency) is not None
+
+
+def _add_month(dt):
+    year = dt.year + dt.month // 12
+    month = dt.month % 12 + 1
+    day = min(dt.day, calendar.monthrange(year, month)[1])
+    return dt.replace(year=year, month=month, day=day)
+
+
+def advance(dt, frequency):
+    if frequency == "Hourly":
+        return dt + timedelta(hours=1)
+    if frequency == "Daily":
+        return dt + timedelta(days=1)
+    if frequency == "Weekly":
+        return dt + timedelta(days=7)
+    return _add_month(dt)
+
+
+def next_fire_after(fire_at, frequency, now):
+    """
+    First occurrence after `now` following `fire_at`, and how many
+    occurrences in between were skipped (coalesced).
+    """
+
+    next_fire = advance(fire_at, frequency)
+    skipped = 0
+
+    while next_fire <= now:
+        next_fire = advance(next_fire, frequency)
+        skipped += 1
+
+    return next_fire, skipped
+
+
+# ==========================================================
+# Register a Recurring Execution
+# ==========================================================
+def register_schedule(tx, rowid, frequency, scheduled_dt=None):
+    """
+    Called in the transaction that saves the execution: the saved row
+    becomes the template and its next occurrence is one step after
+    scheduled_dt.
+    """
+
+    frequency = normalize_frequency(frequency)
+
+    if not frequency:
+        return
+
+    tx.execute("""
+        INSERT INTO lumos.execution_schedule (source_rowid, frequency, next_fire_at)
+        VALUES (%s, %s,
+                COALESCE(%s::timestamp, NOW() AT TIME ZONE 'UTC') + %s::interval)
+        ON CONFLICT (source_rowid) DO NOTHING
+    """, (rowid, frequency, scheduled_dt or None, FREQUENCIES[frequency]))
+
+
+# ==========================================================
+# Fire One Occurrence
+# ==========================================================
+def fire_schedule(schedule_id, now):
+    """
+    Clones the template as a new Submitted execution and moves
+    next_fire_at forward, in one transaction. Returns the new
+    next_fire_at, or None when nothing was fired (not due, taken by
+    another process, or the schedule was deactivated).
+    """
+
+    with transaction() as tx:
+        schedule = tx.fetchone("""
+            SELECT source_rowid, frequency, next_fire_at
+            FROM lumos.execution_schedule
+            WHERE schedule_id = %s
+              AND active = 'Y'
+            FOR UPDATE SKIP LOCKED
+        """, (schedule_id,), as_="dict")
+
+        if not schedule or schedule["next_fire_at"] > now:
+            return None
+
+        frequency = normalize_frequency(schedule["frequency"])
+        due_at = schedule["next_fire_at"]
+
+        if not frequency:
+            logging.warning(f"Schedule {schedule_id}: unknown frequency '{schedule['frequency']}', deactivating")
+            tx.execute("UPDATE lumos.execution_schedule SET active = 'N' WHERE schedule_id = %s", (schedule_id,))
+            return None
+
+        next_fire, skipped = next_fire_after(due_at, frequency, now)
+        late = now - due_at > CATCHUP_GRACE
+
+        rowid = new_execution_rowid(tx, now)
+
+        inserted = tx.execute("""
+            INSERT INTO lumos.executions
+            (
+                releaseid,
+                lumos_user,
+                exec_status,
+                exec_id,
+                rowid,
+                env_name,
+                browser,
+                parallel_exec,
+                delay,
+                screen_capture,
+                orgid,
+                scheduled_dt,
+                frequency,
+                exec_test_list,
+                exec_date
+            )
+            SELECT releaseid,
+                   lumos_user,
+                   'Submitted',
+                   exec_id,
+                   %s,
+                   env_name,
+                   browser,
+                   parallel_exec,
+                   delay,
+                   screen_capture,
+                   orgid,
+                   %s,
+                   frequency,
+                   exec_test_list,
+                   DATE_TRUNC('second', CURRENT_TIMESTAMP)
+            FROM lumos.executions
+            WHERE rowid = %s
+              AND inactiveflag = 'N'
+        """, (rowid, now if late else due_at, schedule["source_rowid"]))
+
+        if not inserted:
+            logging.info(f"Schedule {schedule_id}: template {schedule['source_rowid']} is gone, deactivating")
+            tx.execute("UPDATE lumos.execution_schedule SET active = 'N' WHERE schedule_id = %s", (schedule_id,))
+            return None
+
+        notify_submitted(tx, rowid)
+
+        tx.execute("""
+            UPDATE lumos.execution_schedule
+            SET next_fire_at = %s,
+                last_fired_at = %s,
+                last_rowid = %s
+            WHERE schedule_id = %s
+        """, (next_fire, now, rowid, schedule_id))
+
+    if skipped:
+        logging.warning(
+            f"Schedule {schedule_id}: {skipped} missed {frequency} occurrence(s) "
+            f"coalesced into execution {rowid}"
+        )
+    else:
+        logging.info(f"Schedule {schedule_id}: submitted execution {rowid}")
+
+    return next_fire
+
+
+# ==========================================================
+# Timer Loop
+# ==========================================================
+def load_due_schedules(until):
+    """Heap of (next_fire_at, schedule_id) for active schedules due by `until`."""
+
+    with transaction(readonly=True) as tx:
+        rows = tx.fetchall("""
+            SELECT next_fire_at, schedule_id
+            FROM lumos.execution_schedule
+            WHERE active = 'Y'
+              AND next_fire_at <= %s
+            ORDER BY next_fire_at
+        """, (until,))
+
+    heap = [tuple(row) for row in rows]
+    heapq.heapify(heap)
+    return heap
+
+
+def _scheduler_loop():
+    heap = []
+    next_reload = 0.0
+
+    tokens = float(MAX_FIRES_PER_MINUTE)
+    refill_per_second = MAX_FIRES_PER_MINUTE / 60
+    last_refill = time.monotonic()
+
+    while not _stop_event.is_set():
+        mono = time.monotonic()
+
+        tokens = min(MAX_FIRES_PER_MINUTE, tokens + (mono - last_refill) * refill_per_second)
+        last_refill = mono
+
+        try:
+            # The heap only holds the next RELOAD_INTERVAL; the table is
+            # re-read after that, which also picks up new schedules
+            if mono >= next_reload:
+                horizon = datetime.utcnow() + timedelta(seconds=RELOAD_INTERVAL)
+                heap = load_due_schedules(horizon)
+                next_reload = mono + RELOAD_INTERVAL
+
+            now = datetime.utcnow()
+
+            while heap and heap[0][0] <= now and tokens >= 1:
+                _, schedule_id = heapq.heappop(heap)
+                tokens -= 1
+
+                next_fire = fire_schedule(schedule_id, now)
+
+                if next_fire and next_fire <= now + timedelta(seconds=RELOAD_INTERVAL):
+                    heapq.heappush(heap, (next_fire, schedule_id))
+
+        except Exception as e:
+            logging.error(f"Scheduler pass failed: {e}")
+            next_reload = time.monotonic() + RELOAD_INTERVAL / 4
+
+        timeout = next_reload - time.monotonic()
+
+        if heap:
+            if tokens < 1:
+                timeout = min(timeout, (1 - tokens) / refill_per_second)
+            else:
+                timeout = min(timeout, (heap[0][0] - datetime.utcnow()).total_seconds())
+
+        _stop_event.wait(max(timeout, 0.05))
+
+
+def start_scheduler():
+    """
+    Starts the recurring-execution timer. Safe to call more than once;
+    several processes may run it, firing is guarded by row locks.
+    """
+
+    global _scheduler_thread
+
+    if _scheduler_thread and _scheduler_thread.is_alive():
+        return
+
+    _stop_event.clear()
+
+    _scheduler_thread = threading.Thread(
+        target=_scheduler_loop,
+        name="execution-scheduler",
+        daemon=True
+    )
+    _scheduler_thread.start()
+
+
+def stop_scheduler(timeout=5):
+    global _scheduler_thread
+
+    if not _scheduler_thread:
+        return
+
+    _stop_event.set()
+    _scheduler_thread.join(timeout)
+    _scheduler_thread = None
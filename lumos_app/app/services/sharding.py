@@ -0,0 +1,318 @@
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from ..db_utils import transaction
+from .claims import LEASE_SECONDS
+from .progress import notify_progress
+from .runtimestats import bin_pack
+from .submitpodreq import runpod
+
+
+# ==========================================================
+# Configuration
+# ==========================================================
+# parallel_exec = "Y" means this many shards; a number means that many
+DEFAULT_SHARDS = int(os.getenv("SHARD_DEFAULT_COUNT", "4"))
+MAX_SHARDS = int(os.getenv("SHARD_MAX_COUNT", "16"))
+
+LAUNCH_WORKERS = 8
+
+
+def requested_shards(parallel_exec):
+    value = str(parallel_exec or "").strip()
+
+    if value.isdigit():
+        count = int(value)
+    elif value.upper() in ("Y", "YES", "TRUE"):
+        count = DEFAULT_SHARDS
+    else:
+        count = 1
+
+    return max(1, min(count, MAX_SHARDS))
+
+
+def parse_parallel_exec(value):
+    """
+    parallel_exec to store for a saved execution: "N" or a shard count.
+    Raises ValueError for a value requested_shards would not understand.
+    """
+
+    text = str(value if value is not None else "").strip().upper()
+
+    if text in ("", "N", "NO", "FALSE"):
+        return "N"
+
+    if not (text.isdigit() or text in ("Y", "YES", "TRUE")):
+        raise ValueError("parallelExec must be Y, N or a number of containers")
+
+    if text.isdigit() and not 1 <= int(text) <= MAX_SHARDS:
+        raise ValueError(f"parallelExec must be between 1 and {MAX_SHARDS}")
+
+    count = requested_shards(text)
+    return str(count) if count > 1 else "N"
+
+
+# ==========================================================
+# Plan Shards
+# ==========================================================
+def plan_shards(execid, tests, count):
+    """
+    Stores the shard plan of an execution's resolved test list once and
+    returns its shard count. Re-planning a retried execution keeps the
+    existing plan.
+    """
+
+    with transaction() as tx:
+        existing = tx.fetchval(
+            "SELECT COUNT(*) FROM lumos.execution_shards WHERE execid = %s",
+            (execid,)
+        )
+
+        if existing:
+            return existing
+
+        # Longest-processing-time-first on the per-test EWMA durations
+        shards = bin_pack(tests, count)
+
+        tx.execute_values("""
+            INSERT INTO lumos.execution_shards
+            (execid, shard_no, test_list, estimated_seconds)
+            VALUES %s
+        """, [
+            (execid, n, shard_tests, round(seconds, 1))
+            for n, (shard_tests, seconds) in enumerate(shards, 1)
+        ])
+
+    logging.info(
+        f"Execution {execid}: {len(tests)} tests in {len(shards)} shards, "
+        f"estimated {max(s for _, s in shards):.0f}s"
+    )
+
+    return len(shards)
+
+
+# ==========================================================
+# Launch Shards
+# ==========================================================
+def claim_pending_shards(execid=None, limit=None):
+    """
+    Moves Pending shards (and Launching ones whose lease expired) to
+    Launching. Without execid only shards of Started executions are
+    taken, so a dispatcher never launches another one's claimed work.
+    """
+
+    limit_sql = "LIMIT %s" if limit else ""
+    params = [LEASE_SECONDS, execid, execid]
+
+    if limit:
+        params.append(limit)
+
+    with transaction() as tx:
+        return tx.fetchall(f"""
+            UPDATE lumos.execution_shards
+            SET status = 'Launching',
+                claimed_at = CURRENT_TIMESTAMP
+            WHERE (execid, shard_no) IN (
+                SELECT s.execid, s.shard_no
+                FROM lumos.execution_shards s
+                JOIN lumos.executions e ON e.rowid = s.execid
+                WHERE (s.status = 'Pending'
+                       OR (s.status = 'Launching'
+                           AND s.claimed_at < CURRENT_TIMESTAMP - make_interval(secs => %s)))
+                  AND (s.execid = %s OR (%s IS NULL AND e.exec_status = 'Started'))
+                ORDER BY s.execid, s.shard_no
+                {limit_sql}
+                FOR UPDATE OF s SKIP LOCKED
+            )
+            RETURNING execid, shard_no, test_list
+        """, params, as_="dict")
+
+
+def launch_shard(row, shard):
+    execid = shard["execid"]
+    shard_no = shard["shard_no"]
+
+    try:
+        result = runpod(
+            row.get("env_name"),
+            ",".join(shard["test_list"]),
+            row.get("lumos_user"),
+            row.get("browser"),
+            row.get("screen_capture"),
+            execid,
+            row.get("frequency"),
+            container_name=f"{execid}_s{shard_no}",
+            shard_no=shard_no
+        )
+    except Exception as e:
+        logging.error(f"Shard {execid}_s{shard_no} failed to launch: {e}")
+        result = "Nohostfound"
+
+    if result == "Nocapacity":
+        status, container_id = "Pending", None
+    elif result == "Nohostfound":
+        status, container_id = "Failed", None
+    else:
+        status, container_id = "Started", result
+
+    with transaction() as tx:
+        # A shard whose container already exited was finished by the
+        # reaper; its Completed / Failed stays
+        tx.execute("""
+            UPDATE lumos.execution_shards
+            SET status = %s,
+                container_id = %s,
+                started_at = CASE WHEN %s = 'Started' THEN CURRENT_TIMESTAMP END,
+                finished_at = CASE WHEN %s = 'Failed' THEN CURRENT_TIMESTAMP END
+            WHERE execid = %s
+              AND shard_no = %s
+              AND status IN ('Pending', 'Launching')
+        """, (status, container_id, status, status, execid, shard_no))
+
+    return status
+
+
+def launch_shards(rows_by_execid, shards):
+    if not shards:
+        return []
+
+    with ThreadPoolExecutor(max_workers=min(len(shards), LAUNCH_WORKERS)) as executor:
+        return list(executor.map(
+            lambda shard: launch_shard(rows_by_execid[shard["execid"]], shard),
+            shards
+        ))
+
+
+def start_sharded_execution(row, tests, count):
+    """
+    Plans and launches the shards of one claimed execution. Returns
+    "Nocapacity" when no shard could be placed yet, "Nohostfound"
+    when none can run, otherwise a short "<started>/<total> shards".
+    Shards left Pending are launched later by refresh_sharded_executions.
+    """
+
+    execid = row["rowid"]
+    total = plan_shards(execid, tests, count)
+
+    statuses = launch_shards({execid: row}, claim_pending_shards(execid))
+
+    with transaction(readonly=True) as tx:
+        started = tx.fetchval("""
+            SELECT COUNT(*)
+            FROM lumos.execution_shards
+            WHERE execid = %s
+              AND status IN ('Started', 'Completed')
+        """, (execid,))
+
+    if started:
+        return f"{started}/{total} shards"
+
+    return "Nocapacity" if "Pending" in statuses else "Nohostfound"
+
+
+# ==========================================================
+# Merge Shard Results
+# ==========================================================
+def merge_shard_results(execid):
+    """
+    Marks shards whose tests all reported as Completed and rolls the
+    latest result per test up into the executions row. The execution
+    is Completed once no shard is still pending or running (Failed if a
+    shard failed to launch or exited non-zero); Stopped executions keep
+    their status. Live views get a progress event when the rolled-up
+    counters change.
+    """
+
+    with transaction() as tx:
+        before = tx.fetchone("""
+            SELECT exec_status, pass_count, fail_count
+            FROM lumos.executions
+            WHERE rowid = %s
+            FOR UPDATE
+        """, (execid,))
+
+        tx.execute("""
+            UPDATE lumos.execution_shards s
+            SET status = 'Completed',
+                finished_at = CURRENT_TIMESTAMP
+            WHERE s.execid = %s
+              AND s.status = 'Started'
+              AND NOT EXISTS (
+                  SELECT 1
+                  FROM unnest(s.test_list) AS t(name)
+                  WHERE NOT EXISTS (
+                      SELECT 1
+                      FROM lumos.exec_details d
+                      WHERE d.exec_id = s.execid
+                        AND d.testcasename = t.name
+                  )
+              )
+        """, (execid,))
+
+        after = tx.fetchone("""
+            WITH latest AS (
+                SELECT DISTINCT ON (testcasename) status
+                FROM lumos.exec_details
+                WHERE exec_id = %s
+                ORDER BY testcasename, exec_date DESC
+            )
+            UPDATE lumos.executions
+            SET pass_count = (SELECT COUNT(*) FROM latest WHERE status ILIKE 'pass%%'),
+                fail_count = (SELECT COUNT(*) FROM latest WHERE status ILIKE 'fail%%'),
+                exec_status = CASE
+                    WHEN exec_status <> 'Started' THEN exec_status
+                    WHEN EXISTS (
+                        SELECT 1
+                        FROM lumos.execution_shards
+                        WHERE execid = %s
+                          AND status IN ('Pending', 'Launching', 'Started')
+                    ) THEN exec_status
+                    WHEN EXISTS (
+                        SELECT 1
+                        FROM lumos.execution_shards
+                        WHERE execid = %s
+                          AND status = 'Failed'
+                    ) THEN 'Failed'
+                    ELSE 'Completed'
+                END
+            WHERE rowid = %s
+            RETURNING exec_status, pass_count, fail_count, total_count
+        """, (execid, execid, execid, execid), as_="dict")
+
+        if after and before != (after["exec_status"], after["pass_count"], after["fail_count"]):
+            notify_progress(tx, execid, **after)
+
+
+def refresh_sharded_executions(limit=50):
+    """
+    Periodic pass run by the dispatcher: launches shards still waiting
+    for capacity and merges results of running sharded executions.
+    """
+
+    shards = claim_pending_shards(limit=limit)
+
+    with transaction(readonly=True) as tx:
+        if shards:
+            rows = tx.fetchall("""
+                SELECT rowid, lumos_user, env_name, browser, screen_capture, frequency
+                FROM lumos.executions
+                WHERE rowid = ANY(%s)
+            """, (list({s["execid"] for s in shards}),), as_="dict")
+        else:
+            rows = []
+
+        running = tx.fetchall("""
+            SELECT DISTINCT s.execid
+            FROM lumos.execution_shards s
+            JOIN lumos.executions e ON e.rowid = s.execid
+            WHERE e.exec_status = 'Started'
+        """)
+
+    launch_shards({row["rowid"]: row for row in rows}, shards)
+
+    for (execid,) in running:
+        try:
+            merge_shard_results(execid)
+        except Exception as e:
+            logging.error(f"Merging shard results of {execid} failed: {e}")
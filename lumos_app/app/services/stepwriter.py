@@ -0,0 +1,118 @@
+import time
+import logging
+
+
+# ==========================================================
+# Step Tables
+# ==========================================================
+STEP_TABLES = {
+    "lumos.regression_pack": {
+        "key_columns": ("lastupdby", "testid", "testcasename"),
+        "owner_column": "testcasename"
+    },
+    "lumos.reuseable_pack": {
+        "key_columns": ("lastupdby", "blockname"),
+        "owner_column": "blockname"
+    }
+}
+
+STEP_COLUMNS = (
+    "step",
+    "element",
+    "action",
+    "errorcode",
+    "defaultvalue",
+    "variable"
+)
+
+
+# ==========================================================
+# Normalize Step List
+# ==========================================================
+def build_step_rows(steplist):
+    """
+    Converts the step editor payload into
+    (step, element, action, errorcode, defaultvalue, variable) tuples.
+    """
+
+    rows = []
+
+    for step_number, item in enumerate(steplist, start=1):
+
+        step_type = item.get('StepType') or 'Non Reuseable'
+        element = item.get('Element')
+        action = item.get('Action')
+
+        rows.append((
+            step_number,
+            element if step_type == 'Non Reuseable' else step_type,
+            action if step_type == 'Non Reuseable' else 'Reuseable',
+            item.get('ErrorCode'),
+            item.get('Value'),
+            item.get('Variable')
+        ))
+
+    return rows
+
+
+# ==========================================================
+# Bulk Write Steps
+# ==========================================================
+def write_steps(tx, table, key_values, steplist, replace=False):
+    """
+    Writes all steps of a testcase / testblock with a single
+    multi-row INSERT inside the caller's transaction(), so the
+    whole save commits or rolls back together.
+
+    key_values follows STEP_TABLES[table]["key_columns"].
+    With replace=True the existing steps of the owner are deleted first.
+
+    Returns a stats dict with rows, seconds and rows_per_sec.
+    """
+
+    if table not in STEP_TABLES:
+        raise ValueError(f"Unsupported step table: {table}")
+
+    key_columns = STEP_TABLES[table]["key_columns"]
+    owner_column = STEP_TABLES[table]["owner_column"]
+
+    if len(key_values) != len(key_columns):
+        raise ValueError(f"Expected values for {', '.join(key_columns)}")
+
+    owner = key_values[key_columns.index(owner_column)]
+    rows = [tuple(key_values) + row for row in build_step_rows(steplist)]
+
+    started = time.perf_counter()
+
+    if replace:
+        tx.execute(
+            f"DELETE FROM {table} WHERE {owner_column} = %s",
+            (owner,)
+        )
+
+    columns = key_columns + STEP_COLUMNS
+    placeholders = ", ".join(["%s"] * len(columns))
+
+    tx.execute_values(
+        f"""
+            INSERT INTO {table}
+            ({", ".join(columns)}, update_flag, lastupd)
+            VALUES %s
+        """,
+        rows,
+        template=f"({placeholders}, 'YES', DATE_TRUNC('second', CURRENT_TIMESTAMP))"
+    )
+
+    elapsed = time.perf_counter() - started
+    rows_per_sec = round(len(rows) / elapsed, 1) if elapsed > 0 else None
+
+    logging.info(
+        f"Wrote {len(rows)} steps to {table} for {owner} "
+        f"in {elapsed:.3f}s ({rows_per_sec} rows/sec)"
+    )
+
+    return {
+        "rows": len(rows),
+        "seconds": round(elapsed, 4),
+        "rows_per_sec": rows_per_sec
+    }
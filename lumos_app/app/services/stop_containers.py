@@ -1,9 +1,13 @@
+import asyncio
 import os
 import re
-import requests
 import logging
 
-from ..db_utils import execute_query
+from ..db_utils import transaction
+from . import podman_client
+from .ledger import containers_for
+from .placement import get_inventory
+from .progress import notify_progress
 
 
 # ==========================================================
@@ -12,6 +16,8 @@ from ..db_utils import execute_query
 
 FLASK_ENV = os.getenv("FLASK_ENV", "DEV")
 
+# Servers that may still run containers started outside the inventory
+# (runpodman); searched together with the podman_hosts.ini hosts
 servers = [
     {"host": "http://18.54.229.197:61191"},
     {"host": "http://10.10.130.57:61191"},
@@ -21,75 +27,155 @@ servers = [
     {"host": "http://10.18.129.150:61191"},
 ]
 
-# Optional proxy config (leave empty if not required)
-proxies = {
-    "http": "",
-    "https": ""
-}
+# Concurrent stop calls per server; podman serialises much beyond this
+STOPS_PER_HOST = int(os.getenv("PODMAN_STOPS_PER_HOST", "4"))
 
-os.environ["HTTP_PROXY"] = ""
-os.environ["HTTPS_PROXY"] = ""
+# Seconds podman waits for a graceful exit before killing the container
+STOP_GRACE_SECONDS = int(os.getenv("PODMAN_STOP_GRACE_SECONDS", "10"))
 
 logging.basicConfig(level=logging.INFO)
 
 
+def all_hosts():
+    hosts = [host["url"] for host in get_inventory()["hosts"]]
+    hosts += [server["host"].rstrip("/") for server in servers]
+    return list(dict.fromkeys(hosts))
+
+
 # ==========================================================
-# Stop Containers by Execution ID
+# Find Containers
 # ==========================================================
-def stop_containers_by_execution_id(execution_id, username):
+def ledger_containers(execution_id):
+    """
+    {host: [(container_id, name)]} of the execution's running containers
+    in the placement ledger, or None when the ledger has no launches.
+    """
+
+    try:
+        entries = containers_for(execution_id)
+    except Exception as e:
+        logging.error(f"Ledger lookup for {execution_id} failed: {e}")
+        return None
+
+    if not entries:
+        return None
+
+    by_host = {}
+
+    for entry in entries:
+        if entry["finished_at"] is None:
+            by_host.setdefault(entry["host"], []).append((entry["container_id"], entry["container_name"]))
+
+    return by_host
+
+
+async def _find_containers(host, execution_id):
     """
-    Stops containers on all configured servers whose
-    names start with the given execution ID.
+    Running containers of one execution on one host, using libpod's
+    name filter ("<execid>" or a shard "<execid>_s<n>").
     """
 
-    name_pattern = rf"^{re.escape(str(execution_id))}"
+    name_filter = rf"^{re.escape(str(execution_id))}(_s\d+)?$"
+
+    try:
+        containers = await podman_client.list_containers_async(host, filters={"name": [name_filter]})
+    except Exception as e:
+        logging.error(f"Error listing containers on {host}: {e}")
+        return host, []
+
+    return host, [(container.id, container.name) for container in containers]
+
 
-    def stop_matching_containers(server):
-        base_url = server["host"]
-        containers_url = f"{base_url}/v4.8.0/libpod/containers/json"
+def search_containers(execution_id, hosts=None):
+    """Name-filter search on every host at once; unreachable hosts are skipped."""
 
-        try:
-            response = requests.get(containers_url, proxies=proxies, timeout=10)
-            response.raise_for_status()
+    hosts = hosts or all_hosts()
 
-            containers = response.json()
+    async def search():
+        return await asyncio.gather(*(_find_containers(host, execution_id) for host in hosts))
 
-            for container in containers:
-                names = container.get("Names", [])
-                if not names:
-                    continue
+    return {host: found for host, found in podman_client.run(search()) if found}
 
-                name = names[0].lstrip("/")
 
-                if re.match(name_pattern, name):
-                    container_id = container.get("Id")
+# ==========================================================
+# Stop Containers
+# ==========================================================
+async def _stop_on_host(host, containers):
+    """Stops containers on one host, at most STOPS_PER_HOST at a time."""
+
+    limit = asyncio.Semaphore(STOPS_PER_HOST)
+
+    async def stop(container_id, name):
+        async with limit:
+            try:
+                await podman_client.stop_container_async(host, container_id, STOP_GRACE_SECONDS)
+                logging.info(f"Container {name} stopped on {host}")
+                return name, None
+
+            except Exception as e:
+                logging.error(f"Error stopping {name} on {host}: {e}")
+                return name, str(e)
+
+    return await asyncio.gather(*(stop(container_id, name) for container_id, name in containers))
+
+
+def stop_containers(by_host):
+    """Stops {host: [(container_id, name)]} on all hosts in parallel."""
+
+    outcome = {"stopped": [], "failed": {}}
+
+    if not by_host:
+        return outcome
 
-                    stop_url = f"{base_url}/v4.8.0/libpod/containers/{container_id}/stop"
+    async def stop_all():
+        return await asyncio.gather(*(_stop_on_host(host, found) for host, found in by_host.items()))
 
-                    logging.info(f"Stopping container {name} on {base_url}")
+    for host_results in podman_client.run(stop_all()):
+        for name, error in host_results:
+            if error:
+                outcome["failed"][name] = error
+            else:
+                outcome["stopped"].append(name)
 
-                    stop_resp = requests.post(stop_url, proxies=proxies, timeout=15)
-                    stop_resp.raise_for_status()
+    return outcome
 
-                    logging.info(f"Container {name} stopped successfully.")
 
-        except Exception as e:
-            logging.error(f"Error on server {base_url}: {e}")
+# ==========================================================
+# Stop Containers by Execution ID
+# ==========================================================
+def stop_containers_by_execution_id(execution_id, username):
+    """
+    Stops every container of an execution (all shards) and marks it
+    Stopped. Containers in the placement ledger are stopped directly;
+    the name search across all servers is only needed when none are
+    recorded (older runs, launches outside the dispatcher).
+    """
+
+    by_host = ledger_containers(execution_id)
+
+    if by_host is None:
+        by_host = search_containers(execution_id)
 
-    # Stop containers on all servers
-    for server in servers:
-        stop_matching_containers(server)
+    outcome = stop_containers(by_host)
 
     # Update execution status in DB
     try:
-        execute_query("""
-            UPDATE lumos.executions
-            SET exec_status = %s,
-                lastupdby = %s
-            WHERE rowid = %s
-        """, ("Stopped", username, execution_id), commit=True)
+        with transaction() as tx:
+            tx.execute("""
+                UPDATE lumos.executions
+                SET exec_status = %s,
+                    lastupdby = %s
+                WHERE rowid = %s
+            """, ("Stopped", username, execution_id))
 
-        logging.info(f"Execution {execution_id} marked as Stopped.")
+            notify_progress(tx, execution_id, exec_status="Stopped")
+
+        logging.info(
+            f"Execution {execution_id} marked as Stopped "
+            f"({len(outcome['stopped'])} stopped, {len(outcome['failed'])} failed)"
+        )
 
     except Exception as e:
         logging.error(f"Failed to update execution status: {e}")
+
+    return outcome
@@ -1,7 +1,12 @@
-import requests
-import json
+import asyncio
 import os
+import time
 import logging
+import threading
+from concurrent.futures import wait, FIRST_COMPLETED
+
+from . import hostregistry, ledger, placement, podman_client, warmpool
+from .resultingest import RESULT_SPOOL_DIR
 
 # ==========================================================
 # Configuration
@@ -10,36 +15,24 @@ import logging
 FLASK_ENV = os.getenv("FLASK_ENV", "DEV")
 NGINX_PORT = os.getenv("NGINX_PORT", "8080")
 
-podman_hosts = [
-    "http://10.54.229.197:61191",
-    "http://10.10.130.57:61191"
-]
-
-proxies = {
-    "http": "",
-    "https": ""
-}
+# Overall probe budget, and how long to wait for better hosts once one has room
+PROBE_DEADLINE = float(os.getenv("PODMAN_PROBE_DEADLINE", "6"))
+PROBE_GRACE = float(os.getenv("PODMAN_PROBE_GRACE", "0.3"))
 
-os.environ["HTTP_PROXY"] = ""
-os.environ["HTTPS_PROXY"] = ""
+# Keep host loads fresh in the background instead of probing on every call
+HOST_REGISTRY_ENABLED = os.getenv("HOST_REGISTRY_ENABLED", "Y") == "Y"
 
 logging.basicConfig(level=logging.INFO)
 
+# Choosing a host and counting the placement must not interleave
+_placement_lock = threading.Lock()
+
 
 # ==========================================================
 # Health Check
 # ==========================================================
 def check_podman_health(host):
-    try:
-        response = requests.get(
-            f"{host}/_ping",
-            timeout=5,
-            verify=False,
-            proxies=proxies
-        )
-        return response.status_code == 200
-    except Exception:
-        return False
+    return podman_client.ping(host)
 
 
 # ==========================================================
@@ -47,18 +40,7 @@ def check_podman_health(host):
 # ==========================================================
 def get_container_count(host):
     try:
-        response = requests.get(
-            f"{host}/v4.8.0/libpod/containers/json",
-            timeout=10,
-            verify=False,
-            proxies=proxies
-        )
-
-        if response.status_code == 200:
-            return len(response.json())
-        else:
-            logging.error(f"Failed to fetch containers from {host}")
-            return float("inf")
+        return len(podman_client.list_containers(host))
 
     except Exception as e:
         logging.error(f"Error fetching container count: {e}")
@@ -66,110 +48,229 @@ def get_container_count(host):
 
 
 # ==========================================================
-# Load Balancer
+# Get Memory Usage
 # ==========================================================
-def get_least_loaded_host(env):
+def get_memory_percent(host):
+    """
+    Share of host memory used by running containers, from libpod's
+    stats API. None when stats are unavailable (capacity then goes by
+    slots only).
+    """
+
+    try:
+        return podman_client.memory_percent(host)
 
-    least_loaded_host = None
-    least_container_count = float("inf")
+    except Exception as e:
+        logging.error(f"Error fetching container stats from {host}: {e}")
+        return None
+
+
+# ==========================================================
+# Probe One Host
+# ==========================================================
+async def probe_host_async(host):
+    """
+    Returns the host's load {"running", "mem_percent"}, or None when it
+    is unhealthy. Container list and stats are fetched concurrently.
+    """
+
+    if not await podman_client.ping_async(host):
+        return None
+
+    containers, mem_percent = await asyncio.gather(
+        podman_client.list_containers_async(host),
+        podman_client.memory_percent_async(host),
+        return_exceptions=True
+    )
+
+    if isinstance(containers, Exception):
+        logging.error(f"Error fetching container count: {containers}")
+        return None
 
-    # Example env grouping logic
-    if env in ["Mars", "Bacchus", "Pluto", "Athena"]:
-        selected_hosts = podman_hosts[:1]
-    elif env in ["Nexon", "CST2", "Ford", "DEVS"]:
-        selected_hosts = podman_hosts[1:]
-    else:
-        selected_hosts = podman_hosts
+    if isinstance(mem_percent, Exception):
+        logging.error(f"Error fetching container stats from {host}: {mem_percent}")
+        mem_percent = None
 
-    for host in selected_hosts:
-        if check_podman_health(host):
-            container_count = get_container_count(host)
+    return {"running": len(containers), "mem_percent": mem_percent}
 
-            logging.info(f"{host} -> {container_count} containers")
 
-            if container_count < least_container_count:
-                least_container_count = container_count
-                least_loaded_host = host
+def probe_host(host):
+    return podman_client.run(probe_host_async(host))
 
-    if least_loaded_host:
-        logging.info(
-            f"Least loaded host: {least_loaded_host} "
-            f"({least_container_count} containers)"
+
+def probe_hosts(hosts):
+    """
+    Live probe of inventory `hosts` whose registry entry is stale.
+    Results go to the host registry as they arrive. Hosts with an open
+    circuit are skipped unless every host is tripped.
+    """
+
+    hosts = [h for h in hosts if not hostregistry.is_circuit_open(h["url"])] or hosts
+
+    # Probe every host at once on the client loop; results are taken as they arrive
+    pending = {podman_client.submit(probe_host_async(h["url"])): h for h in hosts}
+    deadline = time.monotonic() + PROBE_DEADLINE
+
+    while pending:
+        timeout = deadline - time.monotonic()
+
+        if timeout <= 0:
+            break
+
+        done, _ = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+
+        for future in done:
+            host = pending.pop(future)
+
+            try:
+                load = future.result()
+            except Exception as e:
+                logging.error(f"Probe of {host['url']} failed: {e}")
+                load = None
+
+            hostregistry.record_probe(host["url"], load)
+
+            if load is None:
+                logging.warning(f"{host['url']} is unhealthy")
+                continue
+
+            logging.info(f"{host['url']} -> {load['running']}/{host['slots']} containers")
+
+            # A host with room answered; give slower hosts a short grace
+            if placement.has_capacity(host, load):
+                deadline = min(deadline, time.monotonic() + PROBE_GRACE)
+
+    if pending:
+        logging.warning(
+            f"Not waiting for slow hosts: {', '.join(h['url'] for h in pending.values())}"
         )
-    else:
-        logging.error("No healthy Podman hosts found!")
 
-    return least_loaded_host
+
+# ==========================================================
+# Placement
+# ==========================================================
+def get_placement_host(env, browser):
+    """
+    Returns (host_url, None) for the chosen host, or (None, reason) with
+    reason "Nohostfound" (no healthy host may run this env/browser) or
+    "Nocapacity" (healthy hosts exist but all are full). The chosen host
+    is counted as one container busier right away.
+    """
+
+    inventory = placement.get_inventory()
+    hosts = placement.hosts_for(env, placement.image_for_browser(browser), inventory)
+
+    if not hosts:
+        logging.error(f"No Podman host in the inventory can run {env} / {browser}")
+        return None, "Nohostfound"
+
+    urls = [h["url"] for h in hosts]
+
+    if HOST_REGISTRY_ENABLED:
+        hostregistry.start_host_registry([h["url"] for h in inventory["hosts"]], probe_host)
+
+    # Probe only what the registry cannot vouch for
+    fresh = hostregistry.available_loads(urls)
+    stale = [h for h in hosts if h["url"] not in fresh]
+
+    if stale:
+        probe_hosts(stale)
+
+    with _placement_lock:
+        loads = hostregistry.available_loads(urls)
+
+        if not loads:
+            logging.error("No healthy Podman hosts found!")
+            return None, "Nohostfound"
+
+        host = placement.choose_host(hosts, loads, inventory["strategy"])
+
+        if not host:
+            logging.info(f"All Podman hosts for {env} are full")
+            return None, "Nocapacity"
+
+        hostregistry.note_placement(host["url"])
+
+    load = loads[host["url"]]
+    logging.info(
+        f"Placing on {host['name']} ({host['url']}): "
+        f"{load['running']}/{host['slots']} containers, strategy {inventory['strategy']}"
+    )
+
+    return host["url"], None
 
 
 # ==========================================================
 # Create Container via REST API
 # ==========================================================
-def create_container(host, env, testcases, userid,
-                     browser, screencapture, execid, freq):
+LUMOS_MAIN = f"/appfs/{FLASK_ENV}/Lumos/Lumos_main.py"
 
-    image = (
-        "localhost/lumoslite_lean:latest"
-        if browser.lower() == "chrome"
-        else "localhost/lumoslite_edge:latest"
-    )
 
-    lumos_command = (
-        f"python /appfs/{FLASK_ENV}/Lumos/Lumos_main.py "
-        f"{env} {testcases} {userid} {execid} "
-        f"{browser} {screencapture} {freq}"
-    )
+def lumos_args(env, testcases, userid, browser, screencapture, execid, freq):
+    return f"{env} {testcases} {userid} {execid} {browser} {screencapture} {freq}"
 
-    container_config = {
-        "Image": image,
-        "Cmd": ["sh", "-c", lumos_command],
+
+def container_config(image, command, name):
+    return {
+        "Image": f"localhost/{image}:latest",
+        "Cmd": ["sh", "-c", command],
         "HostConfig": {
             "Binds": ["/appfs:/appfs"],
             "NetworkMode": "host"
         },
         "Env": [
             f"FLASK_ENV={FLASK_ENV}",
-            f"NGINX_PORT={NGINX_PORT}"
+            f"NGINX_PORT={NGINX_PORT}",
+            f"LUMOS_RESULT_SPOOL={RESULT_SPOOL_DIR}"
         ],
-        "name": execid
+        "name": name
     }
 
-    headers = {"Content-Type": "application/json"}
 
-    try:
-        # Create container
-        response = requests.post(
-            f"{host}/v4.8.0/libpod/containers/create",
-            headers=headers,
-            data=json.dumps(container_config),
-            verify=False,
-            proxies=proxies,
-            timeout=15
-        )
+def create_container(host, env, testcases, userid,
+                     browser, screencapture, execid, freq,
+                     container_name=None, before_start=None):
 
-        if response.status_code != 201:
-            logging.error(f"Container creation failed: {response.text}")
-            return None
+    lumos_command = (
+        f"python {LUMOS_MAIN} "
+        f"{lumos_args(env, testcases, userid, browser, screencapture, execid, freq)}"
+    )
 
-        container_id = response.json().get("Id")
+    return start_container(host, container_config(
+        placement.image_for_browser(browser),
+        lumos_command,
+        container_name or execid
+    ), before_start)
 
-        # Start container
-        start_resp = requests.post(
-            f"{host}/v4.8.0/libpod/containers/{container_id}/start",
-            verify=False,
-            proxies=proxies,
-            timeout=10
-        )
 
-        if start_resp.status_code != 204:
-            logging.error("Failed to start container")
-            return None
+def start_container(host, config, before_start=None):
+    """
+    Creates and starts a container; returns its ID or None.
+    before_start(container_id) runs between create and start; a
+    container that fails to start is removed again.
+    """
+
+    container_id = None
+
+    try:
+        container_id = podman_client.create_container(host, config, start=before_start is None)
+
+        if before_start:
+            before_start(container_id)
+            podman_client.start_container(host, container_id)
 
         logging.info(f"Container started: {container_id}")
         return container_id
 
     except Exception as e:
         logging.error(f"Error creating container: {e}")
+
+        if container_id:
+            try:
+                podman_client.remove_container(host, container_id)
+            except Exception as remove_error:
+                logging.warning(f"Could not remove {container_id} on {host}: {remove_error}")
+
         return None
 
 
@@ -177,27 +278,69 @@ def create_container(host, env, testcases, userid,
 # Main Entry Function
 # ==========================================================
 def runpod(env, testcases, userid,
-           browser, screencapture, execid, freq):
+           browser, screencapture, execid, freq,
+           container_name=None, shard_no=None):
 
     logging.info("Starting runpod...")
 
-    least_loaded_host = get_least_loaded_host(env)
+    # An idle pre-started container skips create/start and boot
+    handed = warmpool.run_warm(env, testcases, userid, browser,
+                               screencapture, execid, freq, container_name)
 
-    if not least_loaded_host:
-        return "Nohostfound"
+    if handed:
+        host, container_id, name = handed
+        _record_launch(execid, name, host, container_id, browser, shard_no)
+        return container_id
+
+    host, reason = get_placement_host(env, browser)
+
+    if not host:
+        return reason
+
+    launched = []
+
+    def record(container_id):
+        # Before start, so the reaper knows the container when it exits
+        _record_launch(execid, container_name or execid, host, container_id, browser, shard_no)
+        launched.append(container_id)
 
     container_id = create_container(
-        least_loaded_host,
+        host,
         env,
         testcases,
         userid,
         browser,
         screencapture,
         execid,
-        freq
+        freq,
+        container_name,
+        before_start=record
     )
 
-    return container_id if container_id else "Nohostfound"
+    if not container_id:
+        # Recorded but never started: close the ledger entry
+        for recorded_id in launched:
+            ledger.record_exit(recorded_id, None)
+
+        hostregistry.release_placement(host)
+        return "Nohostfound"
+
+    return container_id
+
+
+def _record_launch(execid, name, host, container_id, browser, shard_no):
+    try:
+        ledger.record_launch(
+            execid,
+            name,
+            host,
+            container_id,
+            image=placement.image_for_browser(browser),
+            shard_no=shard_no
+        )
+    except Exception as e:
+        # Stopping falls back to a name search on every host
+        logging.error(f"Could not record container {container_id} on {host}: {e}")
 
 
 # ==========================================================
@@ -0,0 +1,86 @@
+import re
+
+from .packindex import get_pack_members
+
+
+# ==========================================================
+# Expand exec_test_list
+# ==========================================================
+def split_test_list(exec_test_list):
+    """
+    Entries of lumos.executions.exec_test_list as (name, kind) with
+    kind "testpack" for "<name>.tp" and "testcase" for "<name>.tc" or
+    a bare name.
+    """
+
+    entries = []
+
+    for item in (exec_test_list or "").split(","):
+        item = item.strip()
+
+        if not item:
+            continue
+
+        if item.endswith(".tp"):
+            entries.append((item[:-3], "testpack"))
+        elif item.endswith(".tc"):
+            entries.append((item[:-3], "testcase"))
+        else:
+            entries.append((item, "testcase"))
+
+    return entries
+
+
+def expand_test_list(exec_test_list):
+    """
+    Testcase names an execution runs, packs resolved to their active
+    members through the pack index, in list order and without duplicates.
+    """
+
+    tests = []
+    seen = set()
+
+    for name, kind in split_test_list(exec_test_list):
+        for testcase in (get_pack_members(name) if kind == "testpack" else [name]):
+            if testcase not in seen:
+                seen.add(testcase)
+                tests.append(testcase)
+
+    return tests
+
+
+# ==========================================================
+# exec_time Parsing
+# ==========================================================
+_CLOCK = re.compile(r"^(?:(\d+):)?(\d+):(\d+(?:\.\d+)?)$")
+
+
+def exec_time_seconds(value):
+    """
+    exec_details.exec_time as seconds. Accepts numbers, numeric strings,
+    "HH:MM:SS" / "MM:SS" and intervals; None when unparseable.
+    """
+
+    if value is None:
+        return None
+
+    if hasattr(value, "total_seconds"):
+        return value.total_seconds()
+
+    if isinstance(value, (int, float)):
+        return float(value)
+
+    text = str(value).strip()
+
+    try:
+        return float(text)
+    except ValueError:
+        pass
+
+    match = _CLOCK.match(text)
+
+    if not match:
+        return None
+
+    hours, minutes, seconds = match.groups()
+    return int(hours or 0) * 3600 + int(minutes) * 60 + float(seconds)
@@ -0,0 +1,280 @@
+import logging
+import os
+import threading
+import uuid
+
+from . import hostregistry, ledger, placement, podman_client, submitpodreq
+
+
+# ==========================================================
+# Configuration
+# ==========================================================
+FLASK_ENV = os.getenv("FLASK_ENV", "DEV")
+
+# Job handoff: the dispatcher links <name>.job here and the idle
+# container starts Lumos with the arguments it contains. The file stays
+# while the run is busy and is removed when it ends.
+WARM_POOL_DIR = os.getenv("WARM_POOL_DIR", f"/appfs/{FLASK_ENV}/warm_pool")
+
+REPLENISH_INTERVAL = float(os.getenv("WARM_POOL_REPLENISH_SECONDS", "10"))
+JOB_POLL_SECONDS = 0.2
+
+WARM_PREFIX = "lumoswarm"
+
+_lock = threading.Lock()
+_idle = {}    # (host, image) -> [{"name", "container_id"}]
+
+_stop_event = threading.Event()
+_wake_event = threading.Event()
+_replenisher = None
+
+
+def pool_enabled(inventory=None):
+    inventory = inventory or placement.get_inventory()
+    return any(host["warm_pool"] > 0 for host in inventory["hosts"])
+
+
+def job_path(name):
+    return os.path.join(WARM_POOL_DIR, f"{name}.job")
+
+
+def _image_of(name):
+    """Image from a warm container name: lumoswarm_<image>_<suffix>."""
+
+    return name[len(WARM_PREFIX) + 1:].rsplit("_", 1)[0]
+
+
+# ==========================================================
+# Start Warm Containers
+# ==========================================================
+def warm_command(name):
+    job = job_path(name)
+
+    return (
+        f"while [ ! -f {job} ]; do sleep {JOB_POLL_SECONDS}; done; "
+        f"python {submitpodreq.LUMOS_MAIN} $(cat {job}); "
+        f"rc=$?; rm -f {job}; exit $rc"
+    )
+
+
+def start_warm_container(host, image):
+    name = f"{WARM_PREFIX}_{image}_{uuid.uuid4().hex[:8]}"
+
+    container_id = submitpodreq.start_container(
+        host,
+        submitpodreq.container_config(image, warm_command(name), name)
+    )
+
+    if not container_id:
+        return None
+
+    hostregistry.note_placement(host)
+
+    with _lock:
+        _idle.setdefault((host, image), []).append({"name": name, "container_id": container_id})
+
+    logging.info(f"Warm container {name} ready on {host}")
+    return container_id
+
+
+# ==========================================================
+# Hand a Run to an Idle Container
+# ==========================================================
+def _take_idle(hosts, image):
+    with _lock:
+        candidates = [host for host in hosts if _idle.get((host, image))]
+
+        if not candidates:
+            return None, None
+
+        # Spread runs: the host with the most idle containers
+        host = max(candidates, key=lambda h: len(_idle[(h, image)]))
+        return host, _idle[(host, image)].pop(0)
+
+
+def _handoff(name, args):
+    """
+    Links the job file into place. Linking fails if the file exists, so
+    of several dispatchers only one hands a run to a given container.
+    """
+
+    os.makedirs(WARM_POOL_DIR, exist_ok=True)
+
+    job = job_path(name)
+    tmp = f"{job}.{os.getpid()}.{uuid.uuid4().hex[:6]}.tmp"
+
+    with open(tmp, "w") as f:
+        f.write(args)
+
+    try:
+        os.link(tmp, job)
+        return True
+    except FileExistsError:
+        return False
+    finally:
+        os.remove(tmp)
+
+
+def _rename(host, container_id, name):
+    try:
+        podman_client.rename_container(host, container_id, name)
+        return True
+
+    except Exception as e:
+        logging.warning(f"Could not rename {container_id} on {host}: {e}")
+        return False
+
+
+def run_warm(env, testcases, userid, browser, screencapture, execid, freq,
+             container_name=None):
+    """
+    Starts a run in an idle warm container of a host allowed to run
+    env/browser. Returns (host, container_id, container_name), or None
+    when the pool has nothing idle (the caller creates a container).
+    """
+
+    image = placement.image_for_browser(browser)
+    hosts = [h["url"] for h in placement.hosts_for(env, image) if h["warm_pool"] > 0]
+
+    if not hosts:
+        return None
+
+    args = submitpodreq.lumos_args(env, testcases, userid, browser, screencapture, execid, freq)
+
+    while True:
+        host, entry = _take_idle(hosts, image)
+
+        if not entry:
+            return None
+
+        try:
+            if _handoff(entry["name"], args):
+                break
+        except OSError as e:
+            logging.error(f"Job handoff to {entry['name']} failed: {e}")
+            return None
+
+        # Another dispatcher took it
+        logging.info(f"Warm container {entry['name']} already busy, trying the next")
+
+    _wake_event.set()
+
+    # Same name as a cold start, so stop and reports see no difference
+    name = container_name or str(execid)
+
+    if not _rename(host, entry["container_id"], name):
+        name = entry["name"]
+
+    logging.info(f"Execution {execid} handed to warm container {name} on {host}")
+    return host, entry["container_id"], name
+
+
+# ==========================================================
+# Replenish
+# ==========================================================
+def list_warm_containers(host):
+    return podman_client.list_containers(
+        host,
+        all_containers=True,
+        filters={"name": [f"^{WARM_PREFIX}_"]}
+    )
+
+
+def sync_host(host):
+    """
+    Rebuilds the idle list of one host from podman: running warm
+    containers without a job file are idle (including ones left by an
+    earlier dispatcher); exited ones that never ran a job are removed.
+    """
+
+    harvesting = {entry["container_id"] for entry in ledger.open_containers(host)}
+    idle = {}
+
+    for container in list_warm_containers(host):
+        busy = os.path.exists(job_path(container.name))
+
+        if container.state == "running":
+            if not busy:
+                idle.setdefault(_image_of(container.name), []).append(
+                    {"name": container.name, "container_id": container.id}
+                )
+
+        elif not busy and container.id not in harvesting:
+            podman_client.remove_container(host, container.id)
+
+    with _lock:
+        for key in [key for key in _idle if key[0] == host]:
+            del _idle[key]
+
+        for image, entries in idle.items():
+            _idle[(host, image)] = entries
+
+
+def replenish_host(host):
+    """Starts warm containers until each image has warm_pool idle ones."""
+
+    sync_host(host["url"])
+
+    for image in host["images"]:
+        with _lock:
+            missing = host["warm_pool"] - len(_idle.get((host["url"], image), []))
+
+        for _ in range(max(missing, 0)):
+            load = hostregistry.available_loads([host["url"]]).get(host["url"])
+
+            # Warm containers take real slots; never crowd out cold starts
+            if load and not placement.has_capacity(host, load):
+                break
+
+            if not start_warm_container(host["url"], image):
+                break
+
+
+def _replenish_loop():
+    while not _stop_event.is_set():
+        _wake_event.clear()
+
+        for host in placement.get_inventory()["hosts"]:
+            if host["warm_pool"] <= 0 or hostregistry.is_circuit_open(host["url"]):
+                continue
+
+            try:
+                replenish_host(host)
+            except Exception as e:
+                logging.error(f"Warm pool upkeep on {host['url']} failed: {e}")
+
+        _wake_event.wait(REPLENISH_INTERVAL)
+
+
+def start_warm_pool():
+    """
+    Keeps the warm pool filled in the background. Safe to call more
+    than once; warm containers outlive the dispatcher and are adopted
+    by the next one.
+    """
+
+    global _replenisher
+
+    if _replenisher and _replenisher.is_alive():
+        return
+
+    _stop_event.clear()
+
+    _replenisher = threading.Thread(
+        target=_replenish_loop,
+        name="warm-pool",
+        daemon=True
+    )
+    _replenisher.start()
+
+
+def stop_warm_pool(timeout=10):
+    global _replenisher
+
+    if not _replenisher:
+        return
+
+    _stop_event.set()
+    _wake_event.set()
+    _replenisher.join(timeout)
+    _replenisher = None
@@ -0,0 +1,20 @@
+-- Indexes backing the keyset cursors used by the list endpoints.
+-- Each index matches the ORDER BY of app/pagination.fetch_page for that endpoint.
+
+CREATE INDEX IF NOT EXISTS activity_log_act_date_idx
+    ON lumos.activity_log (act_date DESC, act_id DESC);
+
+CREATE INDEX IF NOT EXISTS executions_exec_date_idx
+    ON lumos.executions (exec_date DESC, rowid DESC);
+
+CREATE INDEX IF NOT EXISTS repository_lastupd_idx
+    ON lumos.repository ((COALESCE(lastupd, 'epoch'::timestamp)) DESC, element DESC)
+    WHERE inactiveflag = 'N';
+
+CREATE INDEX IF NOT EXISTS user_story_lastupd_at_idx
+    ON lumos.user_story ((COALESCE(lastupd_at, 'epoch'::timestamp)) DESC, rowid DESC)
+    WHERE inactiveflag = 'N';
+
+CREATE INDEX IF NOT EXISTS testpack_list_name_idx
+    ON lumos.testpack_list (testpack_name)
+    WHERE inactiveflag = 'N';
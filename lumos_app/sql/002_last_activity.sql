@@ -0,0 +1,30 @@
+-- Latest activity per testcase and per testblock.
+-- Kept current by app/services/activitylog.write_activity_rows in the same
+-- transaction as the activity_log insert; read by /testcases/list and
+-- /testblocks/list instead of ranking the whole activity_log per request.
+
+CREATE TABLE IF NOT EXISTS lumos.last_activity (
+    entity_type  VARCHAR(10)  NOT NULL,   -- 'testcase' or 'block'
+    entity_name  VARCHAR(255) NOT NULL,
+    lumos_user   VARCHAR(100),
+    act_date     TIMESTAMP,
+    action_type  VARCHAR(100),
+    PRIMARY KEY (entity_type, entity_name)
+);
+
+-- One-off backfill from the existing history
+INSERT INTO lumos.last_activity (entity_type, entity_name, lumos_user, act_date, action_type)
+SELECT DISTINCT ON (testcasename)
+       'testcase', testcasename, lumos_user, act_date, action_type
+FROM lumos.activity_log
+WHERE COALESCE(testcasename, '') <> ''
+ORDER BY testcasename, act_date DESC
+ON CONFLICT (entity_type, entity_name) DO NOTHING;
+
+INSERT INTO lumos.last_activity (entity_type, entity_name, lumos_user, act_date, action_type)
+SELECT DISTINCT ON (blockname)
+       'block', blockname, lumos_user, act_date, action_type
+FROM lumos.activity_log
+WHERE COALESCE(blockname, '') <> ''
+ORDER BY blockname, act_date DESC
+ON CONFLICT (entity_type, entity_name) DO NOTHING;
@@ -0,0 +1,17 @@
+-- Claim columns for the Submitted queue in lumos.executions.
+-- app/services/claims.claim_executions moves rows Submitted -> Claimed with
+-- FOR UPDATE SKIP LOCKED, so several dispatchers can drain the queue without
+-- starting the same execution twice. A Claimed row whose claimed_at is older
+-- than the lease (EXECUTION_CLAIM_LEASE_SECONDS) is taken over by another
+-- dispatcher, which covers a dispatcher that died mid-claim.
+
+ALTER TABLE lumos.executions ADD COLUMN IF NOT EXISTS claimed_by VARCHAR(255);
+ALTER TABLE lumos.executions ADD COLUMN IF NOT EXISTS claimed_at TIMESTAMP;
+
+CREATE INDEX IF NOT EXISTS executions_submitted_idx
+    ON lumos.executions (scheduled_dt)
+    WHERE exec_status = 'Submitted' AND inactiveflag = 'N';
+
+CREATE INDEX IF NOT EXISTS executions_claimed_idx
+    ON lumos.executions (claimed_at)
+    WHERE exec_status = 'Claimed' AND inactiveflag = 'N';
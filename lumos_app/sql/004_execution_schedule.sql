@@ -0,0 +1,39 @@
+-- Recurring executions (frequency other than 'Once').
+-- One row per recurring execution saved through /api/save_execution; the row
+-- it points at (source_rowid) is the template every occurrence is cloned from.
+-- app/services/scheduler.py fires due rows in next_fire_at order and moves
+-- next_fire_at forward in the same transaction as the cloned Submitted row.
+
+CREATE TABLE IF NOT EXISTS lumos.execution_schedule (
+    schedule_id    SERIAL       PRIMARY KEY,
+    source_rowid   VARCHAR(50)  NOT NULL UNIQUE,
+    frequency      VARCHAR(20)  NOT NULL,   -- Hourly, Daily, Weekly, Monthly
+    next_fire_at   TIMESTAMP    NOT NULL,
+    last_fired_at  TIMESTAMP,
+    last_rowid     VARCHAR(50),
+    active         CHAR(1)      NOT NULL DEFAULT 'Y',
+    created_at     TIMESTAMP    NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE INDEX IF NOT EXISTS execution_schedule_next_fire_idx
+    ON lumos.execution_schedule (next_fire_at)
+    WHERE active = 'Y';
+
+-- One-off backfill: recurring executions saved before this table existed
+-- start firing at their next occurrence after the scheduled date. Retriggered
+-- copies share the exec_id, so only the first row per exec_id is a template.
+INSERT INTO lumos.execution_schedule (source_rowid, frequency, next_fire_at)
+SELECT DISTINCT ON (exec_id)
+       rowid,
+       INITCAP(frequency),
+       COALESCE(scheduled_dt, exec_date) + CASE INITCAP(frequency)
+           WHEN 'Hourly'  THEN INTERVAL '1 hour'
+           WHEN 'Daily'   THEN INTERVAL '1 day'
+           WHEN 'Weekly'  THEN INTERVAL '7 days'
+           WHEN 'Monthly' THEN INTERVAL '1 month'
+       END
+FROM lumos.executions
+WHERE INITCAP(frequency) IN ('Hourly', 'Daily', 'Weekly', 'Monthly')
+  AND inactiveflag = 'N'
+ORDER BY exec_id, exec_date
+ON CONFLICT (source_rowid) DO NOTHING;
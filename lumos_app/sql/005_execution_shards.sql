@@ -0,0 +1,26 @@
+-- Shards of executions run with parallel_exec (app/services/sharding.py).
+-- Every shard is one container running part of the expanded test list under
+-- the parent execution's rowid; exec_details rows of all shards therefore
+-- share exec_id and are merged back into the one lumos.executions row.
+
+CREATE TABLE IF NOT EXISTS lumos.execution_shards (
+    execid             VARCHAR(50)  NOT NULL,   -- lumos.executions.rowid
+    shard_no           INTEGER      NOT NULL,
+    test_list          TEXT[]       NOT NULL,
+    estimated_seconds  NUMERIC,
+    status             VARCHAR(20)  NOT NULL DEFAULT 'Pending',
+                       -- Pending, Launching, Started, Completed, Failed
+    container_id       VARCHAR(100),
+    claimed_at         TIMESTAMP,
+    started_at         TIMESTAMP,
+    finished_at        TIMESTAMP,
+    PRIMARY KEY (execid, shard_no)
+);
+
+CREATE INDEX IF NOT EXISTS execution_shards_open_idx
+    ON lumos.execution_shards (execid)
+    WHERE status IN ('Pending', 'Launching', 'Started');
+
+-- Per-execution result lookups for the merge
+CREATE INDEX IF NOT EXISTS exec_details_exec_id_idx
+    ON lumos.exec_details (exec_id, testcasename);
@@ -0,0 +1,21 @@
+-- Per-testcase duration estimates (app/services/runtimestats.py).
+-- Updated incrementally from lumos.exec_details: rows newer than the highest
+-- last_exec_date are folded into an EWMA and a window of recent samples from
+-- which the p90 is taken.
+
+CREATE TABLE IF NOT EXISTS lumos.test_runtime_stats (
+    testcasename    VARCHAR(255) PRIMARY KEY,
+    ewma_seconds    NUMERIC      NOT NULL,
+    p90_seconds     NUMERIC      NOT NULL,
+    sample_count    INTEGER      NOT NULL,
+    recent_seconds  NUMERIC[]    NOT NULL,   -- newest last, at most RECENT_WINDOW
+    last_exec_date  TIMESTAMP,
+    updated_at      TIMESTAMP    NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE INDEX IF NOT EXISTS test_runtime_stats_last_exec_idx
+    ON lumos.test_runtime_stats (last_exec_date);
+
+-- Watermark scans of new results
+CREATE INDEX IF NOT EXISTS exec_details_exec_date_idx
+    ON lumos.exec_details (exec_date);
@@ -0,0 +1,10 @@
+-- Concrete test list of an execution, resolved by the dispatcher from
+-- exec_test_list (packs expanded, duplicates removed). total_count is set
+-- from it at the same time.
+
+ALTER TABLE lumos.executions ADD COLUMN IF NOT EXISTS resolved_test_list TEXT;
+
+-- Full scans of active pack membership when the dispatcher rebuilds its index
+CREATE INDEX IF NOT EXISTS testpack_list_members_idx
+    ON lumos.testpack_list (testpack_name, testcasename)
+    WHERE inactiveflag = 'N';
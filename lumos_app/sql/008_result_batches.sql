@@ -0,0 +1,14 @@
+-- Result batches already applied by app/services/resultingest.py.
+-- Containers may resend a batch (HTTP retry, spool file drained twice after a
+-- crash); the batch_id makes ingestion idempotent so exec_details rows and the
+-- executions counters are written exactly once.
+
+CREATE TABLE IF NOT EXISTS lumos.result_batches (
+    batch_id     VARCHAR(255) PRIMARY KEY,
+    execid       VARCHAR(50)  NOT NULL,
+    row_count    INTEGER      NOT NULL,
+    received_at  TIMESTAMP    NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE INDEX IF NOT EXISTS result_batches_received_idx
+    ON lumos.result_batches (received_at);
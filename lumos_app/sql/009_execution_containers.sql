@@ -0,0 +1,13 @@
+-- Where each execution's containers run (app/services/stop_containers.py).
+-- Written by runpod when a container starts, so stopping an execution can
+-- go straight to its hosts instead of listing every container on every
+-- server. Sharded executions have one row per shard ({execid}_s{n}).
+
+CREATE TABLE IF NOT EXISTS lumos.execution_containers (
+    execid          VARCHAR(50)   NOT NULL,   -- lumos.executions.rowid
+    container_name  VARCHAR(100)  NOT NULL,
+    host            VARCHAR(200)  NOT NULL,
+    container_id    VARCHAR(100)  NOT NULL,
+    launched_at     TIMESTAMP     NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (execid, container_name)
+);
@@ -0,0 +1,37 @@
+-- Placement ledger (app/services/ledger.py): one row per launched container
+-- with where it ran, what image, when it started and finished and how it
+-- exited. Grows out of the execution_containers index from 009, whose rows
+-- are kept. Written in batches by the dispatcher; read by stop, the reports
+-- API and the reaper.
+
+DO $$
+BEGIN
+    IF to_regclass('lumos.execution_containers') IS NOT NULL
+       AND to_regclass('lumos.container_ledger') IS NULL THEN
+        ALTER TABLE lumos.execution_containers RENAME TO container_ledger;
+        ALTER TABLE lumos.container_ledger RENAME COLUMN launched_at TO started_at;
+    END IF;
+END
+$$;
+
+CREATE TABLE IF NOT EXISTS lumos.container_ledger (
+    execid          VARCHAR(50)   NOT NULL,   -- lumos.executions.rowid
+    container_name  VARCHAR(100)  NOT NULL,
+    host            VARCHAR(200)  NOT NULL,
+    container_id    VARCHAR(100)  NOT NULL,
+    started_at      TIMESTAMP     NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (execid, container_name)
+);
+
+ALTER TABLE lumos.container_ledger ADD COLUMN IF NOT EXISTS shard_no INTEGER;
+ALTER TABLE lumos.container_ledger ADD COLUMN IF NOT EXISTS image VARCHAR(200);
+ALTER TABLE lumos.container_ledger ADD COLUMN IF NOT EXISTS finished_at TIMESTAMP;
+ALTER TABLE lumos.container_ledger ADD COLUMN IF NOT EXISTS exit_code INTEGER;
+
+-- Containers still running, per host (capacity, reaper)
+CREATE INDEX IF NOT EXISTS container_ledger_open_idx
+    ON lumos.container_ledger (host)
+    WHERE finished_at IS NULL;
+
+CREATE INDEX IF NOT EXISTS container_ledger_container_id_idx
+    ON lumos.container_ledger (container_id);
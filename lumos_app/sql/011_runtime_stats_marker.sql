@@ -0,0 +1,21 @@
+-- Progress marker for app/services/runtimestats.py, replacing the exec_date
+-- watermark of 006. A result is folded into the estimates once and then
+-- marked, so rows committed late with an older exec_date, rows sharing an
+-- exec_date across a batch limit and rows without a usable exec_time are
+-- neither skipped nor re-read.
+
+ALTER TABLE lumos.exec_details
+    ADD COLUMN IF NOT EXISTS runtime_counted BOOLEAN NOT NULL DEFAULT FALSE;
+
+-- Rows the watermark already covered
+UPDATE lumos.exec_details
+SET runtime_counted = TRUE
+WHERE NOT runtime_counted
+  AND exec_date <= (SELECT MAX(last_exec_date) FROM lumos.test_runtime_stats);
+
+CREATE INDEX IF NOT EXISTS exec_details_runtime_pending_idx
+    ON lumos.exec_details (exec_date)
+    WHERE NOT runtime_counted;
+
+-- Only the watermark scan used it
+DROP INDEX IF EXISTS lumos.exec_details_exec_date_idx;
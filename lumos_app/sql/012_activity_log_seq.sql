@@ -0,0 +1,11 @@
+-- Unique tiebreaker for the /users/api/allaudit keyset cursor.
+-- act_id ("<user>_<ddmmyyyyHHMMSS>") repeats when one user logs two actions in
+-- the same second, so the cursor now orders by (act_date, act_seq). Existing
+-- rows are numbered when the column is added. Replaces the 001 index.
+
+ALTER TABLE lumos.activity_log ADD COLUMN IF NOT EXISTS act_seq BIGSERIAL;
+
+DROP INDEX IF EXISTS lumos.activity_log_act_date_idx;
+
+CREATE INDEX IF NOT EXISTS activity_log_act_date_seq_idx
+    ON lumos.activity_log (act_date DESC, act_seq DESC);